@@ -0,0 +1,213 @@
+"""Background export of viewer artefacts into versioned run directories.
+
+The render thread only snapshots surfaces (raw RGBA bytes) and metric series
+(NumPy copies); PNG encoding, chart rendering and table serialisation run on
+a small worker pool. Run directories come from :mod:`run_dirs`.
+"""
+
+import csv
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from metric_store import plot_points
+from tracing import traced
+
+
+def sanitize_metric_name(name: str) -> str:
+    return "".join(c if c.isalnum() or c in {"_", "-"} else "_" for c in name)
+
+
+class SurfaceSnapshot:
+    """Raw RGBA copy of a surface that can be encoded off the render thread."""
+
+    __slots__ = ("size", "data")
+
+    def __init__(self, size, data: bytes):
+        self.size = size
+        self.data = data
+
+    @classmethod
+    def from_surface(cls, surface):
+        import pygame
+
+        return cls(surface.get_size(), pygame.image.tostring(surface, "RGBA"))
+
+    @traced("export", "save_surface")
+    def save(self, path: Path) -> Path:
+        Image.frombytes("RGBA", self.size, self.data).save(path)
+        return path
+
+
+class SeriesSnapshot:
+    """Copy of one metric series together with its run offset."""
+
+    __slots__ = ("name", "values", "first_index")
+
+    def __init__(self, name: str, values: np.ndarray, first_index: int = 0):
+        self.name = name
+        self.values = values
+        self.first_index = first_index
+
+
+@traced("export")
+def render_metric_chart(series: SeriesSnapshot, color, path: Path, downsample_method: str = "lttb") -> Path:
+    """Render ``series`` as a 640x360 line chart and save it to ``path``."""
+
+    width, height = 640, 360
+    padding = 40
+    plot_left = padding
+    plot_top = padding
+    plot_right = width - padding
+    plot_bottom = height - padding
+
+    img = Image.new("RGB", (width, height), (255, 255, 255))
+    drawer = ImageDraw.Draw(img)
+    drawer.rectangle([(plot_left, plot_top), (plot_right, plot_bottom)], outline=(200, 200, 200))
+
+    points = plot_points(
+        series.values,
+        plot_left,
+        plot_bottom,
+        plot_right - plot_left,
+        plot_bottom - plot_top,
+        1e-9,
+        downsample_method,
+    )
+    if len(points) == 1:
+        drawer.ellipse(
+            [
+                (points[0][0] - 2, points[0][1] - 2),
+                (points[0][0] + 2, points[0][1] + 2),
+            ],
+            fill=color,
+        )
+    else:
+        drawer.line(points, fill=color, width=2)
+
+    drawer.text((plot_left, plot_top - 24), str(series.name), fill=(80, 80, 80))
+    img.save(path)
+    return path
+
+
+@traced("export")
+def write_series_tables(series_list: list[SeriesSnapshot], csv_path: Path, json_path: Path) -> list[Path]:
+    """Write all series side by side as CSV and JSON, one row per episode."""
+
+    first_index = min(series.first_index for series in series_list)
+    end_index = max(series.first_index + len(series.values) for series in series_list)
+    if end_index == first_index:
+        return []
+
+    def value_at(series, index):
+        offset = index - series.first_index
+        if 0 <= offset < len(series.values):
+            return float(series.values[offset])
+        return None
+
+    rows = []
+    for index in range(first_index, end_index):
+        row = {"episode": index + 1}
+        for series in series_list:
+            row[series.name] = value_at(series, index)
+        rows.append(row)
+
+    fieldnames = ["episode"] + [series.name for series in series_list]
+    with csv_path.open("w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({key: "" if value is None else value for key, value in row.items()})
+
+    with json_path.open("w", encoding="utf-8") as jsonfile:
+        json.dump(rows, jsonfile, ensure_ascii=False)
+
+    return [csv_path, json_path]
+
+
+class ArtifactExporter:
+    """Encode viewer artefacts on a worker pool.
+
+    Parameters
+    ----------
+    max_workers: int
+        Number of worker threads. PIL releases the GIL while encoding, so
+        several PNGs are compressed in parallel.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="artifact-export")
+
+    def submit(
+        self,
+        run_dir: Path,
+        timestamp: str,
+        surfaces: dict[str, SurfaceSnapshot],
+        series_list: list[SeriesSnapshot],
+        colors,
+        write_tables: bool = True,
+        downsample_method: str = "lttb",
+    ) -> Future:
+        """Schedule all exports and return a future for the written paths.
+
+        ``surfaces`` maps a file prefix (e.g. ``"maze_view"``) to a snapshot.
+        The returned future resolves to the list of written files once every
+        job has finished, or to the first exception raised by a job.
+        """
+
+        jobs = []
+        for prefix, snapshot in surfaces.items():
+            jobs.append(self._executor.submit(snapshot.save, run_dir / f"{prefix}_{timestamp}.png"))
+
+        for idx, series in enumerate(series_list):
+            color = colors[idx % len(colors)]
+            path = run_dir / f"metric_{sanitize_metric_name(series.name)}_{timestamp}.png"
+            jobs.append(self._executor.submit(render_metric_chart, series, color, path, downsample_method))
+
+        if write_tables and series_list:
+            jobs.append(
+                self._executor.submit(
+                    write_series_tables,
+                    series_list,
+                    run_dir / f"metric_series_{timestamp}.csv",
+                    run_dir / f"metric_series_{timestamp}.json",
+                )
+            )
+
+        return _gather(jobs)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+def _gather(jobs: list[Future]) -> Future:
+    """Combine ``jobs`` into one future resolving to the flattened results."""
+
+    combined: Future = Future()
+    remaining = [len(jobs)]
+    lock = threading.Lock()
+
+    def on_done(_job):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        paths = []
+        for job in jobs:
+            error = job.exception()
+            if error is not None:
+                combined.set_exception(error)
+                return
+            result = job.result()
+            paths.extend(result if isinstance(result, list) else [result])
+        combined.set_result(paths)
+
+    if not jobs:
+        combined.set_result([])
+    for job in jobs:
+        job.add_done_callback(on_done)
+    return combined
@@ -0,0 +1,384 @@
+"""Shared command-line handling for the training entry points.
+
+Every entry point accepts the same options for the maze, the hyperparameters
+and the output paths. Values that are not given on the command line are
+asked for interactively, unless ``--batch`` is passed (or stdin is not a
+terminal), in which case the defaults below are used. This module only
+depends on NumPy so headless runs never import Pygame, pandas or PIL.
+"""
+
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+
+import tracing
+from callback_protocol import RESET_SIGNAL
+from convert import FEASIBILITY_BACKENDS, Feasibility
+from learn import UPDATE_RULES, Agent
+from maze import Maze
+from memory_planner import MemoryBudgetError, plan_memory, resolve_budget
+from planning import PLANNING_MODES
+from start_schedulers import START_SCHEDULERS, make_start_scheduler
+from state_reduction import ReducedProblem
+from tree_oracle import TreeOracle
+
+TRAINING_ENGINES = ("q-learning", "parallel")
+
+BATCH_DEFAULTS = {
+    "size": [4, 4],
+    "start": [0, 0],
+    "gamma": 0.9,
+    "lrn_rate": 0.9,
+}
+
+
+def prompt_for_value(prompt, caster, validator=lambda value: True, error_message="Invalid input"):
+    while True:
+        try:
+            value = caster(input(prompt))
+            if validator(value):
+                return value
+            print(error_message)
+        except (ValueError, IndexError):
+            print(error_message)
+
+
+def build_parser(description: str, view: bool = True) -> argparse.ArgumentParser:
+    """Create the argument parser shared by the training scripts."""
+
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--size", nargs=2, type=int, metavar=("NX", "NY"), help="Maze dimensions.")
+    parser.add_argument("--start", nargs=2, type=int, metavar=("X", "Y"), help="Zero-based start cell.")
+    parser.add_argument("--seed", type=int, help="Seed for maze generation and training.")
+    parser.add_argument(
+        "--feasibility",
+        choices=("auto", *FEASIBILITY_BACKENDS),
+        default="auto",
+        help="Storage of the feasibility matrix; auto picks the first layout that fits --memory-budget.",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        default="auto",
+        metavar="SIZE",
+        help="Memory the run may use, e.g. 2G (default auto: 80%% of the available memory; off: no check).",
+    )
+    add_training_arguments(parser)
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Never prompt; use defaults for options that were not given.",
+    )
+    parser.add_argument("--output-json", type=Path, help="Write a JSON summary of the run to this file.")
+    parser.add_argument("--maze-image", type=Path, help="Save a PNG of the generated maze to this file.")
+    if view:
+        parser.add_argument("--no-view", action="store_true", help="Run headless without opening a window.")
+    return parser
+
+
+def add_training_arguments(parser: argparse.ArgumentParser):
+    """Add the hyperparameter and ``Agent.train`` options to ``parser``."""
+
+    parser.add_argument("--gamma", type=float, help="Discount factor in (0, 1].")
+    parser.add_argument("--lrn-rate", dest="lrn_rate", type=float, help="Learning rate in (0, 1].")
+    parser.add_argument("--epochs", type=int, default=1000, help="Number of training episodes.")
+    parser.add_argument(
+        "--engine",
+        choices=TRAINING_ENGINES,
+        default=TRAINING_ENGINES[0],
+        help="Training engine: one Q-learning loop or parallel Hogwild workers on a shared Q.",
+    )
+    parser.add_argument("--workers", type=int, help="Worker processes for --engine parallel (default: one per CPU).")
+    parser.add_argument(
+        "--update-rule",
+        choices=UPDATE_RULES,
+        default=UPDATE_RULES[0],
+        help="One-step Q-learning or Watkins' Q(lambda).",
+    )
+    parser.add_argument("--trace-lambda", type=float, default=0.9, help="Trace decay lambda for Q(lambda).")
+    parser.add_argument("--max-trace-length", type=int, default=64, help="Pairs kept in the Q(lambda) trace.")
+    parser.add_argument(
+        "--planning",
+        choices=PLANNING_MODES,
+        default="none",
+        help="Model-based planning backups between real steps.",
+    )
+    parser.add_argument("--planning-steps", type=int, default=10, help="Planning backups per real step.")
+    parser.add_argument(
+        "--start-scheduler",
+        choices=START_SCHEDULERS,
+        default="fixed",
+        help="How episode start states are chosen (reverse curriculum or count-based).",
+    )
+    parser.add_argument(
+        "--reduce",
+        action="store_true",
+        help="Train on the maze graph with dead ends filled and corridors contracted.",
+    )
+    stopping = parser.add_argument_group("early stopping", "Stop before --epochs once any criterion is met.")
+    stopping.add_argument("--q-tolerance", type=float, help="Stop when the max |dQ| of an episode stays below this.")
+    stopping.add_argument(
+        "--q-patience",
+        type=int,
+        default=10,
+        help="Consecutive episodes below --q-tolerance required to stop.",
+    )
+    stopping.add_argument(
+        "--policy-patience",
+        type=int,
+        help="Stop when the greedy policy is unchanged for this many episodes.",
+    )
+    stopping.add_argument(
+        "--greedy-check-every",
+        type=int,
+        help="Every K episodes, stop if a greedy walk from the start reaches the goal.",
+    )
+
+
+def resolve_run_arguments(parser: argparse.ArgumentParser, args: argparse.Namespace) -> argparse.Namespace:
+    """Validate ``args`` and fill in missing values by prompting or defaults."""
+
+    interactive = not args.batch and sys.stdin.isatty()
+
+    if args.size is None:
+        if interactive:
+            args.size = prompt_for_value(
+                "Enter maze dimensions separated by a space (e.g. 4 4): ",
+                lambda raw: [int(v) for v in raw.split()],
+                lambda vals: len(vals) == 2 and all(v > 0 for v in vals),
+                "Please provide two positive integers separated by a space.",
+            )
+        else:
+            args.size = list(BATCH_DEFAULTS["size"])
+    if not all(v > 0 for v in args.size):
+        parser.error("--size values must be positive.")
+    nx, ny = args.size
+
+    if args.start is None:
+        if interactive:
+            args.start = prompt_for_value(
+                "Enter x and y coordinates of the maze start separated by a space: ",
+                lambda raw: [int(v) for v in raw.split()],
+                lambda vals: len(vals) == 2 and 0 <= vals[0] < nx and 0 <= vals[1] < ny,
+                "Start coordinates should be inside the maze. Numbering is zero-based.",
+            )
+        else:
+            args.start = list(BATCH_DEFAULTS["start"])
+    if not (0 <= args.start[0] < nx and 0 <= args.start[1] < ny):
+        parser.error("--start must be inside the maze. Numbering is zero-based.")
+
+    for name, label in (("gamma", "gamma"), ("lrn_rate", "learning rate")):
+        if getattr(args, name) is None:
+            if interactive:
+                value = prompt_for_value(
+                    f"Enter the {label} value (0, 1]: ",
+                    float,
+                    lambda val: 0 < val <= 1,
+                    f"{label.capitalize()} should be a number between 0 and 1.",
+                )
+            else:
+                value = BATCH_DEFAULTS[name]
+            setattr(args, name, value)
+    return plan_run_memory(parser, validate_training_arguments(parser, args))
+
+
+def validate_training_arguments(parser: argparse.ArgumentParser, args: argparse.Namespace) -> argparse.Namespace:
+    """Check the options added by :func:`add_training_arguments`.
+
+    ``--gamma`` and ``--lrn-rate`` that are still missing get their batch
+    defaults.
+    """
+
+    for name in ("gamma", "lrn_rate"):
+        if getattr(args, name) is None:
+            setattr(args, name, BATCH_DEFAULTS[name])
+        if not 0 < getattr(args, name) <= 1:
+            parser.error(f"--{name.replace('_', '-')} should be a number in (0, 1].")
+
+    if args.epochs <= 0:
+        parser.error("--epochs must be positive.")
+    if not 0 <= args.trace_lambda <= 1:
+        parser.error("--trace-lambda should be a number in [0, 1].")
+    positive = ("workers", "max_trace_length", "planning_steps", "q_patience", "policy_patience", "greedy_check_every")
+    for name in positive:
+        value = getattr(args, name)
+        if value is not None and value <= 0:
+            parser.error(f"--{name.replace('_', '-')} must be positive.")
+    return args
+
+
+def plan_run_memory(parser: argparse.ArgumentParser, args: argparse.Namespace) -> argparse.Namespace:
+    """Choose the storage of F and R that fits ``--memory-budget``.
+
+    Sets ``args.feasibility`` to the chosen backend and ``args.reward_dtype``.
+    A run that fits no layout stops here, before anything is allocated, with
+    the estimate of :mod:`memory_planner` as the error message.
+    """
+
+    run = {
+        "epochs": args.epochs,
+        "engine": args.engine,
+        "workers": args.workers,
+        "backend": getattr(args, "backend", "thread"),
+    }
+    try:
+        budget = resolve_budget(args.memory_budget)
+        plan = plan_memory(*args.size, budget, args.feasibility, args.reduce, **run)
+    except (MemoryBudgetError, ValueError) as exc:
+        parser.error(str(exc))
+    args.feasibility = plan.feasibility
+    args.reward_dtype = plan.reward_dtype
+    return args
+
+
+def seed_everything(seed):
+    """Seed both RNGs in use: ``random`` (maze generation) and NumPy (training)."""
+
+    if seed is None:
+        return
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def build_problem(args: argparse.Namespace):
+    """Seed the RNGs and create the maze, feasibility matrix and agent."""
+
+    seed_everything(args.seed)
+    start_x, start_y = args.start
+    maze = Maze(args.size[0], args.size[1], [start_x, start_y])
+    feasibility = Feasibility(maze, args.feasibility)
+    agent = Agent(feasibility, args.gamma, args.lrn_rate, maze, start_x, start_y, args.reward_dtype)
+    return maze, feasibility, agent
+
+
+def build_oracle(feasibility):
+    """Return a :class:`TreeOracle` for the maze, or None if it has loops."""
+
+    try:
+        return TreeOracle(feasibility.F_matrix)
+    except ValueError:
+        return None
+
+
+def run_summary(args: argparse.Namespace, agent, path, train_seconds: float, stop=None, oracle=None) -> dict:
+    """Describe a finished run in a JSON-serialisable dictionary.
+
+    ``stop`` is the dictionary returned by ``Agent.train``. With a
+    :class:`TreeOracle` the walk is also compared with the optimal path.
+    """
+
+    states = [int(state) for state in path if isinstance(state, (int, np.integer))]
+    score = oracle.score_walk(path, int(agent.start), int(agent.goal)) if oracle is not None else {}
+    return {
+        "size": list(args.size),
+        "start": list(args.start),
+        "goal": int(agent.goal),
+        "seed": args.seed,
+        "gamma": args.gamma,
+        "lrn_rate": args.lrn_rate,
+        "epochs": args.epochs,
+        "engine": args.engine,
+        "workers": args.workers if args.engine == "parallel" else None,
+        "planning": args.planning,
+        "update_rule": args.update_rule,
+        "start_scheduler": args.start_scheduler,
+        "reduce": args.reduce,
+        "solved": bool(states) and states[-1] == int(agent.goal) and "break" not in path,
+        "path": states,
+        "path_length": max(0, len(states) - 1),
+        "optimal_length": score.get("optimal_length"),
+        "excess_length": score.get("excess"),
+        "train_seconds": train_seconds,
+        "stop_reason": stop["reason"] if stop else None,
+        "episodes": stop["episodes"] if stop else None,
+    }
+
+
+def training_kwargs(args: argparse.Namespace) -> dict:
+    """Translate parsed options into keyword arguments for ``Agent.train``."""
+
+    return {
+        "q_tolerance": args.q_tolerance,
+        "q_patience": args.q_patience,
+        "policy_patience": args.policy_patience,
+        "greedy_check_every": args.greedy_check_every,
+        "planning": args.planning,
+        "planning_steps": args.planning_steps,
+        "update_rule": args.update_rule,
+        "trace_lambda": args.trace_lambda,
+        "max_trace_length": args.max_trace_length,
+        "start_scheduler": make_start_scheduler(args.start_scheduler),
+    }
+
+
+def train_agent(args: argparse.Namespace, agent, feasibility, state_callback=None, **kwargs) -> dict:
+    """Train ``agent`` with the options in ``args`` and return ``Agent.train``'s result.
+
+    ``--engine parallel`` trains with :func:`parallel_training.train_parallel`
+    instead; it emits no state callbacks.
+
+    With ``--reduce`` a second agent is trained on the reduced state space;
+    its Q matrix is then lifted back into ``agent.Q`` (in place, so viewers
+    holding the array see the result) and states passed to
+    ``state_callback`` are translated to original cell IDs.
+
+    While :mod:`tracing` is enabled the run, its episodes and batches of
+    steps are recorded as spans.
+    """
+
+    if not tracing.enabled():
+        return _train(args, agent, feasibility, state_callback, kwargs)
+    step_tracer = tracing.StepTracer(state_callback)
+    with tracing.span("train", "training", engine=args.engine, epochs=args.epochs):
+        stop = _train(args, agent, feasibility, step_tracer, kwargs)
+    step_tracer.close()
+    return stop
+
+
+def _train(args: argparse.Namespace, agent, feasibility, state_callback, kwargs: dict) -> dict:
+    options = {**training_kwargs(args), **kwargs}
+    if not args.reduce:
+        return _run_engine(args, agent, feasibility.F_matrix, state_callback, options)
+
+    reduced = ReducedProblem(feasibility.F_matrix, agent.R, agent.start, agent.goal, agent.gamma)
+    reduced_agent = Agent.from_matrices(
+        reduced.F,
+        reduced.start,
+        reduced.goal,
+        agent.gamma,
+        agent.lrn_rate,
+        R=reduced.R,
+        discounts=reduced.discounts,
+    )
+
+    def translate(state):
+        state_callback(state if state == RESET_SIGNAL else int(reduced.states[state]))
+
+    callback = translate if state_callback is not None else None
+    stop = _run_engine(args, reduced_agent, reduced.F, callback, options)
+    agent.Q[...] = reduced.lift_q(reduced_agent.Q)
+    stop["reduced_states"] = int(reduced.states.size)
+    return stop
+
+
+def _run_engine(args: argparse.Namespace, agent, F, state_callback, options: dict) -> dict:
+    if args.engine == "parallel":
+        # Workers run in other processes, so there are no per-state callbacks.
+        from parallel_training import train_parallel
+
+        return train_parallel(agent, F, args.epochs, workers=args.workers, seed=args.seed, **options)
+    return agent.train(F, args.epochs, state_callback=state_callback, **options)
+
+
+def write_summary(path, summary: dict):
+    """Write ``summary`` as JSON, creating parent directories when needed."""
+
+    if path is None:
+        return
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as handle:
+        json.dump(summary, handle, indent=2)
@@ -1,20 +1,79 @@
+import operator
+
 import numpy as np
 
+# Storage of Feasibility.F_matrix, from the historical layout to the smallest.
+FEASIBILITY_BACKENDS = ("dense", "compact", "sparse")
+
+# Wall bits of Maze.to_walls (maze_dataset.WALL_BITS).
+_NORTH, _SOUTH, _EAST, _WEST = 1, 2, 4, 8
+
 
 class Feasibility:
-    def __init__(self, maze_):
-        self.cells = maze_.maze_grid.shape[0] * maze_.maze_grid.shape[1]
-        self.F_matrix = np.zeros(shape=[self.cells, self.cells], dtype=int)
-        self.numbered_grid = np.arange(self.cells).reshape((maze_.maze_grid.shape[0], maze_.maze_grid.shape[1]))
-        self.get_neighbors(maze_)
+    """Feasible moves between the cells of a maze.
+
+    Parameters
+    ----------
+    maze_: Maze
+        The maze; cell ``(x, y)`` is state ``x * ny + y``.
+    backend: str
+        Storage of ``F_matrix``: ``"dense"`` (an int matrix, the historical
+        layout), ``"compact"`` (int8, an eighth of the memory) or ``"sparse"``
+        (an :class:`AdjacencyMatrix`, memory linear in the number of cells).
+        Only ``F`` shrinks: ``Agent.R`` and ``Agent.Q`` stay dense
+        ``states x states`` tables in every backend.
+    """
+
+    def __init__(self, maze_, backend: str = "dense"):
+        self._build(maze_.to_walls(), backend)
+
+    @classmethod
+    def from_walls(cls, walls, backend: str = "dense") -> "Feasibility":
+        """Feasibility of a ``(nx, ny)`` grid of wall masks (see :meth:`Maze.to_walls`), without a Maze."""
+
+        feasibility = cls.__new__(cls)
+        feasibility._build(np.asarray(walls), backend)
+        return feasibility
+
+    def _build(self, walls, backend):
+        if backend not in FEASIBILITY_BACKENDS:
+            raise ValueError(f"Unknown feasibility backend {backend!r}; expected one of {FEASIBILITY_BACKENDS}")
+        self.backend = backend
+        self.cells = walls.size
+        self.numbered_grid = np.arange(self.cells).reshape(walls.shape)
+        rows, cols = wall_edges(walls)
+        self.F_matrix = feasibility_matrix(self.cells, rows, cols, backend)
+
+
+def wall_neighbor_table(walls) -> np.ndarray:
+    """Return the open neighbours of every cell of a wall-mask grid.
+
+    Row ``state`` of the ``(cells, 4)`` result holds the states reached
+    through the W, N, S and E walls of ``state``, or -1 where the wall is
+    closed or the grid ends. Each move reads the wall of the cell it starts
+    from, as :func:`find_reachable_neighbors` does, and a whole direction is
+    one shifted comparison over the grid.
+    """
 
-    def get_neighbors(self, maze):
-        for (x_idx, y_idx), cell_num in np.ndenumerate(self.numbered_grid):
-            curr_cell = maze.maze_grid[x_idx, y_idx]
-            reachable = find_reachable_neighbors(maze, curr_cell)
-            for neighbor in reachable:
-                neighbor_num = self.numbered_grid[neighbor.x, neighbor.y]
-                self.F_matrix[int(cell_num), neighbor_num] = 1
+    walls = np.asarray(walls)
+    nx, ny = walls.shape
+    states = np.arange(nx * ny, dtype=np.int64).reshape(nx, ny)
+    # Ascending order: state - ny, state - 1, state + 1, state + ny.
+    table = np.full((nx, ny, 4), -1, dtype=np.int64)
+    table[1:, :, 0] = np.where(walls[1:] & _WEST, -1, states[:-1])
+    table[:, 1:, 1] = np.where(walls[:, 1:] & _NORTH, -1, states[:, :-1])
+    table[:, :-1, 2] = np.where(walls[:, :-1] & _SOUTH, -1, states[:, 1:])
+    table[:-1, :, 3] = np.where(walls[:-1] & _EAST, -1, states[1:])
+    return table.reshape(nx * ny, 4)
+
+
+def wall_edges(walls):
+    """Return the ``(rows, cols)`` of all feasible moves of a wall-mask grid, sorted by row."""
+
+    table = wall_neighbor_table(walls)
+    open_moves = table >= 0
+    rows = np.repeat(np.arange(table.shape[0], dtype=np.int64), np.count_nonzero(open_moves, axis=1))
+    return rows, table[open_moves]
 
 
 def find_reachable_neighbors(maze, cell):
@@ -25,3 +84,114 @@ def find_reachable_neighbors(maze, cell):
             if not cell.walls[direction]:
                 neighbors.append(maze.cell_at(neighbor_x, neighbor_y))
     return neighbors
+
+
+class AdjacencyMatrix:
+    """Sparse 0/1 transition matrix in compressed-row form.
+
+    The ``"sparse"`` storage of :class:`Feasibility`. It offers the part of
+    the ndarray interface the training code reads (``shape``, rows
+    ``F[state]``, entries ``F[state, next_state]`` and ``F.T``) but is not an
+    ndarray: use :func:`feasible_edges` or :func:`neighbor_lists` instead of
+    ``F == 1``, and :meth:`toarray` for a dense copy.
+
+    Parameters
+    ----------
+    indptr: np.ndarray
+        Row ``i`` holds the columns ``indices[indptr[i] : indptr[i + 1]]``.
+    indices: np.ndarray
+        Column of every feasible move, ascending within each row.
+    """
+
+    ndim = 2
+    dtype = np.dtype(np.int8)
+
+    def __init__(self, indptr, indices):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.shape = (self.indptr.size - 1, self.indptr.size - 1)
+
+    @classmethod
+    def from_edges(cls, n_states: int, rows, cols) -> "AdjacencyMatrix":
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        keys = rows * n_states + cols
+        # wall_edges already yields sorted moves; only sort when needed.
+        if np.any(keys[1:] < keys[:-1]):
+            order = np.argsort(keys, kind="stable")
+            rows, cols = rows[order], cols[order]
+        return cls(np.searchsorted(rows, np.arange(n_states + 1)), cols)
+
+    @property
+    def nnz(self) -> int:
+        return int(self.indices.size)
+
+    @property
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.indices.nbytes
+
+    @property
+    def T(self) -> "AdjacencyMatrix":
+        rows, cols = self.edges()
+        return AdjacencyMatrix.from_edges(self.shape[0], cols, rows)
+
+    def edges(self):
+        """``(rows, cols)`` of the feasible moves, sorted by row."""
+
+        rows = np.repeat(np.arange(self.shape[0], dtype=np.int64), np.diff(self.indptr))
+        return rows, self.indices.astype(np.int64)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            state, next_state = key
+            return int(np.any(self._row(state) == operator.index(next_state)))
+        row = np.zeros(self.shape[1], dtype=self.dtype)
+        row[self._row(key)] = 1
+        return row
+
+    def _row(self, state):
+        state = operator.index(state)
+        if state < 0:
+            state += self.shape[0]
+        return self.indices[self.indptr[state] : self.indptr[state + 1]]
+
+    def toarray(self, dtype=int) -> np.ndarray:
+        dense = np.zeros(self.shape, dtype=dtype)
+        dense[self.edges()] = 1
+        return dense
+
+
+def feasibility_matrix(n_states: int, rows, cols, backend: str = "dense"):
+    """Build ``F`` with the moves ``rows[i] -> cols[i]`` in the given backend storage."""
+
+    if backend == "sparse":
+        return AdjacencyMatrix.from_edges(n_states, rows, cols)
+    F = np.zeros(shape=[n_states, n_states], dtype=np.int8 if backend == "compact" else int)
+    F[rows, cols] = 1
+    return F
+
+
+def as_matrix(F):
+    """``F`` as an ndarray, or unchanged when it is an :class:`AdjacencyMatrix`."""
+
+    return F if isinstance(F, AdjacencyMatrix) else np.asarray(F)
+
+
+def feasible_edges(F):
+    """Return the ``(rows, cols)`` of the feasible moves in ``F``, sorted by row."""
+
+    if isinstance(F, AdjacencyMatrix):
+        return F.edges()
+    return np.nonzero(np.asarray(F) == 1)
+
+
+def neighbor_lists(F):
+    """Return the feasible next states of every state as a list of arrays.
+
+    Looking up ``neighbor_lists(F)[state]`` replaces a scan over a full row of
+    ``F``; the neighbours are in ascending order, like that scan.
+    """
+
+    rows, cols = feasible_edges(F)
+    bounds = np.searchsorted(rows, np.arange(F.shape[0] + 1))
+    return [cols[bounds[state] : bounds[state + 1]] for state in range(F.shape[0])]
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from cell import Cell
 from PIL import Image, ImageDraw, ImageFont
 
@@ -7,6 +9,15 @@ cell_side = 100
 line_thickness = 10
 
 
+@lru_cache(maxsize=None)
+def load_font(size=18):
+    """Load (once per size) the label font, falling back to PIL's default."""
+    try:
+        return ImageFont.truetype("Arial Unicode.ttf", size)
+    except OSError:
+        return ImageFont.load_default()
+
+
 def draw_cell(cell, image, color="black", count=0, wide=5, method="grid"):
     # Cell coordinates on the image calculated from its (x, y) coordinates,
     # cell side length (100 pt), image margin (90 pt) and line thickness (10 pt).
@@ -22,20 +33,10 @@ def draw_cell(cell, image, color="black", count=0, wide=5, method="grid"):
     for wall in shown_walls:
         image.line(wall, fill=color, width=wide)
     if cell.status == 'Start' or cell.status == 'End':
-        try:
-            font = ImageFont.truetype("Arial Unicode.ttf", 18)
-            image.text((x - 25, y - 10), cell.status.upper(), (255, 0, 0), font=font)
-        except OSError:
-            font = ImageFont.load_default()
-            image.text((x - 25, y - 10), cell.status.upper(), (255, 0, 0), font=font)
+        image.text((x - 25, y - 10), cell.status.upper(), (255, 0, 0), font=load_font(18))
     else:
         if method == "grid":
-            try:
-                font = ImageFont.truetype("Arial Unicode.ttf", 18)
-                image.text((x - 35, y - 35), str(count), fill="#D3D3D3", font=font)
-            except OSError:
-                font = ImageFont.load_default()
-                image.text((x - 35, y - 35), str(count), fill="#D3D3D3", font=font)
+            image.text((x - 35, y - 35), str(count), fill="#D3D3D3", font=load_font(18))
 
 
 def draw_grid(image, x_cells, y_cells):
@@ -0,0 +1,223 @@
+"""Open and close walls of a maze without rebuilding everything.
+
+Rebuilding after a wall change means a new ``Maze``, an O(N^2)
+``Feasibility`` and an ``Agent`` whose ``Q`` starts from zero.
+:class:`DynamicMaze` instead patches, per changed wall:
+
+* the walls of the two ``Cell`` objects,
+* two entries of the feasibility matrix and of ``Agent.R``,
+* the neighbour lists used by ``Agent.train`` and ``Agent.greedy_path``,
+* the cached next-hop trees of a :class:`path_service.PathService` that
+  actually used the changed corridor.
+
+``Q`` is warm-started: a new corridor gets the value of the state it leads
+to, and a closed corridor only resets the states whose greedy route went
+through it. :meth:`DynamicMaze.repair` then runs prioritized sweeping from
+the changed states, so re-solving costs time proportional to the part of
+the maze whose values actually change.
+"""
+
+import heapq
+from collections import deque
+
+import numpy as np
+
+from cell import Cell
+from convert import AdjacencyMatrix, neighbor_lists
+from maze import Maze
+from planning import bellman_target
+from tree_oracle import TreeOracle
+
+
+class DynamicMaze:
+    """A maze, its feasibility matrix and an agent that change together.
+
+    Parameters
+    ----------
+    maze: Maze
+        The maze whose walls change; updated in place.
+    feasibility: Feasibility
+        Feasibility of ``maze``; ``F_matrix`` is updated in place, so it must
+        use the dense or compact backend.
+    agent: Agent
+        Agent for ``maze``; ``R`` and ``Q`` are updated in place.
+    path_service: PathService | None
+        Optional path service whose cache is kept consistent.
+
+    Attributes
+    ----------
+    neighbors: list[np.ndarray]
+        Feasible moves per state. Maze corridors are two-way, so these are
+        also the predecessors of every state.
+    version: int
+        Number of wall changes applied so far.
+    """
+
+    def __init__(self, maze, feasibility, agent, path_service=None):
+        if isinstance(feasibility.F_matrix, AdjacencyMatrix):
+            raise ValueError("DynamicMaze edits F in place; use a dense or compact Feasibility")
+        self.maze = maze
+        self.feasibility = feasibility
+        self.agent = agent
+        self.path_service = path_service
+        self.neighbors = neighbor_lists(self.F)
+        self.version = 0
+        self._dirty = set()
+        self._oracle = None
+        self._oracle_version = None
+
+    @property
+    def F(self) -> np.ndarray:
+        return self.feasibility.F_matrix
+
+    @property
+    def oracle(self):
+        """:class:`TreeOracle` for the current maze, or None if it is no longer a tree.
+
+        The LCA index cannot be patched, so it is rebuilt on first use after
+        a change.
+        """
+
+        if self._oracle_version != self.version:
+            try:
+                self._oracle = TreeOracle(self.F)
+            except ValueError:
+                self._oracle = None
+            self._oracle_version = self.version
+        return self._oracle
+
+    def open_wall(self, x: int, y: int, direction: str) -> bool:
+        return self.set_wall(x, y, direction, closed=False)
+
+    def close_wall(self, x: int, y: int, direction: str) -> bool:
+        return self.set_wall(x, y, direction, closed=True)
+
+    def set_wall(self, x: int, y: int, direction: str, closed: bool) -> bool:
+        """Open or close the wall on side ``direction`` of cell ``(x, y)``.
+
+        Returns False when the wall already was in the requested state.
+
+        Raises
+        ------
+        ValueError
+            For an unknown direction or a wall on the outer boundary.
+        """
+
+        if direction not in Maze.delta:
+            raise ValueError(f"Unknown direction {direction!r}; expected one of {tuple(Maze.delta)}")
+        dx, dy = Maze.delta[direction]
+        nx, ny = x + dx, y + dy
+        inside = [0 <= cx < self.maze.nx and 0 <= cy < self.maze.ny for cx, cy in ((x, y), (nx, ny))]
+        if not all(inside):
+            raise ValueError(f"Wall {direction} of cell ({x}, {y}) is not between two cells")
+
+        cell = self.maze.cell_at(x, y)
+        if cell.walls[direction] == closed:
+            return False
+        cell.walls[direction] = closed
+        self.maze.cell_at(nx, ny).walls[Cell.wall_pairs[direction]] = closed
+
+        a = int(self.feasibility.numbered_grid[x, y])
+        b = int(self.feasibility.numbered_grid[nx, ny])
+        if closed:
+            # States whose greedy route used the corridor lose their values.
+            for state in self._routed_through(a, b) | self._routed_through(b, a):
+                self.agent.Q[state, self.neighbors[state]] = 0.0
+                self._dirty.add(state)
+
+        for u, v in ((a, b), (b, a)):
+            if closed:
+                self.F[u, v] = 0
+                self.neighbors[u] = self.neighbors[u][self.neighbors[u] != v]
+                self.agent.R[u, v] = 0.0
+                self.agent.Q[u, v] = 0.0
+            else:
+                self.F[u, v] = 1
+                self.neighbors[u] = np.insert(self.neighbors[u], np.searchsorted(self.neighbors[u], v), v)
+                self.agent.R[u, v] = 1000.0 if v == self.agent.goal else -0.1
+        if not closed:
+            for u, v in ((a, b), (b, a)):
+                self.agent.Q[u, v] = bellman_target(self.agent, self.neighbors, u, v)
+
+        if self.path_service is not None:
+            self.path_service.update_edge(a, b, not closed)
+            self.path_service.update_edge(b, a, not closed)
+        self._dirty.update((a, b))
+        self.version += 1
+        return True
+
+    def _routed_through(self, u: int, v: int) -> set:
+        # States whose greedy chain of moves reaches ``u`` and then takes ``u -> v``.
+        if self._greedy(u) != v:
+            return set()
+        region = {u}
+        frontier = deque([u])
+        while frontier:
+            state = frontier.popleft()
+            for previous in self.neighbors[state].tolist():
+                if previous not in region and previous != v and self._greedy(previous) == state:
+                    region.add(previous)
+                    frontier.append(previous)
+        return region
+
+    def _greedy(self, state: int) -> int:
+        actions = self.neighbors[state]
+        if not actions.size or state == self.agent.goal:
+            return -1
+        return int(actions[int(np.argmax(self.agent.Q[state, actions]))])
+
+    def repair(self, states=None, theta: float = 1e-3, max_updates=None) -> int:
+        """Re-solve ``Q`` around changed states with prioritized sweeping.
+
+        The model is exact, so every backup sets ``Q[s, a]`` to its Bellman
+        target instead of taking a ``lrn_rate`` step.
+
+        Parameters
+        ----------
+        states: iterable[int] | None
+            States to sweep from; by default the states touched by wall
+            changes since the last repair. ``range(n_states)`` solves the
+            whole maze.
+        theta: float
+            Bellman errors at or below this value are ignored.
+        max_updates: int | None
+            Upper bound on the number of backups.
+
+        Returns
+        -------
+        int
+            Number of backups applied.
+        """
+
+        if states is None:
+            states, self._dirty = self._dirty, set()
+        heap = []
+        priority = {}
+
+        def push(state, action):
+            if state == self.agent.goal:
+                return
+            error = abs(bellman_target(self.agent, self.neighbors, state, action) - float(self.agent.Q[state, action]))
+            if error <= theta or error <= priority.get((state, action), 0.0):
+                return
+            priority[(state, action)] = error
+            heapq.heappush(heap, (-error, state, action))
+
+        for state in states:
+            state = int(state)
+            for action in self.neighbors[state].tolist():
+                push(state, action)
+                push(action, state)
+
+        updates = 0
+        while heap and (max_updates is None or updates < max_updates):
+            neg_error, state, action = heapq.heappop(heap)
+            if priority.get((state, action)) != -neg_error:
+                continue
+            del priority[(state, action)]
+            self.agent.Q[state, action] = bellman_target(self.agent, self.neighbors, state, action)
+            updates += 1
+            for previous in self.neighbors[state].tolist():
+                push(previous, state)
+        return updates
+
@@ -0,0 +1,295 @@
+"""Animated GIF and image-sequence export of training episodes.
+
+Episodes (state sequences, e.g. from ``Agent.episode_traces`` or a
+:class:`training_log.TrainingLog`) and the solved path are turned into
+frames without replaying them in real time:
+
+* The maze background is drawn once, scaled down and converted to a
+  palette image whose last entries are reserved for the overlay colours,
+  so frames never need to be quantised.
+* Each frame only draws the trail segment added since the previous frame
+  onto a running canvas, plus the agent marker on a copy of it.
+* The frames are split into chunks that a process pool renders and
+  encodes. A worker rebuilds the canvas at the start of its chunk from the
+  episode prefix. GIF chunks share one palette, so their frame blocks are
+  concatenated into one file; image sequences are written as numbered PNGs.
+
+Example::
+
+    python train_and_solve.py --batch --size 12 12 --seed 1 --no-view --record-dir data/logs/run1
+    python episode_video.py data/logs/run1 --output run1.gif --every 20 --states-per-frame 4
+"""
+
+import argparse
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+from draw import cell_side, draw_image, line_thickness, margin
+
+FORMATS = ("gif", "png")
+OVERLAY_COLORS = {
+    "trail": (230, 80, 80),
+    "path": (0, 170, 0),
+    "agent": (0, 0, 255),
+    "start": (0, 255, 0),
+    "end": (255, 0, 0),
+}
+# Palette indices below this one are used by the background.
+_OVERLAY_BASE = 256 - len(OVERLAY_COLORS)
+_OVERLAY_INDEX = {name: _OVERLAY_BASE + offset for offset, name in enumerate(OVERLAY_COLORS)}
+
+# Per-process state of the pool workers, set by _init_worker.
+_background = None
+_geometry = None
+
+
+def render_background(maze, scale: float) -> Image.Image:
+    """Maze drawn like :mod:`draw`, scaled by ``scale`` and converted to a
+    palette image with the :data:`OVERLAY_COLORS` in its last entries."""
+
+    width, height = (margin + cell_side * dim for dim in maze.maze_grid.shape)
+    full = Image.new("RGB", (width, height), (255, 255, 255))
+    draw_image(ImageDraw.Draw(full), maze.maze_grid)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    background = full.resize(size, Image.Resampling.BOX).quantize(_OVERLAY_BASE, dither=Image.Dither.NONE)
+    palette = background.getpalette()[: 3 * _OVERLAY_BASE]
+    palette += [0] * (3 * _OVERLAY_BASE - len(palette))
+    for color in OVERLAY_COLORS.values():
+        palette += color
+    background.putpalette(palette)
+
+    # Start and end markers, as in the live viewer.
+    drawer = ImageDraw.Draw(background)
+    inset = (cell_side / 2 - line_thickness) * scale
+    for cell in maze.maze_grid.flat:
+        if cell.status in ("Start", "End"):
+            x, y = _center(cell.x, cell.y, scale)
+            drawer.rectangle((x - inset, y - inset, x + inset, y + inset), fill=_OVERLAY_INDEX[cell.status.lower()])
+    return background
+
+
+def _center(x, y, scale):
+    return (margin + line_thickness + x * cell_side) * scale, (margin + line_thickness + y * cell_side) * scale
+
+
+def select_episodes(count: int, every: int = 1) -> list:
+    """Indices of every ``every``-th episode out of ``count``, always including the last."""
+
+    if count <= 0:
+        return []
+    return sorted(set(range(0, count, every)) | {count - 1})
+
+
+def frame_plan(lengths, states_per_frame: int = 1) -> list:
+    """``(segment, end)`` per frame: segment ``segment`` is shown up to state ``end``.
+
+    Every segment gets a frame every ``states_per_frame`` states and always
+    one with its last state.
+    """
+
+    plan = []
+    for segment, length in enumerate(lengths):
+        ends = list(range(states_per_frame, length, states_per_frame)) + [length] if length else []
+        plan.extend((segment, end) for end in ends)
+    return plan
+
+
+def _init_worker(background, geometry):
+    global _background, _geometry
+    _background = background
+    _geometry = geometry
+
+
+def _render_frames(plan, segments):
+    """Render the frames of ``plan``; ``segments`` maps segment -> (label, states, color)."""
+
+    ny, scale = _geometry
+    radius = max(1.0, cell_side / 3 * scale)
+    width = max(1, round(line_thickness / 2 * scale))
+    frames = []
+    current, canvas, drawn = None, None, 0
+    for segment, end in plan:
+        label, states, color = segments[segment]
+        if segment != current:
+            current, canvas, drawn = segment, _background.copy(), 0
+            ImageDraw.Draw(canvas).text((4, 4), label, fill=_OVERLAY_INDEX["agent"])
+        # Only the states added since the previous frame are drawn.
+        points = [_center(*divmod(int(state), ny), scale) for state in states[max(0, drawn - 1) : end]]
+        drawer = ImageDraw.Draw(canvas)
+        if len(points) > 1:
+            drawer.line(points, fill=_OVERLAY_INDEX[color], width=width)
+        drawn = end
+
+        frame = canvas.copy()
+        x, y = points[-1]
+        ImageDraw.Draw(frame).ellipse((x - radius, y - radius, x + radius, y + radius), fill=_OVERLAY_INDEX["agent"])
+        frames.append(frame)
+    return frames
+
+
+def _render_chunk(first_frame, plan, segments, fmt, output, duration):
+    frames = _render_frames(plan, segments)
+    if fmt == "png":
+        for offset, frame in enumerate(frames):
+            frame.save(Path(output) / f"frame_{first_frame + offset:06d}.png")
+        return None
+    buffer = io.BytesIO()
+    frames[0].save(
+        buffer, format="GIF", save_all=True, append_images=frames[1:], duration=duration, loop=0, optimize=False
+    )
+    return buffer.getvalue()
+
+
+def _gif_parts(data: bytes):
+    """Split a GIF into ``(head, frames)``: header, screen descriptor,
+    global colour table and loop extension; then the frame blocks without
+    the trailer."""
+
+    flags = data[10]
+    position = 13 + (3 * 2 ** ((flags & 0x07) + 1) if flags & 0x80 else 0)
+    # Skip application extensions (the NETSCAPE loop block).
+    while data[position] == 0x21 and data[position + 1] == 0xFF:
+        position += 2
+        while data[position]:
+            position += data[position] + 1
+        position += 1
+    if data[-1] != 0x3B:
+        raise ValueError("GIF chunk without trailer")
+    return data[:position], data[position:-1]
+
+
+def join_gifs(chunks) -> bytes:
+    """Concatenate GIF chunks that share the screen size and palette."""
+
+    head, _ = _gif_parts(chunks[0])
+    body = []
+    for chunk in chunks:
+        chunk_head, frames = _gif_parts(chunk)
+        if chunk_head[6:13] != head[6:13] or chunk_head[13 : 13 + 768] != head[13 : 13 + 768]:
+            raise ValueError("GIF chunks differ in size or palette")
+        body.append(frames)
+    return head + b"".join(body) + b";"
+
+
+def export_video(
+    maze,
+    output,
+    episodes=(),
+    path=None,
+    states_per_frame: int = 1,
+    fps: int = 20,
+    cell_pixels: int = 24,
+    chunk_frames: int = 100,
+    workers=None,
+) -> int:
+    """Render ``episodes`` and then ``path`` to a GIF or a PNG sequence.
+
+    Parameters
+    ----------
+    maze: maze.Maze
+        Maze the states belong to.
+    output: Path | str
+        A ``.gif`` file, or a directory that receives ``frame_000000.png``...
+    episodes: iterable[tuple[int, sequence[int]]]
+        ``(episode number, states)`` pairs, e.g. built with
+        :func:`select_episodes` from ``Agent.episode_traces`` or a
+        :class:`training_log.TrainingLog`.
+    path: sequence[int] | None
+        Solved path, drawn last in green.
+    states_per_frame: int
+        Steps covered by one frame.
+    fps: int
+        Frame rate of the GIF.
+    cell_pixels: int
+        Width of one maze cell in the output.
+    chunk_frames: int
+        Frames rendered and encoded per pool task.
+    workers: int | None
+        Pool size (default: one per CPU).
+
+    Returns
+    -------
+    int
+        Number of frames written.
+    """
+
+    output = Path(output)
+    fmt = "gif" if output.suffix.lower() == ".gif" else "png"
+    segments = [(f"episode {number}", list(states), "trail") for number, states in episodes]
+    if path is not None:
+        segments.append(("solved path", list(path), "path"))
+    plan = frame_plan([len(states) for _, states, _ in segments], states_per_frame)
+    if not plan:
+        raise ValueError("Nothing to render")
+
+    if fmt == "png":
+        output.mkdir(parents=True, exist_ok=True)
+    else:
+        output.parent.mkdir(parents=True, exist_ok=True)
+    scale = cell_pixels / cell_side
+    geometry = (maze.ny, scale)
+    background = render_background(maze, scale)
+    duration = max(1, round(1000 / fps))
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(background, geometry)) as pool:
+        futures = []
+        for first in range(0, len(plan), chunk_frames):
+            chunk = plan[first : first + chunk_frames]
+            # A task only carries the segments its frames show.
+            needed = {segment: segments[segment] for segment, _ in chunk}
+            futures.append(pool.submit(_render_chunk, first, chunk, needed, fmt, output, duration))
+        results = [future.result() for future in futures]
+
+    if fmt == "gif":
+        output.write_bytes(join_gifs(results))
+    return len(plan)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export recorded training episodes as a GIF or PNG sequence.")
+    parser.add_argument("log_dir", type=Path, help="Directory written with --record-dir.")
+    parser.add_argument("--output", type=Path, required=True, help="A .gif file or a directory for PNG frames.")
+    parser.add_argument("--every", type=int, default=1, help="Export every N-th episode (the last is always kept).")
+    parser.add_argument("--no-episodes", action="store_true", help="Only export the solved path.")
+    parser.add_argument("--solved-path", type=Path, help="Run summary (--output-json) whose path is drawn last.")
+    parser.add_argument("--states-per-frame", type=int, default=1, help="Steps covered by one frame.")
+    parser.add_argument("--fps", type=int, default=20, help="Frame rate of the GIF.")
+    parser.add_argument("--cell-pixels", type=int, default=24, help="Width of one maze cell in pixels.")
+    parser.add_argument("--chunk-frames", type=int, default=100, help="Frames per pool task.")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU).")
+    args = parser.parse_args(argv)
+    if min(args.every, args.states_per_frame, args.fps, args.cell_pixels, args.chunk_frames) <= 0:
+        parser.error("--every, --states-per-frame, --fps, --cell-pixels and --chunk-frames must be positive.")
+    if args.no_episodes and args.solved_path is None:
+        parser.error("--no-episodes needs --solved-path.")
+
+    from training_log import TrainingLog
+
+    log = TrainingLog(args.log_dir)
+    episodes = [] if args.no_episodes else [
+        (index + 1, log.episode_states(index)) for index in select_episodes(log.episodes, args.every)
+    ]
+    path = None
+    if args.solved_path is not None:
+        path = json.loads(args.solved_path.read_text(encoding="utf-8"))["path"]
+    frames = export_video(
+        log.maze(),
+        args.output,
+        episodes,
+        path,
+        states_per_frame=args.states_per_frame,
+        fps=args.fps,
+        cell_pixels=args.cell_pixels,
+        chunk_frames=args.chunk_frames,
+        workers=args.workers,
+    )
+    print(f"Wrote {frames} frames to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
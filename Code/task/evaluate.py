@@ -0,0 +1,167 @@
+"""Train and score agents on every maze of a corpus, in parallel.
+
+Each maze of a :class:`maze_dataset.MazeDataset` is one task for a process
+pool: build the maze, train a fresh ``Agent`` with the options of the
+shared command line (:func:`cli.add_training_arguments`), walk the learned
+policy and compare the walk with the precomputed optimal path length. The
+results are aggregated into success rates and percentiles and written as
+JSON, so a change to the learning engine can be judged on thousands of
+mazes::
+
+    python maze_dataset.py --count 2000 --sizes 8x8 12x12 --seed 1 --output data/datasets/eval
+    python evaluate.py data/datasets/eval --epochs 500 --planning prioritized --output-json eval.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from cli import add_training_arguments, train_agent, validate_training_arguments, write_summary
+from convert import Feasibility
+from learn import Agent
+from maze_dataset import MazeDataset
+
+PERCENTILES = (50, 90, 99)
+
+# Per-process state of the pool workers, set by _init_worker.
+_dataset = None
+_args = None
+
+
+def _init_worker(dataset_dir, args):
+    global _dataset, _args
+    _dataset = MazeDataset(dataset_dir)
+    _args = args
+
+
+def evaluate_maze(dataset: MazeDataset, args: argparse.Namespace, maze_id: int) -> dict:
+    """Train and walk one maze of ``dataset`` and describe the outcome."""
+
+    wall_start = time.perf_counter()
+    record = dataset[maze_id]
+    maze = record.to_maze()
+    feasibility = Feasibility.from_walls(record.walls)
+    agent = Agent(feasibility, args.gamma, args.lrn_rate, maze, *record.start)
+    # Every maze gets its own training stream, independent of the pool layout.
+    # --engine parallel seeds its workers from args.seed, so it gets the same per-maze seed.
+    maze_seed = int(np.random.SeedSequence(args.seed, spawn_key=(maze_id,)).generate_state(1)[0])
+    np.random.seed(maze_seed)
+
+    train_start = time.perf_counter()
+    stop = train_agent(argparse.Namespace(**{**vars(args), "seed": maze_seed}), agent, feasibility)
+    train_seconds = time.perf_counter() - train_start
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent.walk(maze, feasibility, max_walk_steps=maze.nx * maze.ny)
+
+    states = [int(state) for state in agent.path if isinstance(state, (int, np.integer))]
+    solved = "break" not in agent.path and states[-1] == int(agent.goal)
+    length = len(states) - 1
+    return {
+        "maze_id": maze_id,
+        "size": [maze.nx, maze.ny],
+        "solved": solved,
+        "path_length": length,
+        "optimal_length": record.optimal_length,
+        "excess_length": length - record.optimal_length if solved else None,
+        "length_ratio": length / record.optimal_length if solved else None,
+        "episodes": stop["episodes"],
+        "stop_reason": stop["reason"],
+        "train_seconds": train_seconds,
+        "wall_seconds": time.perf_counter() - wall_start,
+    }
+
+
+def _evaluate_in_worker(maze_id: int) -> dict:
+    return evaluate_maze(_dataset, _args, maze_id)
+
+
+def describe(values) -> dict:
+    """Mean, min, max and :data:`PERCENTILES` of ``values`` (None entries skipped)."""
+
+    values = np.array([value for value in values if value is not None], dtype=float)
+    if not values.size:
+        return {"count": 0}
+    summary = {"count": int(values.size), "mean": float(values.mean()), "min": float(values.min())}
+    for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        summary[f"p{q}"] = float(value)
+    summary["max"] = float(values.max())
+    return summary
+
+
+def aggregate(results: list) -> dict:
+    """Success rate and distributions over the per-maze results."""
+
+    by_size = {}
+    for result in results:
+        by_size.setdefault("x".join(map(str, result["size"])), []).append(result)
+    return {
+        "mazes": len(results),
+        "success_rate": float(np.mean([r["solved"] for r in results])) if results else None,
+        "length_ratio": describe(r["length_ratio"] for r in results),
+        "excess_length": describe(r["excess_length"] for r in results),
+        "episodes": describe(r["episodes"] for r in results),
+        "train_seconds": describe(r["train_seconds"] for r in results),
+        "wall_seconds": describe(r["wall_seconds"] for r in results),
+        "success_rate_by_size": {
+            size: float(np.mean([r["solved"] for r in group])) for size, group in sorted(by_size.items())
+        },
+    }
+
+
+def evaluate_dataset(dataset_dir, args: argparse.Namespace, maze_ids=None, workers=None) -> dict:
+    """Evaluate ``maze_ids`` (default: all) of the dataset in a process pool.
+
+    Returns ``{"config": ..., "aggregate": ..., "results": [...]}`` with
+    the results in maze ID order.
+    """
+
+    dataset = MazeDataset(dataset_dir)
+    maze_ids = list(range(len(dataset))) if maze_ids is None else list(maze_ids)
+    workers = workers or os.cpu_count() or 1
+    # A few chunks per worker keeps the pool busy without a round trip per maze.
+    chunksize = max(1, len(maze_ids) // (4 * workers))
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(dataset_dir, args)) as pool:
+        results = list(pool.map(_evaluate_in_worker, maze_ids, chunksize=chunksize))
+
+    config = {key: (str(value) if isinstance(value, Path) else value) for key, value in vars(args).items()}
+    config["dataset"] = str(dataset_dir)
+    return {
+        "config": config,
+        "aggregate": {**aggregate(results), "total_seconds": time.perf_counter() - start},
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train and score agents on every maze of a dataset in parallel.")
+    parser.add_argument("dataset", type=Path, help="Directory written by maze_dataset.py.")
+    parser.add_argument("--seed", type=int, default=0, help="Root seed of the per-maze training streams.")
+    add_training_arguments(parser)
+    parser.add_argument("--limit", type=int, help="Only evaluate the first N mazes.")
+    parser.add_argument("--processes", type=int, help="Pool size (default: one per CPU).")
+    parser.add_argument("--output-json", type=Path, help="Write the report to this file (default: stdout).")
+    args = parser.parse_args(argv)
+    validate_training_arguments(parser, args)
+    if args.engine == "parallel":
+        parser.error("--engine parallel would start a worker pool per maze; use --processes to parallelise.")
+
+    dataset_dir, limit, processes, output = args.dataset, args.limit, args.processes, args.output_json
+    maze_ids = range(min(limit, len(MazeDataset(dataset_dir)))) if limit else None
+    report = evaluate_dataset(dataset_dir, args, maze_ids, processes)
+    if output is None:
+        print(json.dumps(report["aggregate"], indent=2))
+    else:
+        write_summary(output, report)
+        print(f"Success rate {report['aggregate']['success_rate']:.1%}; report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
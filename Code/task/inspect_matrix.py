@@ -0,0 +1,141 @@
+"""Inspection helpers for the F, R and Q matrices.
+
+Printing a full N x N matrix does not scale: a 50x50 maze already has 2500
+states and more than six million entries. The helpers below only emit the
+entries that matter (non-zero or feasible ones) as an edge list, summarise
+each state on a single line, and write full matrices to ``.npy`` files
+instead of the terminal. Output therefore grows with the number of edges,
+not with N^2. A sparse F (:class:`convert.AdjacencyMatrix`) is read through
+its edges and never densified.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from convert import AdjacencyMatrix, feasible_edges
+
+
+def iter_edges(matrix: np.ndarray, mask: np.ndarray | None = None, block_rows: int = 1024):
+    """Yield ``(row, col, value)`` for every selected entry of ``matrix``.
+
+    Entries are selected by ``mask`` (e.g. ``F == 1``) or, when no mask is
+    given, by being non-zero. Rows are scanned in blocks of ``block_rows`` so
+    the index arrays never grow beyond one block. An
+    :class:`~convert.AdjacencyMatrix` takes no mask and yields its feasible
+    moves with value 1.
+    """
+
+    if isinstance(matrix, AdjacencyMatrix):
+        rows, cols = matrix.edges()
+        for row, col in zip(rows.tolist(), cols.tolist()):
+            yield row, col, 1
+        return
+    n_rows = matrix.shape[0]
+    for first in range(0, n_rows, block_rows):
+        block = matrix[first : first + block_rows]
+        selected = block != 0 if mask is None else mask[first : first + block_rows]
+        rows, cols = np.nonzero(selected)
+        values = block[rows, cols]
+        for row, col, value in zip((rows + first).tolist(), cols.tolist(), values.tolist()):
+            yield row, col, value
+
+
+def print_edges(matrix: np.ndarray, mask: np.ndarray | None = None, limit: int | None = None, file=None) -> int:
+    """Print the selected entries of ``matrix`` as ``row -> col: value`` lines.
+
+    At most ``limit`` edges are printed; the return value is the number of
+    edges written.
+    """
+
+    file = sys.stdout if file is None else file
+    written = 0
+    for row, col, value in iter_edges(matrix, mask):
+        if limit is not None and written >= limit:
+            print(f"... (truncated after {limit} edges)", file=file)
+            break
+        print(f"{row} -> {col}: {value:g}", file=file)
+        written += 1
+    return written
+
+
+def top_k_per_state(Q: np.ndarray, F: np.ndarray, k: int = 3) -> list[list[tuple[int, float]]]:
+    """Return the ``k`` best feasible ``(action, q)`` pairs for every state.
+
+    Pairs are sorted by decreasing Q-value; states without feasible actions
+    get an empty list.
+    """
+
+    return _top_k(Q, *feasible_edges(F), k)
+
+
+def _top_k(Q: np.ndarray, rows: np.ndarray, cols: np.ndarray, k: int) -> list[list[tuple[int, float]]]:
+    bounds = np.searchsorted(rows, np.arange(Q.shape[0] + 1))
+    values = Q[rows, cols]
+    result = []
+    for state in range(Q.shape[0]):
+        first, last = bounds[state], bounds[state + 1]
+        order = np.argsort(-values[first:last], kind="stable")[:k] + first
+        result.append([(int(cols[i]), float(values[i])) for i in order])
+    return result
+
+
+def row_stats(matrix: np.ndarray, mask) -> dict[str, np.ndarray]:
+    """Compute per-row ``count``, ``min``, ``max`` and ``mean`` over the selected entries.
+
+    ``mask`` is a boolean matrix or the ``(rows, cols)`` of the selected
+    entries sorted by row, e.g. :func:`convert.feasible_edges`. Only those
+    entries are read and reduced per row, so no temporary of the size of
+    ``matrix`` is made. Rows without selected entries report ``nan`` for the
+    value statistics.
+    """
+
+    rows, cols = mask if isinstance(mask, tuple) else np.nonzero(mask)
+    n_rows = matrix.shape[0]
+    counts = np.bincount(rows, minlength=n_rows)
+    row_min, row_max, mean = (np.full(n_rows, np.nan) for _ in range(3))
+    if rows.size:
+        values = np.asarray(matrix[rows, cols], dtype=np.float64)
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        present = rows[starts]
+        row_min[present] = np.minimum.reduceat(values, starts)
+        row_max[present] = np.maximum.reduceat(values, starts)
+        mean[present] = np.add.reduceat(values, starts) / counts[present]
+    return {"count": counts, "min": row_min, "max": row_max, "mean": mean}
+
+
+def print_q_summary(Q: np.ndarray, F: np.ndarray, k: int = 3, file=None):
+    """Print one line per state with its feasible-action stats and top-k Q."""
+
+    file = sys.stdout if file is None else file
+    rows, cols = feasible_edges(F)
+    stats = row_stats(Q, (rows, cols))
+    for state, best in enumerate(_top_k(Q, rows, cols, k)):
+        if not best:
+            print(f"{state}: no feasible actions", file=file)
+            continue
+        ranked = ", ".join(f"{action}={value:g}" for action, value in best)
+        print(
+            f"{state}: n={stats['count'][state]} min={stats['min'][state]:g} "
+            f"max={stats['max'][state]:g} mean={stats['mean'][state]:g} top[{ranked}]",
+            file=file,
+        )
+
+
+def save_matrix(matrix: np.ndarray, path) -> Path:
+    """Write ``matrix`` to ``path`` as ``.npy`` and return the path.
+
+    An :class:`~convert.AdjacencyMatrix` is written as its dense int8 form
+    through a memory map, so only its edges pass through memory.
+    """
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(matrix, AdjacencyMatrix):
+        dense = np.lib.format.open_memmap(path, mode="w+", dtype=matrix.dtype, shape=matrix.shape)
+        dense[matrix.edges()] = 1
+        dense.flush()
+    else:
+        np.save(path, matrix)
+    return path
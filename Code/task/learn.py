@@ -1,6 +1,12 @@
 import numpy as np
 from callback_protocol import RESET_SIGNAL
-from convert import find_reachable_neighbors
+from convert import as_matrix, feasible_edges, find_reachable_neighbors, neighbor_lists
+from planning import make_planner
+from start_schedulers import FixedStart
+from traces import EligibilityTrace
+
+STOP_REASONS = ("max_epochs", "q_converged", "policy_stable", "greedy_solved")
+UPDATE_RULES = ("q-learning", "watkins")
 
 
 def get_possible_next_states(state, F, n_states):
@@ -20,32 +26,66 @@ def get_random_next_state(state, F, n_states):
     return next_state
 
 
+def reward_matrix(F, goal, dtype=np.float64):
+    """Rewards of every move in ``F``.
+
+    -0.1 per feasible move, 1000 for moves into ``goal`` and 0 elsewhere,
+    which includes the self-transition of terminal states. ``R`` is a dense
+    ``F.shape`` table whatever the storage of ``F``; only the feasible moves
+    are read from ``F``, so a sparse ``F`` is not densified to fill it.
+    """
+
+    rows, cols = feasible_edges(F)
+    R = np.zeros(F.shape, dtype=dtype)
+    R[rows, cols] = -0.1
+    R[rows[cols == goal], goal] = 1000.0
+    return R
+
+
 class Agent:
-    def __init__(self, feasibility, gamma, lrn_rate, maze, start_x, start_y):
+    def __init__(self, feasibility, gamma, lrn_rate, maze, start_x, start_y, reward_dtype=np.float64):
         self.Q = np.zeros(shape=[feasibility.F_matrix.shape[0], feasibility.F_matrix.shape[0]], dtype=np.float32)
-        self.R = np.copy(feasibility.F_matrix)
         self.start = feasibility.numbered_grid[start_x, start_y]
         self.goal = feasibility.numbered_grid[maze.end[0], maze.end[1]]
-        self.set_rewards(maze, feasibility)
+        self.set_rewards(maze, feasibility, reward_dtype)
         self.n_states = feasibility.cells
         self.gamma = gamma
         self.lrn_rate = lrn_rate
         self.path = []
         self.episode_traces = []
         self.q_snapshots = []
+        # Optional per-transition discount (gamma ** length for macro-edges of
+        # a reduced state space); None means every step is discounted by gamma.
+        self.discounts = None
+
+    @classmethod
+    def from_matrices(cls, F, start, goal, gamma, lrn_rate, R=None, discounts=None):
+        """Create an agent directly from a feasibility matrix.
+
+        Used for state spaces that do not correspond to a ``Maze`` grid, such
+        as the reduced graphs of :mod:`state_reduction`. Without ``R`` the
+        rewards follow :func:`reward_matrix`: -0.1 per feasible move, 1000 for
+        moves into the goal and 0 for the self-transition of terminal states.
+        """
 
-    def set_rewards(self, maze, feasibility):
-        goal_cell = maze.maze_grid[maze.end[0]][maze.end[1]]
-        reachable_neighbors = find_reachable_neighbors(maze, goal_cell)
-        self.R = np.where(self.R == 1, -0.1, self.R)
-        # Set the highest reward for reaching the end of the maze:
-        for neighbor in reachable_neighbors:
-            neighbor_idx = feasibility.numbered_grid[neighbor.x, neighbor.y]
-            self.R[neighbor_idx, self.goal] = 1000.0
-
-        terminal_states = np.where(np.sum(feasibility.F_matrix, axis=1) == 0)[0]
-        for state in terminal_states:
-            self.R[state, state] = 0.0
+        F = as_matrix(F)
+        agent = cls.__new__(cls)
+        agent.n_states = F.shape[0]
+        agent.Q = np.zeros(shape=[agent.n_states, agent.n_states], dtype=np.float32)
+        agent.start = start
+        agent.goal = goal
+        agent.R = reward_matrix(F, goal) if R is None else R
+        agent.gamma = gamma
+        agent.lrn_rate = lrn_rate
+        agent.path = []
+        agent.episode_traces = []
+        agent.q_snapshots = []
+        agent.discounts = discounts
+        return agent
+
+    def set_rewards(self, maze, feasibility, dtype=np.float64):
+        # The goal cell is fixed by the maze; see reward_matrix for the values.
+        self.R = reward_matrix(feasibility.F_matrix, self.goal, dtype)
 
     def train(
         self,
@@ -59,12 +99,22 @@ class Agent:
         epsilon_start=1.0,
         epsilon_decay=0.99,
         min_epsilon=0.01,
+        q_tolerance=None,
+        q_patience=10,
+        policy_patience=None,
+        greedy_check_every=None,
+        planning=None,
+        planning_steps=10,
+        update_rule="q-learning",
+        trace_lambda=0.9,
+        max_trace_length=64,
+        start_scheduler=None,
     ):
         """Train the agent using Q-learning.
 
         Parameters
         ----------
-        F: np.ndarray
+        F: np.ndarray | AdjacencyMatrix
             The feasibility matrix for the maze.
         max_epochs: int
             Number of training episodes.
@@ -83,7 +133,8 @@ class Agent:
             whether the goal was reached, and the epsilon value used.
         start_exploration_prob: float
             Probability of starting an episode from a random state instead of
-            the configured ``start`` position.
+            the configured ``start`` position. Ignored when
+            ``start_scheduler`` is given.
         epsilon_start: float
             Initial exploration probability for epsilon-greedy action
             selection. With probability ``epsilon`` a random feasible action is
@@ -93,53 +144,135 @@ class Agent:
             training episode.
         min_epsilon: float
             Lower bound for epsilon so that exploration never fully vanishes.
+        q_tolerance: float | None
+            Stop once the largest absolute Q change of an episode stays below
+            this value for ``q_patience`` consecutive episodes.
+        q_patience: int
+            Number of consecutive quiet episodes required by ``q_tolerance``.
+        policy_patience: int | None
+            Stop once the greedy action of every state has stayed the same
+            for this many consecutive episodes.
+        greedy_check_every: int | None
+            Every this many episodes, walk greedily from ``start`` and stop
+            when the walk reaches the goal.
+        planning: str | None
+            ``"dyna"`` or ``"prioritized"`` to interleave model-based backups
+            (see :mod:`planning`) with the real steps; None or ``"none"`` for
+            plain Q-learning.
+        planning_steps: int
+            Number of planning backups after every real step.
+        update_rule: str
+            ``"q-learning"`` for one-step updates or ``"watkins"`` for
+            Watkins' Q(lambda), which spreads every TD error back along the
+            recent trajectory and cuts the trace after exploratory actions.
+        trace_lambda: float
+            Trace decay ``lambda`` in [0, 1]; eligibilities shrink by
+            ``gamma * lambda`` per step. Only used by ``"watkins"``.
+        max_trace_length: int
+            Maximum number of (state, action) pairs kept in the trace.
+        start_scheduler: StartScheduler | None
+            Chooses the start state of every episode, see
+            :mod:`start_schedulers`. Defaults to :class:`FixedStart` with
+            ``start_exploration_prob``.
+
+        Returns
+        -------
+        dict
+            ``{"reason": ..., "episodes": ...}`` where ``reason`` is one of
+            :data:`STOP_REASONS` and ``episodes`` the number of episodes run.
         """
 
         self.episode_traces = []
         self.q_snapshots = [] if record_q_values else None
         epsilon = epsilon_start
 
+        if update_rule not in UPDATE_RULES:
+            raise ValueError(f"Unknown update rule {update_rule!r}; expected one of {UPDATE_RULES}")
+        neighbors = neighbor_lists(F)
+        planner = make_planner(planning, self, neighbors, F, planning_steps)
+        trace = EligibilityTrace(max_trace_length) if update_rule == "watkins" else None
+        if start_scheduler is None:
+            start_scheduler = FixedStart(start_exploration_prob)
+        start_scheduler.bind(self, neighbors, neighbor_lists(as_matrix(F).T))
+        track_visits = start_scheduler.needs_visits
+        track_policy = policy_patience is not None
+        if track_policy:
+            policy = self._greedy_policy(neighbors)
+        quiet_episodes = 0
+        stable_episodes = 0
+
         # Compute the Q matrix
-        for _ in range(0, max_epochs):
+        for episode in range(1, max_epochs + 1):
             if state_callback:
                 state_callback(RESET_SIGNAL)
 
-            explore_start = np.random.random() < start_exploration_prob
-            if explore_start:
-                curr_state = np.random.randint(0, self.n_states)
-            else:
-                curr_state = self.start
+            curr_state = start_state = start_scheduler.next_start()
 
             episode_states = [curr_state] if record_episodes else None
             cumulative_reward = 0.0
             steps_taken = 0
             episode_epsilon = epsilon
+            max_q_delta = 0.0
+            policy_changed = False
+            if trace is not None:
+                trace.clear()
             if state_callback:
                 state_callback(curr_state)
+            if track_visits:
+                start_scheduler.visit(curr_state)
 
             while True:
-                poss_next_states = get_possible_next_states(curr_state, F, self.n_states)
-                if not poss_next_states:
+                poss_next_states = neighbors[curr_state]
+                if not poss_next_states.size:
                     break
 
                 if np.random.random() < epsilon:
-                    next_state = poss_next_states[np.random.randint(0, len(poss_next_states))]
+                    next_state = int(poss_next_states[np.random.randint(0, len(poss_next_states))])
+                    if trace is not None:
+                        # Watkins: the trace only follows the greedy policy.
+                        greedy_state = poss_next_states[int(np.argmax(self.Q[curr_state, poss_next_states]))]
+                        if next_state != greedy_state:
+                            trace.clear()
                 else:
                     q_values = self.Q[curr_state, poss_next_states]
-                    next_state = poss_next_states[int(np.argmax(q_values))]
+                    next_state = int(poss_next_states[int(np.argmax(q_values))])
 
-                poss_next_next_states = get_possible_next_states(next_state, F, self.n_states)
+                poss_next_next_states = neighbors[next_state]
 
-                if poss_next_next_states:
-                    max_Q = max(self.Q[next_state, nn_s] for nn_s in poss_next_next_states)
+                if poss_next_next_states.size:
+                    max_Q = self.Q[next_state, poss_next_next_states].max()
                 else:
                     max_Q = 0.0
                 # Bellman's equation: Q = [(1 - alpha) * Q]  +  [alpha * (reward + (gamma * maxQ))]
                 # Update the Q matrix
                 reward = self.R[curr_state][next_state]
-                self.Q[curr_state][next_state] = ((1 - self.lrn_rate) * self.Q[curr_state][next_state]) + (
-                    self.lrn_rate * (reward + (self.gamma * max_Q))
-                )
+                gamma = self.gamma if self.discounts is None else self.discounts[curr_state, next_state]
+                if trace is None:
+                    old_q = self.Q[curr_state][next_state]
+                    self.Q[curr_state][next_state] = ((1 - self.lrn_rate) * self.Q[curr_state][next_state]) + (
+                        self.lrn_rate * (reward + (gamma * max_Q))
+                    )
+                    max_q_delta = max(max_q_delta, abs(float(self.Q[curr_state][next_state] - old_q)))
+                    updated_states = (curr_state,)
+                else:
+                    # Q(lambda): the same TD error, weighted by eligibility, for
+                    # every pair on the trace (the current pair has weight 1).
+                    step = self.lrn_rate * float(reward + gamma * max_Q - self.Q[curr_state, next_state])
+                    trace.mark(curr_state, next_state)
+                    updated_states = trace.apply(self.Q, step)
+                    trace.decay(gamma * trace_lambda)
+                    max_q_delta = max(max_q_delta, abs(step))
+                if planner is not None:
+                    planning_delta, planned_states = planner.observe(curr_state, next_state)
+                    max_q_delta = max(max_q_delta, planning_delta)
+                    updated_states = (*updated_states, *planned_states)
+                if track_policy:
+                    for state in updated_states:
+                        actions = neighbors[state]
+                        best = actions[int(np.argmax(self.Q[state, actions]))]
+                        if best != policy[state]:
+                            policy[state] = best
+                            policy_changed = True
 
                 cumulative_reward += reward
                 steps_taken += 1
@@ -147,20 +280,26 @@ class Agent:
                 curr_state = next_state
                 if state_callback:
                     state_callback(curr_state)
+                if track_visits:
+                    start_scheduler.visit(curr_state)
                 if record_episodes:
                     episode_states.append(curr_state)
                 if curr_state == self.goal:
                     break
 
+            metrics = {
+                "cumulative_reward": cumulative_reward,
+                "steps": steps_taken,
+                "terminal": curr_state == self.goal,
+                "epsilon": episode_epsilon,
+                "max_q_delta": max_q_delta,
+            }
+            start_scheduler.end_episode(start_state, metrics)
+
             if record_episodes:
                 episode_record = {
                     "states": episode_states,
-                    "metrics": {
-                        "cumulative_reward": cumulative_reward,
-                        "steps": steps_taken,
-                        "terminal": curr_state == self.goal,
-                        "epsilon": episode_epsilon,
-                    },
+                    "metrics": dict(metrics),
                 }
                 if record_q_values:
                     snapshot = np.copy(self.Q)
@@ -170,21 +309,59 @@ class Agent:
                 self.episode_traces.append(episode_record)
 
             if episode_callback:
-                episode_callback(
-                    {
-                        "cumulative_reward": cumulative_reward,
-                        "steps": steps_taken,
-                        "terminal": curr_state == self.goal,
-                        "epsilon": episode_epsilon,
-                    }
-                )
+                episode_callback(metrics)
 
             epsilon = max(min_epsilon, epsilon * epsilon_decay)
 
+            if q_tolerance is not None:
+                quiet_episodes = quiet_episodes + 1 if max_q_delta < q_tolerance else 0
+                if quiet_episodes >= q_patience:
+                    return {"reason": "q_converged", "episodes": episode}
+            if track_policy:
+                stable_episodes = 0 if policy_changed else stable_episodes + 1
+                if stable_episodes >= policy_patience:
+                    return {"reason": "policy_stable", "episodes": episode}
+            if greedy_check_every and episode % greedy_check_every == 0:
+                if self.greedy_path(neighbors) is not None:
+                    return {"reason": "greedy_solved", "episodes": episode}
+
+        return {"reason": "max_epochs", "episodes": max_epochs}
+
+    def _greedy_policy(self, neighbors):
+        # Greedy action of every state; -1 for states without feasible actions.
+        policy = np.full(len(neighbors), -1, dtype=np.int64)
+        for state, actions in enumerate(neighbors):
+            if actions.size:
+                policy[state] = actions[int(np.argmax(self.Q[state, actions]))]
+        return policy
+
+    def greedy_path(self, neighbors, max_steps=None):
+        """Follow the greedy policy from ``start`` without printing.
+
+        Returns the visited states ending in the goal, or None when the walk
+        revisits a state, reaches a dead end or exceeds ``max_steps`` (by
+        default the number of states).
+        """
+
+        max_steps = self.n_states if max_steps is None else max_steps
+        curr = int(self.start)
+        path = [curr]
+        visited = {curr}
+        while curr != self.goal:
+            actions = neighbors[curr]
+            if not actions.size or len(path) > max_steps:
+                return None
+            curr = int(actions[int(np.argmax(self.Q[curr, actions]))])
+            if curr in visited:
+                return None
+            path.append(curr)
+            visited.add(curr)
+        return path
+
     def walk(self, maze, feasibility, max_walk_steps=200):
-        # Walk to the goal from start using Q matrix.
+        # Walk to the goal from start using Q matrix. Every walk starts a new path.
         curr = self.start
-        self.path.append(curr)
+        self.path = [curr]
         visited_states = {curr}
         print(str(curr) + "->", end="")
         steps_taken = 0
@@ -196,7 +373,7 @@ class Agent:
 
             # Restrict candidate actions to feasible transitions from the current
             # state to avoid picking unreachable cells when Q-values are tied.
-            poss_next_states = get_possible_next_states(curr, feasibility.F_matrix, self.n_states)
+            poss_next_states = np.flatnonzero(feasibility.F_matrix[curr] == 1).tolist()
             if not poss_next_states:
                 self.path.append("break")
                 print("break", end="")
@@ -206,12 +383,10 @@ class Agent:
             best_index = int(np.argmax(q_values))
             next_state = poss_next_states[best_index]
 
-            curr_position = np.where(feasibility.numbered_grid == curr)
-            curr_cell = maze.maze_grid[curr_position[0], curr_position[1]][0]
+            curr_cell = maze.maze_grid[np.unravel_index(curr, feasibility.numbered_grid.shape)]
             reachable_neighbors = find_reachable_neighbors(maze, curr_cell)
 
-            next_position = np.where(feasibility.numbered_grid == next_state)
-            next_cell = maze.maze_grid[next_position[0], next_position[1]][0]
+            next_cell = maze.maze_grid[np.unravel_index(next_state, feasibility.numbered_grid.shape)]
             if next_cell not in reachable_neighbors:
                 self.path.append("break")
                 print("break", end="")
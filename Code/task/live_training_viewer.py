@@ -1,75 +1,93 @@
 """Run training while streaming live updates to a Pygame viewer."""
 
 import threading
+import time
 from collections import deque
+from pathlib import Path
 
 import numpy as np
 
-from convert import Feasibility
-from learn import Agent
-from live_view import LiveMazeViewer
-from maze import Maze
-
-
-def prompt_for_value(prompt, caster, validator=lambda value: True, error_message="Invalid input"):
-    while True:
-        try:
-            value = caster(input(prompt))
-            if validator(value):
-                return value
-            print(error_message)
-        except (ValueError, IndexError):
-            print(error_message)
-
-
-def main():
-    dimensions = prompt_for_value(
-        "Enter maze dimensions separated by a space (e.g. 4 4): ",
-        lambda raw: [int(v) for v in raw.split()],
-        lambda vals: len(vals) == 2 and all(v > 0 for v in vals),
-        "Please provide two positive integers separated by a space.",
+import tracing
+from cli import (
+    build_oracle,
+    build_parser,
+    build_problem,
+    resolve_run_arguments,
+    run_summary,
+    train_agent,
+    write_summary,
+)
+from metrics_sink import MetricsSink
+from process_backend import BACKENDS, ProcessTrainer
+from render_queue import QUEUE_POLICIES
+from run_dirs import create_run_directory
+
+
+def main(argv=None):
+    parser = build_parser("Train a Q-learning agent while streaming live updates to a Pygame viewer.")
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        help="Directory for streamed metrics and exported images (default: data/runs/<timestamp>).",
     )
-    dimension1, dimension2 = dimensions
-
-    start_coords = prompt_for_value(
-        "Enter x and y coordinates of the maze start separated by a space: ",
-        lambda raw: [int(v) for v in raw.split()],
-        lambda vals: len(vals) == 2 and 0 <= vals[0] < dimension1 and 0 <= vals[1] < dimension2,
-        "Start coordinates should be inside the maze. Numbering is zero-based.",
+    parser.add_argument("--queue-policy", choices=QUEUE_POLICIES, default="coalesce", help="Viewer state queue policy.")
+    parser.add_argument("--queue-maxsize", type=int, default=0, help="Viewer state queue bound (0 = unbounded).")
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="thread",
+        help="Train in a thread next to the viewer or in a separate process with shared-memory Q.",
     )
-    start_x, start_y = start_coords
-
-    gamma = prompt_for_value(
-        "Enter the gamma value (0, 1]: ",
-        float,
-        lambda val: 0 < val <= 1,
-        "Gamma should be a number between 0 and 1.",
+    parser.add_argument(
+        "--perf-hud",
+        action="store_true",
+        help="Show the frame timing overlay from the start (toggle with p); timings are logged either way.",
     )
-
-    lrn_rate = prompt_for_value(
-        "Enter the learning rate value (0, 1]: ",
-        float,
-        lambda val: 0 < val <= 1,
-        "Learning rate should be a number between 0 and 1.",
+    parser.add_argument(
+        "--trace", type=Path, help="Record a Chrome trace-event timeline of training and rendering to this file."
     )
-
-    max_epochs = 1000
-
-    maze = Maze(dimension1, dimension2, [start_x, start_y])
-    feasibility = Feasibility(maze)
-    agent = Agent(feasibility, gamma, lrn_rate, maze, start_x, start_y)
-
-    viewer = LiveMazeViewer(maze, feasibility)
+    args = resolve_run_arguments(parser, parser.parse_args(argv))
+    if args.trace:
+        tracing.enable()
+
+    maze, feasibility, agent = build_problem(args)
+    if args.maze_image:
+        from draw import draw_maze
+
+        draw_maze(maze, args.maze_image)
+
+    run_dir = args.output_dir or create_run_directory()
+    run_dir.mkdir(parents=True, exist_ok=True)
+    metrics_sink = MetricsSink(run_dir, f"metric_series_{run_dir.name}")
+
+    # The process backend trains into a shared-memory Q; the viewer reads the
+    # visited states straight from its shared buffers.
+    trainer = ProcessTrainer(args, agent, feasibility) if args.backend == "process" else None
+    viewer = None
+    if not args.no_view:
+        from live_view import LiveMazeViewer
+
+        # Coalescing keeps the state queue bounded so training never waits on
+        # the render loop; metrics are kept exact up to a generous bound.
+        viewer = LiveMazeViewer(
+            maze,
+            feasibility,
+            queue_policy=args.queue_policy,
+            queue_maxsize=args.queue_maxsize,
+            metrics_queue_maxsize=1024,
+            metrics_sink=metrics_sink,
+            output_dir=run_dir,
+            state_source=trainer.state_source if trainer is not None else None,
+            training_control=trainer,
+            show_stats=args.perf_hud,
+            stats_log=run_dir / f"viewer_stats_{run_dir.name}.jsonl",
+        )
     training_done = threading.Event()
-    episode_metrics = []
     # Rolling window used for derived metrics. Recreated when starting a new
     # training run to ensure graphs begin fresh.
     rolling_window = 50
     rolling_metrics = deque(maxlen=rolling_window)
 
-    def callback(state):
-        viewer.enqueue_state(state)
-
     def on_episode(metrics):
         """Push raw and rolling metrics to the live viewer.
 
@@ -78,7 +96,6 @@ def main():
         redefined), ensuring the graphs stay consistent across runs.
         """
 
-        episode_metrics.append(metrics)
         rolling_metrics.append(metrics)
 
         if rolling_metrics:
@@ -92,28 +109,57 @@ def main():
         else:
             derived_metrics = {}
 
-        viewer.enqueue_metrics({**metrics, **derived_metrics})
+        if viewer is not None:
+            viewer.enqueue_metrics({**metrics, **derived_metrics})
+        else:
+            metrics_sink.write({**metrics, **derived_metrics})
+
+    if trainer is not None:
+        trainer.episode_callback = on_episode
 
     def training_task():
-        agent.train(
-            feasibility.F_matrix,
-            max_epochs,
-            record_episodes=False,
-            record_q_values=False,
-            state_callback=callback,
-            episode_callback=on_episode,
-        )
-        agent.path = []
+        train_start = time.perf_counter()
+        if trainer is not None:
+            stop = trainer.run()
+        else:
+            stop = train_agent(
+                args,
+                agent,
+                feasibility,
+                state_callback=viewer.enqueue_state if viewer is not None else None,
+                episode_callback=on_episode,
+            )
+        train_seconds = time.perf_counter() - train_start
         agent.walk(maze, feasibility)
+        summary = run_summary(args, agent, agent.path, train_seconds, stop, build_oracle(feasibility))
+        write_summary(args.output_json, summary)
         solved_path = [state for state in agent.path if isinstance(state, (int, np.integer))]
-        viewer.set_solved_path(solved_path)
+        if viewer is not None:
+            viewer.set_solved_path(solved_path)
         training_done.set()
 
-    training_thread = threading.Thread(target=training_task, daemon=True)
+    if viewer is None:
+        training_task()
+        if trainer is not None:
+            trainer.close()
+        metrics_sink.close()
+        print(f"Saved metric series to {run_dir}")
+        if args.trace:
+            print(f"Saved trace to {tracing.write_trace(args.trace)}")
+        return
+
+    training_thread = threading.Thread(target=training_task, name="training", daemon=True)
     training_thread.start()
 
     viewer.run(completion_event=training_done)
     training_thread.join()
+    if trainer is not None:
+        trainer.close()
+    if args.trace:
+        # Include the spans of the artefact export that runs after closing.
+        if viewer.export_future is not None:
+            viewer.export_future.exception()
+        print(f"Saved trace to {tracing.write_trace(args.trace)}")
 
 
 if __name__ == "__main__":
@@ -5,10 +5,7 @@ and renders the agent's current position inside the maze as those updates
 arrive.
 """
 
-import csv
 import datetime
-import json
-import queue
 from pathlib import Path
 from typing import Optional
 
@@ -18,6 +15,12 @@ from PIL import Image, ImageDraw
 
 from callback_protocol import RESET_SIGNAL
 from draw import cell_side, draw_image, line_thickness, margin
+from artifact_export import ArtifactExporter, SeriesSnapshot, SurfaceSnapshot
+from metric_store import MetricStore, plot_points
+from perf_stats import ViewerStats
+from tracing import span, traced
+from render_queue import make_render_queue
+from run_dirs import DATA_DIR, create_run_directory
 
 
 class LiveMazeViewer:
@@ -28,13 +31,93 @@ class LiveMazeViewer:
         maze,
         feasibility,
         title: str = "Live Maze Training",
-        metrics_window: int = 100,
+        metrics_window: int | None = 100,
+        metrics_capacity: int = 100_000,
+        metrics_downsample: str = "lttb",
+        queue_policy: str = "block",
+        queue_maxsize: int = 0,
+        metrics_queue_maxsize: int = 0,
+        metrics_sink=None,
+        output_dir=None,
+        keep_runs: int | None = 20,
+        state_source=None,
+        training_control=None,
+        show_stats: bool = False,
+        stats_log=None,
+        stats_interval: float = 5.0,
     ):
+        """Create the viewer window.
+
+        Parameters
+        ----------
+        metrics_window: int | None
+            Number of most recent values shown per metric in the panel.
+            ``None`` shows every retained value.
+        metrics_capacity: int
+            Number of values kept in memory per metric (ring buffer).
+        metrics_downsample: str
+            ``"lttb"`` or ``"minmax"``; plots never draw more points than the
+            panel is wide.
+        queue_policy: str
+            Backpressure policy for state updates: ``"block"``,
+            ``"drop_oldest"`` or ``"coalesce"`` (see :mod:`render_queue`).
+        queue_maxsize: int
+            Maximum number of pending state updates. ``0`` keeps the queue
+            unbounded; ignored by the ``"coalesce"`` policy.
+        metrics_queue_maxsize: int
+            Maximum number of pending metrics updates. When bounded, the
+            metrics queue drops its oldest entries unless ``queue_policy`` is
+            ``"block"``.
+        metrics_sink: metrics_sink.MetricsSink | None
+            Optional append-only writer that receives every metrics update as
+            it is enqueued. When set, the full series is already on disk, so
+            closing the window skips the CSV/JSON dump and only closes the
+            sink.
+        output_dir: Path | None
+            Directory for the artefacts exported when the window closes. By
+            default a new ``data/runs/<timestamp>`` directory is created.
+        keep_runs: int | None
+            Retention policy for automatically created run directories;
+            older runs beyond this count are removed (``None`` keeps all).
+        state_source:
+            Optional object with the interface of a coalescing render queue
+            (``drain()`` returning :class:`render_queue.CoalescedUpdate`
+            items), used instead of the internal state queue, e.g.
+            :class:`process_backend.SharedStateSource`.
+        training_control:
+            Optional object with ``toggle_pause()``, ``reset()`` and
+            ``stop()`` (e.g. :class:`process_backend.ProcessTrainer`). Space
+            pauses or resumes training, ``r`` restarts it, and closing the
+            window stops it. A replay (:class:`training_log.ReplaySource`)
+            also skips episodes with the left/right arrows and changes its
+            speed with up/down.
+        show_stats: bool
+            Show the performance overlay from the start; ``p`` toggles it.
+            The numbers are always collected in :attr:`stats`.
+        stats_log: Path | None
+            JSON-lines file that receives a :class:`perf_stats.ViewerStats`
+            snapshot every ``stats_interval`` seconds.
+        stats_interval: float
+            Seconds between two logged snapshots.
+        """
+
         self.maze = maze
         self.feasibility = feasibility
         self.title = title
-        self.update_queue: "queue.Queue[object]" = queue.Queue()
-        self.metrics_queue: "queue.Queue[object]" = queue.Queue()
+        if state_source is not None:
+            self.queue_policy = state_source.policy
+            self.update_queue = state_source
+        else:
+            self.queue_policy = queue_policy
+            self.update_queue = make_render_queue(queue_maxsize, queue_policy)
+        self.training_control = training_control
+        metrics_policy = "block" if queue_policy == "block" else "drop_oldest"
+        self.metrics_queue = make_render_queue(metrics_queue_maxsize, metrics_policy)
+        self.metrics_sink = metrics_sink
+        self.output_dir = Path(output_dir) if output_dir is not None else None
+        self.keep_runs = keep_runs
+        self.exporter = None
+        self.export_future = None
         self.current_state: Optional[int] = None
         self.running = False
         self.screen = None
@@ -62,7 +145,8 @@ class LiveMazeViewer:
         self.max_visit_count = 1
         self.solved_path_states = None
         self.solved_path_surface = None
-        self.metric_series: dict[str, list[float]] = {}
+        self.metric_series = MetricStore(metrics_capacity)
+        self.metrics_downsample = metrics_downsample
         self.metric_colors = [
             (52, 152, 219),
             (46, 204, 113),
@@ -70,6 +154,9 @@ class LiveMazeViewer:
             (155, 89, 182),
         ]
         self.metric_font = None
+        self.stats = ViewerStats(log_path=stats_log, log_interval=stats_interval)
+        self.stats_visible = show_stats
+        self._dropped_seen = 0
 
         self._init_display()
 
@@ -140,8 +227,19 @@ class LiveMazeViewer:
     def enqueue_metrics(self, metrics):
         """Add a metrics update to the metrics rendering queue."""
 
+        if self.metrics_sink is not None:
+            self.metrics_sink.write(metrics)
         self.metrics_queue.put(metrics)
 
+    def queue_counters(self) -> dict:
+        """Return how many queued updates were dropped or coalesced so far."""
+
+        return {
+            "updates_dropped": self.update_queue.dropped,
+            "updates_coalesced": self.update_queue.coalesced,
+            "metrics_dropped": self.metrics_queue.dropped,
+        }
+
     def reset_trail(self, clear_surface: bool = False):
         """Clear the stored trail between episodes.
 
@@ -174,13 +272,20 @@ class LiveMazeViewer:
         y = margin + line_thickness + cell.y * cell_side
         return int(x), int(y)
 
-    def _drain_updates(self):
-        while True:
-            try:
-                state = self.update_queue.get_nowait()
-            except queue.Empty:
-                break
+    @traced("viewer", "drain_updates")
+    def _drain_updates(self) -> int:
+        """Apply the pending state updates; return how many states they held."""
+
+        if self.queue_policy == "coalesce":
+            consumed = 0
+            for update in self.update_queue.drain():
+                self._apply_coalesced_update(update)
+                # A backwards replay seek takes visits off; it consumed nothing.
+                consumed += max(0, sum(update.visits.values()))
+            return consumed
 
+        consumed = 0
+        for state in self.update_queue.drain():
             if state == RESET_SIGNAL:
                 self.reset_trail()
                 continue
@@ -189,30 +294,46 @@ class LiveMazeViewer:
             cell = self._state_to_cell(state)
             self._increment_visit(state)
             self._draw_trail(state, cell)
-
+            consumed += 1
+        # States a bounded queue dropped were still training steps; the
+        # coalescing sources already count every visit.
+        dropped = self.update_queue.dropped
+        consumed += dropped - self._dropped_seen
+        self._dropped_seen = dropped
+        return consumed
+
+    def _apply_coalesced_update(self, update):
+        for state, count in update.visits.items():
+            self._increment_visit(state, count)
+
+        # The cells in one aggregate are not necessarily adjacent, so mark each
+        # of them without connecting lines that could cut through walls.
+        self.reset_trail()
+        for state in update.visits:
+            self._draw_trail(state, self._state_to_cell(state))
+            self.previous_cell = None
+
+        self.current_state = update.latest_state
+
+    @traced("viewer", "drain_metrics")
     def _drain_metrics(self):
         updated = False
 
-        while True:
-            try:
-                metrics = self.metrics_queue.get_nowait()
-            except queue.Empty:
-                break
-
+        for metrics in self.metrics_queue.drain():
             updated = True
             if isinstance(metrics, dict):
                 for key, value in metrics.items():
                     if isinstance(value, (int, float, np.floating)):
-                        self.metric_series.setdefault(str(key), []).append(float(value))
+                        self.metric_series.append(str(key), float(value))
             elif isinstance(metrics, (int, float, np.floating)):
-                self.metric_series.setdefault("value", []).append(float(metrics))
+                self.metric_series.append("value", float(metrics))
 
         if updated:
             self._redraw_metrics_surface()
 
-    def _increment_visit(self, state):
+    def _increment_visit(self, state, count: int = 1):
         idx_x, idx_y = self.state_to_indices[state]
-        self.visit_counts[idx_x, idx_y] += 1
+        self.visit_counts[idx_x, idx_y] += count
         self.max_visit_count = max(self.max_visit_count, self.visit_counts[idx_x, idx_y])
 
     def _visit_color(self, state):
@@ -263,29 +384,36 @@ class LiveMazeViewer:
             max(1, int((cell_side / 3) * self.zoom)),
         )
 
-    def _blit_scaled_surfaces(self):
-        width, height = self._scaled_dimensions()
-        scaled_background = pygame.transform.smoothscale(self.background, (width, height))
-        scaled_trail = pygame.transform.smoothscale(self.trail_surface, (width, height))
+    @traced("viewer", "scale")
+    def _scale_surfaces(self, size):
+        scaled_background = pygame.transform.smoothscale(self.background, size)
+        scaled_trail = pygame.transform.smoothscale(self.trail_surface, size)
+        scaled_solution = None
+        if self.solved_path_surface:
+            scaled_solution = pygame.transform.smoothscale(self.solved_path_surface, size)
         scaled_metrics = None
         if self.metrics_surface and self.metrics_visible:
-            scaled_metrics = pygame.transform.smoothscale(self.metrics_surface, (width, height))
+            scaled_metrics = pygame.transform.smoothscale(self.metrics_surface, size)
+        return scaled_background, scaled_trail, scaled_solution, scaled_metrics
+
+    def _blit_scaled_surfaces(self):
+        width, height = self._scaled_dimensions()
+        layers = self._scale_surfaces((width, height))
+        self.stats.mark("scale")
 
         offset_x = (self.screen.get_width() - width) // 2
         offset_y = (self.screen.get_height() - height) // 2
 
-        self.screen.fill((255, 255, 255))
-        self.screen.blit(scaled_background, (offset_x, offset_y))
-        self.screen.blit(scaled_trail, (offset_x, offset_y))
-        if self.solved_path_surface:
-            scaled_solution = pygame.transform.smoothscale(self.solved_path_surface, (width, height))
-            self.screen.blit(scaled_solution, (offset_x, offset_y))
-        if scaled_metrics:
-            self.screen.blit(scaled_metrics, (offset_x, offset_y))
+        with span("blit", "viewer"):
+            self.screen.fill((255, 255, 255))
+            for layer in layers:
+                if layer:
+                    self.screen.blit(layer, (offset_x, offset_y))
 
     def _change_zoom(self, delta):
         self.zoom = min(self.max_zoom, max(self.min_zoom, self.zoom + delta))
 
+    @traced("viewer", "redraw_metrics")
     def _redraw_metrics_surface(self):
         if not self.metrics_surface:
             return
@@ -322,24 +450,20 @@ class LiveMazeViewer:
             subplot_rect = pygame.Rect(plot_rect.left, y_cursor, plot_rect.width, subplot_height)
             y_cursor += subplot_height + gap
 
-            data = series[-self.metrics_window :]
-            if not data:
+            data = series.values(self.metrics_window)
+            if not data.size:
                 continue
 
-            if len(data) > subplot_rect.width:
-                data = data[-subplot_rect.width :]
-
-            min_value = min(data)
-            max_value = max(data)
-            value_range = max(max_value - min_value, 1e-5)
-
             color = self.metric_colors[idx % len(self.metric_colors)]
-            points = []
-            for i, value in enumerate(data):
-                x = subplot_rect.left + int(i * (subplot_rect.width - 1) / max(1, len(data) - 1))
-                y_ratio = (value - min_value) / value_range
-                y = subplot_rect.bottom - int(y_ratio * (subplot_rect.height - 1))
-                points.append((x, y))
+            points = plot_points(
+                data,
+                subplot_rect.left,
+                subplot_rect.bottom,
+                subplot_rect.width - 1,
+                subplot_rect.height - 1,
+                1e-5,
+                self.metrics_downsample,
+            )
 
             pygame.draw.rect(self.metrics_surface, (220, 220, 220), subplot_rect, 1)
             if len(points) == 1:
@@ -352,100 +476,24 @@ class LiveMazeViewer:
                 label_pos = (subplot_rect.left + 4, subplot_rect.top + 2)
                 self.metrics_surface.blit(label_surface, label_pos)
 
-    def _toggle_metrics(self):
-        self.metrics_visible = not self.metrics_visible
-        self._redraw_metrics_surface()
-
-    def _sanitize_metric_name(self, name: str) -> str:
-        return "".join(c if c.isalnum() or c in {"_", "-"} else "_" for c in name)
-
-    def _export_metric_series(self, base_dir: Path, timestamp: str):
-        if not self.metric_series:
-            return
-
-        metric_items = [item for item in self.metric_series.items() if item[1]]
-        if not metric_items:
+    def _draw_stats(self):
+        if not self.stats_visible or not self.metric_font:
             return
 
-        width, height = 640, 360
-        padding = 40
-        plot_left = padding
-        plot_top = padding
-        plot_right = width - padding
-        plot_bottom = height - padding
+        lines = [self.metric_font.render(line, True, (255, 255, 255)) for line in self.stats.hud_lines()]
+        width = max(line.get_width() for line in lines) + 12
+        height = sum(line.get_height() for line in lines) + 12
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        y = 6
+        for line in lines:
+            panel.blit(line, (6, y))
+            y += line.get_height()
+        self.screen.blit(panel, (8, 8))
 
-        for idx, (name, series) in enumerate(metric_items):
-            if not series:
-                continue
-
-            img = Image.new("RGB", (width, height), (255, 255, 255))
-            drawer = ImageDraw.Draw(img)
-            drawer.rectangle(
-                [(plot_left, plot_top), (plot_right, plot_bottom)], outline=(200, 200, 200)
-            )
-
-            min_value = min(series)
-            max_value = max(series)
-            value_range = max(max_value - min_value, 1e-9)
-            color = self.metric_colors[idx % len(self.metric_colors)]
-
-            points = []
-            for i, value in enumerate(series):
-                x = plot_left + int(i * (plot_right - plot_left) / max(1, len(series) - 1))
-                y_ratio = (value - min_value) / value_range
-                y = plot_bottom - int(y_ratio * (plot_bottom - plot_top))
-                points.append((x, y))
-
-            if len(points) == 1:
-                drawer.ellipse(
-                    [
-                        (points[0][0] - 2, points[0][1] - 2),
-                        (points[0][0] + 2, points[0][1] + 2),
-                    ],
-                    fill=color,
-                )
-            else:
-                drawer.line(points, fill=color, width=2)
-
-            drawer.text((plot_left, plot_top - 24), str(name), fill=(80, 80, 80))
-
-            safe_name = self._sanitize_metric_name(str(name))
-            metric_path = base_dir / f"metric_{safe_name}_{timestamp}.png"
-            img.save(metric_path)
-
-        self._export_metric_series_csv_and_json(base_dir, timestamp, metric_items)
-
-    def _export_metric_series_csv_and_json(
-        self, base_dir: Path, timestamp: str, metric_items: list[tuple[str, list[float]]]
-    ):
-        max_len = max(len(series) for _, series in metric_items)
-        if max_len == 0:
-            return
-
-        csv_path = base_dir / f"metric_series_{timestamp}.csv"
-        json_path = base_dir / f"metric_series_{timestamp}.json"
-
-        fieldnames = ["episode"] + [name for name, _ in metric_items]
-        with csv_path.open("w", newline="", encoding="utf-8") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            for episode in range(1, max_len + 1):
-                row = {"episode": episode}
-                for name, series in metric_items:
-                    row[name] = series[episode - 1] if episode - 1 < len(series) else ""
-                writer.writerow(row)
-
-        json_payload = []
-        for episode in range(1, max_len + 1):
-            entry = {"episode": episode}
-            for name, series in metric_items:
-                entry[name] = series[episode - 1] if episode - 1 < len(series) else None
-            json_payload.append(entry)
-
-        with json_path.open("w", encoding="utf-8") as jsonfile:
-            json.dump(json_payload, jsonfile, ensure_ascii=False, indent=2)
-
-        print(f"Saved metric series to {csv_path} and {json_path}")
+    def _toggle_metrics(self):
+        self.metrics_visible = not self.metrics_visible
+        self._redraw_metrics_surface()
 
     def _ensure_solved_path_surface(self):
         """Render a green overlay for the solved path once available."""
@@ -466,44 +514,67 @@ class LiveMazeViewer:
 
         self.solved_path_surface = solution_surface
 
+    @traced("viewer", "save_final_images")
     def _save_final_images(self):
-        """Persist the current maze and metrics views to disk."""
+        """Snapshot the maze and metrics views and export them in the background.
 
-        if not self.screen:
-            return
+        Only raw surface bytes and series copies are taken on the render
+        thread; encoding happens on the exporter's worker pool. The returned
+        future (also stored as ``export_future``) resolves to the list of
+        written files.
+        """
 
-        base_dir = Path(__file__).resolve().parents[2] / "data"
-        base_dir.mkdir(parents=True, exist_ok=True)
+        if not self.screen:
+            return None
 
-        for pattern in ("*.png", "*.csv", "*.json"):
-            for file in base_dir.glob(pattern):
-                try:
-                    file.unlink()
-                except FileNotFoundError:
-                    continue
+        if self.output_dir is None:
+            self.output_dir = create_run_directory(DATA_DIR, self.keep_runs)
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
 
         # Refresh the composed surface before saving.
         self._blit_scaled_surfaces()
         self._draw_agent()
 
-        maze_path = base_dir / f"maze_view_{timestamp}.png"
-        pygame.image.save(self.screen, maze_path)
+        surfaces = {"maze_view": SurfaceSnapshot.from_surface(self.screen)}
 
         if self.solved_path_surface:
             solved_surface = pygame.Surface((self.base_width, self.base_height), pygame.SRCALPHA)
             solved_surface.blit(self.background, (0, 0))
             solved_surface.blit(self.solved_path_surface, (0, 0))
-            solved_path = base_dir / f"solved_maze_{timestamp}.png"
-            pygame.image.save(solved_surface, solved_path)
+            surfaces["solved_maze"] = SurfaceSnapshot.from_surface(solved_surface)
 
         if self.metrics_surface:
-            metrics_panel = pygame.Surface((self.base_width, self.base_height), pygame.SRCALPHA)
-            metrics_panel.blit(self.metrics_surface, (0, 0))
-            metrics_path = base_dir / f"metrics_panel_{timestamp}.png"
-            pygame.image.save(metrics_panel, metrics_path)
+            surfaces["metrics_panel"] = SurfaceSnapshot.from_surface(self.metrics_surface)
+
+        series_list = [
+            SeriesSnapshot(name, series.values(), series.first_index)
+            for name, series in self.metric_series.items()
+            if len(series)
+        ]
 
-        self._export_metric_series(base_dir, timestamp)
+        if self.exporter is None:
+            self.exporter = ArtifactExporter()
+        self.export_future = self.exporter.submit(
+            self.output_dir,
+            timestamp,
+            surfaces,
+            series_list,
+            self.metric_colors,
+            write_tables=self.metrics_sink is None,
+            downsample_method=self.metrics_downsample,
+        )
+        output_dir = self.output_dir
+        self.export_future.add_done_callback(
+            lambda future: print(
+                f"Saved {len(future.result())} artefacts to {output_dir}"
+                if future.exception() is None
+                else f"Exporting artefacts to {output_dir} failed: {future.exception()}"
+            )
+        )
+        # Let the worker threads exit once the queued exports are written.
+        self.exporter.shutdown(wait=False)
+        self.exporter = None
+        return self.export_future
 
     def run(self, completion_event: Optional["threading.Event"] = None, fps: int = 30):
         """Start the rendering loop.
@@ -531,15 +602,48 @@ class LiveMazeViewer:
                         self._change_zoom(-0.1)
                     elif event.key == pygame.K_m:
                         self._toggle_metrics()
-
-            self._drain_updates()
+                    elif event.key == pygame.K_p:
+                        self.stats_visible = not self.stats_visible
+                    elif self.training_control is not None and event.key == pygame.K_SPACE:
+                        self.training_control.toggle_pause()
+                    elif self.training_control is not None and event.key == pygame.K_r:
+                        self.training_control.reset()
+                        self.reset_trail(clear_surface=True)
+                        self.visit_counts.fill(0)
+                        self.max_visit_count = 1
+                    elif hasattr(self.training_control, "skip_episodes") and event.key in (
+                        pygame.K_LEFT,
+                        pygame.K_RIGHT,
+                    ):
+                        self.training_control.skip_episodes(1 if event.key == pygame.K_RIGHT else -1)
+                    elif hasattr(self.training_control, "set_speed") and event.key in (pygame.K_UP, pygame.K_DOWN):
+                        factor = 2.0 if event.key == pygame.K_UP else 0.5
+                        self.training_control.set_speed(self.training_control.speed * factor)
+
+            self.stats.begin_frame()
+            consumed = self._drain_updates()
             self._drain_metrics()
             self._ensure_solved_path_surface()
+            self.stats.mark("drain")
             self._blit_scaled_surfaces()
             self._draw_agent()
-            pygame.display.flip()
+            self._draw_stats()
+            self.stats.mark("blit")
+            with span("flip", "viewer"):
+                pygame.display.flip()
+            self.stats.mark("flip")
+            self.stats.end_frame(consumed, self.update_queue.qsize(), self.metrics_queue.qsize())
 
             self.clock.tick(fps)
 
+        if self.training_control is not None:
+            self.training_control.stop()
+        self.stats.write_snapshot()
+        # Release producers that may be blocked on a full queue.
+        self.update_queue.close()
+        self.metrics_queue.close()
+        if self.metrics_sink is not None:
+            self.metrics_sink.close()
+
         self._save_final_images()
         pygame.quit()
@@ -15,6 +15,36 @@ class Maze:
         self.maze_grid = np.array([[Cell(x, y) for y in range(ny)] for x in range(nx)])
         self.__make_maze(start_)
 
+    @classmethod
+    def from_walls(cls, walls, start, end):
+        """Create a maze from a ``(nx, ny)`` array of 4-bit wall masks.
+
+        Bit values follow ``maze_dataset.WALL_BITS``: N=1, S=2, E=4, W=8.
+        """
+
+        walls = np.asarray(walls)
+        maze = cls.__new__(cls)
+        maze.nx, maze.ny = walls.shape
+        maze.maze_grid = np.array([[Cell(x, y) for y in range(maze.ny)] for x in range(maze.nx)])
+        for (x, y), mask in np.ndenumerate(walls):
+            cell = maze.maze_grid[x][y]
+            for bit, direction in enumerate(cell.walls):
+                cell.walls[direction] = bool(mask & (1 << bit))
+        maze.maze_grid[start[0]][start[1]].status = 'Start'
+        maze.maze_grid[end[0]][end[1]].status = 'End'
+        maze.end = [int(end[0]), int(end[1])]
+        return maze
+
+    def to_walls(self):
+        """Return the ``(nx, ny)`` uint8 array of wall masks read by :meth:`from_walls`."""
+
+        # One generator pass over the cells; bits N=1, S=2, E=4, W=8 as in from_walls.
+        masks = (
+            cell.walls['N'] | cell.walls['S'] << 1 | cell.walls['E'] << 2 | cell.walls['W'] << 3
+            for cell in self.maze_grid.flat
+        )
+        return np.fromiter(masks, dtype=np.uint8, count=self.maze_grid.size).reshape(self.nx, self.ny)
+
     def cell_at(self, x, y):
         return self.maze_grid[x][y]
 
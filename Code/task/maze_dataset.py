@@ -0,0 +1,302 @@
+"""Reproducible maze corpora in sharded archives.
+
+Mazes are carved with the same depth-first search as :class:`maze.Maze`,
+but on a NumPy wall array instead of ``Cell`` objects. Every cell stores
+its walls as a 4-bit mask (:data:`WALL_BITS`); two cells share a byte on
+disk. Maze ``i`` of a dataset is generated from
+``SeedSequence(master_seed, spawn_key=(i,))``, so its contents do not
+depend on the number of worker processes or on the shard size.
+
+A dataset directory holds::
+
+    shard_00000.bin ...   packed wall masks, one maze after another
+    index.npy             one row per maze (see INDEX_DTYPE)
+    manifest.json         master seed, sizes and format version
+
+:class:`MazeDataset` memory-maps the index and reads a single maze with one
+seek, without loading its shard. Build a dataset with::
+
+    python maze_dataset.py --count 10000 --sizes 10x10 20x20 40x30 --seed 1
+"""
+
+import argparse
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from maze import Maze
+from run_dirs import DATA_DIR
+
+FORMAT_VERSION = 1
+WALL_BITS = {"N": 1, "S": 2, "E": 4, "W": 8}
+ALL_WALLS = 15
+OPPOSITE = {"N": "S", "S": "N", "E": "W", "W": "E"}
+# Same order as Maze.delta, so neighbours are considered in the same order.
+MOVES = (("N", 0, -1), ("S", 0, 1), ("W", -1, 0), ("E", 1, 0))
+
+INDEX_DTYPE = np.dtype(
+    [
+        ("shard", np.int32),
+        ("offset", np.int64),
+        ("nbytes", np.int32),
+        ("nx", np.int32),
+        ("ny", np.int32),
+        ("start_x", np.int32),
+        ("start_y", np.int32),
+        ("end_x", np.int32),
+        ("end_y", np.int32),
+        ("optimal_length", np.int32),
+    ]
+)
+
+
+def generate_walls(nx: int, ny: int, start, rng: np.random.Generator):
+    """Carve a perfect maze with a depth-first search.
+
+    Returns ``(walls, end)``: a ``(nx, ny)`` uint8 array of wall masks and
+    the last cell carved, which :class:`maze.Maze` marks as the end.
+    """
+
+    if nx * ny < 2:
+        raise ValueError("A maze needs at least two cells")
+    # Flat bytearrays in numbered_grid order (x * ny + y); scalar indexing
+    # of NumPy arrays would dominate the run time of this loop.
+    walls = bytearray([ALL_WALLS]) * (nx * ny)
+    visited = bytearray(nx * ny)
+    moves = [(WALL_BITS[direction], WALL_BITS[OPPOSITE[direction]], dx, dy) for direction, dx, dy in MOVES]
+    # One uniform draw per carved passage, drawn up front.
+    draws = rng.random(nx * ny - 1).tolist()
+    x, y = start
+    visited[x * ny + y] = 1
+    stack = []
+    n_visited = 1
+    end = (x, y)
+    while n_visited < nx * ny:
+        options = [
+            (bit, opposite, x + dx, y + dy)
+            for bit, opposite, dx, dy in moves
+            if 0 <= x + dx < nx and 0 <= y + dy < ny and not visited[(x + dx) * ny + y + dy]
+        ]
+        if not options:
+            x, y = stack.pop()
+            continue
+        bit, opposite, next_x, next_y = options[int(draws[n_visited - 1] * len(options))]
+        walls[x * ny + y] ^= bit
+        walls[next_x * ny + next_y] ^= opposite
+        stack.append((x, y))
+        x, y = next_x, next_y
+        visited[x * ny + y] = 1
+        n_visited += 1
+        end = (x, y)
+    return np.frombuffer(bytes(walls), dtype=np.uint8).reshape(nx, ny).copy(), end
+
+
+def shortest_path_length(walls: np.ndarray, start, end) -> int:
+    """Breadth-first number of moves from ``start`` to ``end`` (-1 if unreachable)."""
+
+    nx, ny = walls.shape
+    masks = walls.ravel().tolist()
+    steps = [(WALL_BITS[direction], dx * ny + dy) for direction, dx, dy in MOVES]
+    source, target = start[0] * ny + start[1], end[0] * ny + end[1]
+    distance = [-1] * (nx * ny)
+    distance[source] = 0
+    frontier = deque([source])
+    while frontier:
+        cell = frontier.popleft()
+        if cell == target:
+            return distance[cell]
+        for bit, step in steps:
+            # An open wall always leads to a cell inside the grid.
+            if not masks[cell] & bit and distance[cell + step] < 0:
+                distance[cell + step] = distance[cell] + 1
+                frontier.append(cell + step)
+    return -1
+
+
+def pack_walls(walls: np.ndarray) -> bytes:
+    """Pack wall masks two cells per byte, in ``numbered_grid`` order."""
+
+    flat = walls.ravel()
+    if flat.size % 2:
+        flat = np.append(flat, 0)
+    return (flat[0::2] | (flat[1::2] << 4)).astype(np.uint8).tobytes()
+
+
+def unpack_walls(data: bytes, nx: int, ny: int) -> np.ndarray:
+    packed = np.frombuffer(data, dtype=np.uint8)
+    flat = np.empty(packed.size * 2, dtype=np.uint8)
+    flat[0::2] = packed & 0x0F
+    flat[1::2] = packed >> 4
+    return flat[: nx * ny].reshape(nx, ny)
+
+
+def maze_seed(master_seed: int, maze_id: int) -> np.random.SeedSequence:
+    return np.random.SeedSequence(master_seed, spawn_key=(maze_id,))
+
+
+def generate_maze(master_seed: int, maze_id: int, sizes):
+    """Generate maze ``maze_id`` of a dataset: size, start, walls and end."""
+
+    rng = np.random.default_rng(maze_seed(master_seed, maze_id))
+    nx, ny = sizes[int(rng.integers(len(sizes)))]
+    start = (int(rng.integers(nx)), int(rng.integers(ny)))
+    walls, end = generate_walls(nx, ny, start, rng)
+    return walls, start, end
+
+
+def _write_shard(directory, shard, master_seed, first_id, count, sizes):
+    rows = np.zeros(count, dtype=INDEX_DTYPE)
+    offset = 0
+    with open(Path(directory) / shard_name(shard), "wb") as handle:
+        for row, maze_id in enumerate(range(first_id, first_id + count)):
+            walls, start, end = generate_maze(master_seed, maze_id, sizes)
+            data = pack_walls(walls)
+            handle.write(data)
+            rows[row] = (
+                shard,
+                offset,
+                len(data),
+                walls.shape[0],
+                walls.shape[1],
+                start[0],
+                start[1],
+                end[0],
+                end[1],
+                shortest_path_length(walls, start, end),
+            )
+            offset += len(data)
+    return rows
+
+
+def shard_name(shard: int) -> str:
+    return f"shard_{shard:05d}.bin"
+
+
+def build_dataset(directory, count: int, sizes, master_seed: int, shard_size: int = 1000, workers=None) -> Path:
+    """Generate ``count`` mazes into ``directory`` with a process pool.
+
+    Parameters
+    ----------
+    directory: Path | str
+        Output directory; created when missing.
+    count: int
+        Number of mazes.
+    sizes: sequence[tuple[int, int]]
+        Maze dimensions ``(nx, ny)``; every maze draws one uniformly.
+    master_seed: int
+        Seed the whole dataset is derived from.
+    shard_size: int
+        Mazes per shard file; one shard is one pool task.
+    workers: int | None
+        Pool size (default: one per CPU).
+    """
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    sizes = [tuple(int(v) for v in size) for size in sizes]
+    firsts = list(range(0, count, shard_size))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_write_shard, directory, shard, master_seed, first, min(shard_size, count - first), sizes)
+            for shard, first in enumerate(firsts)
+        ]
+        rows = [future.result() for future in futures]
+
+    np.save(directory / "index.npy", np.concatenate(rows) if rows else np.zeros(0, dtype=INDEX_DTYPE))
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "master_seed": master_seed,
+        "count": count,
+        "sizes": [list(size) for size in sizes],
+        "shard_size": shard_size,
+        "shards": len(firsts),
+        "wall_bits": WALL_BITS,
+    }
+    (directory / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return directory
+
+
+class MazeRecord:
+    """One maze of a dataset: wall masks, start, end and optimal path length."""
+
+    __slots__ = ("maze_id", "walls", "start", "end", "optimal_length")
+
+    def __init__(self, maze_id, walls, start, end, optimal_length):
+        self.maze_id = maze_id
+        self.walls = walls
+        self.start = start
+        self.end = end
+        self.optimal_length = optimal_length
+
+    def to_maze(self):
+        """Build a :class:`maze.Maze` (with ``Cell`` objects) for training."""
+
+        return Maze.from_walls(self.walls, self.start, self.end)
+
+
+class MazeDataset:
+    """Random access to a dataset written by :func:`build_dataset`."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.manifest = json.loads((self.directory / "manifest.json").read_text(encoding="utf-8"))
+        if self.manifest["format_version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported dataset format {self.manifest['format_version']}")
+        self.index = np.load(self.directory / "index.npy", mmap_mode="r")
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, maze_id: int) -> MazeRecord:
+        if not 0 <= maze_id < len(self.index):
+            raise IndexError(f"Maze {maze_id} is not in the dataset")
+        row = self.index[maze_id]
+        with open(self.directory / shard_name(int(row["shard"])), "rb") as handle:
+            handle.seek(int(row["offset"]))
+            data = handle.read(int(row["nbytes"]))
+        return MazeRecord(
+            maze_id,
+            unpack_walls(data, int(row["nx"]), int(row["ny"])),
+            (int(row["start_x"]), int(row["start_y"])),
+            (int(row["end_x"]), int(row["end_y"])),
+            int(row["optimal_length"]),
+        )
+
+    def __iter__(self):
+        for maze_id in range(len(self)):
+            yield self[maze_id]
+
+
+def _parse_size(raw: str):
+    nx, ny = raw.lower().split("x")
+    return int(nx), int(ny)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a sharded maze dataset with a process pool.")
+    parser.add_argument("--count", type=int, required=True, help="Number of mazes.")
+    parser.add_argument(
+        "--sizes", nargs="+", type=_parse_size, default=[(10, 10)], metavar="NXxNY", help="Maze dimensions."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Master seed of the dataset.")
+    parser.add_argument("--shard-size", type=int, default=1000, help="Mazes per shard file.")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU).")
+    parser.add_argument(
+        "--output", type=Path, help="Output directory (default: data/datasets/seed<SEED>_n<COUNT>)."
+    )
+    args = parser.parse_args(argv)
+    if args.count <= 0 or args.shard_size <= 0:
+        parser.error("--count and --shard-size must be positive.")
+    if any(nx <= 0 or ny <= 0 or nx * ny < 2 for nx, ny in args.sizes):
+        parser.error("--sizes must have at least two cells.")
+
+    output = args.output or DATA_DIR / "datasets" / f"seed{args.seed}_n{args.count}"
+    build_dataset(output, args.count, args.sizes, args.seed, args.shard_size, args.workers)
+    print(f"Wrote {args.count} mazes to {output}")
+
+
+if __name__ == "__main__":
+    main()
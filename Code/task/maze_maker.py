@@ -1,15 +1,5 @@
 from maze import Maze
-from convert import Feasibility
 from draw import draw_maze
-import pandas as pd
-
-
-# This function is needed to print a readable representation of the feasibility matrix.
-def my_print(matrix):
-    labels = [str(x) for x in range(matrix.shape[0])]
-    df = pd.DataFrame(matrix, columns=labels, index=labels)
-    pd.set_option('display.max_rows', None)
-    print(df.to_string())
 
 
 if __name__ == "__main__":
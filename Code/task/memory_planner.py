@@ -0,0 +1,307 @@
+"""Estimate the memory of a training run and pick a storage layout that fits.
+
+A run keeps several ``states x states`` matrices: the feasibility matrix
+``F``, the rewards ``R`` and the Q table, plus copies of them for parallel
+workers and, with ``record_q_values``, one Q per episode. They grow with the
+fourth power of the maze side, so a maze that is a little too large used to
+fail halfway through ``Agent.__init__`` with a bare ``MemoryError`` or drive
+the machine into swap. :func:`plan_memory` runs before anything is
+allocated: it estimates the footprint of every structure for the layouts in
+:data:`LAYOUTS`, keeps the first one that fits the budget and otherwise
+raises :class:`MemoryBudgetError` with the estimate::
+
+    python memory_planner.py --size 150 150 --engine parallel --workers 4
+"""
+
+import argparse
+import os
+import re
+
+import numpy as np
+
+from convert import FEASIBILITY_BACKENDS
+
+# (F backend, R dtype) from the historical layout to the smallest. R and Q
+# stay dense states x states tables in every layout (the training loop
+# indexes them by (state, action) on every step), so the backend only
+# shrinks F and the F == 1 scan; the float32 R halves the rewards.
+LAYOUTS = (("dense", "float64"), ("compact", "float32"), ("sparse", "float32"))
+
+# Measured per-state overhead of the Python objects: a Maze cell with its
+# walls, and one neighbour array view in neighbor_lists.
+CELL_OBJECT_BYTES = 300
+NEIGHBOR_LIST_BYTES = 160
+
+# Share of the available memory used when no budget is given.
+DEFAULT_BUDGET_SHARE = 0.8
+
+_UNITS = {"": 1, "K": 2**10, "M": 2**20, "G": 2**30, "T": 2**40}
+
+
+class MemoryBudgetError(MemoryError):
+    """No storage layout fits the budget; ``plans`` holds every estimate."""
+
+    def __init__(self, plans: list):
+        self.plans = plans
+        smallest = min(plans, key=lambda plan: plan.total)
+        super().__init__(
+            f"{smallest.report()}\n"
+            "No layout fits the memory budget. Use a smaller --size, fewer --workers, "
+            "fewer --epochs with recorded Q values, or raise --memory-budget."
+        )
+
+
+class MemoryPlan:
+    """A storage layout and its estimated footprint.
+
+    Parameters
+    ----------
+    size: tuple[int, int]
+        Maze dimensions ``(nx, ny)``.
+    feasibility: str
+        Backend of ``Feasibility.F_matrix``, see :data:`convert.FEASIBILITY_BACKENDS`.
+    reward_dtype: str
+        NumPy dtype of ``Agent.R``.
+    footprint: dict[str, int]
+        Estimated bytes per structure, see :func:`estimate_footprint`.
+    budget: int | None
+        Bytes available to the run (None: unlimited).
+    """
+
+    def __init__(self, size, feasibility: str, reward_dtype: str, footprint: dict, budget: int | None):
+        self.size = tuple(size)
+        self.feasibility = feasibility
+        self.reward_dtype = reward_dtype
+        self.footprint = footprint
+        self.budget = budget
+
+    @property
+    def total(self) -> int:
+        return sum(self.footprint.values())
+
+    @property
+    def fits(self) -> bool:
+        return self.budget is None or self.total <= self.budget
+
+    def report(self) -> str:
+        nx, ny = self.size
+        budget = "no limit" if self.budget is None else format_bytes(self.budget)
+        lines = [
+            f"Memory for a {nx} x {ny} maze ({nx * ny:,} states) with {self.feasibility} F "
+            f"and {self.reward_dtype} R: {format_bytes(self.total)} (budget {budget})"
+        ]
+        width = max(len(name) for name in self.footprint)
+        lines.extend(f"  {name:<{width}}  {format_bytes(size):>10}" for name, size in self.footprint.items())
+        return "\n".join(lines)
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+
+def parse_size(text: str) -> int:
+    """Parse a byte count such as ``"512M"``, ``"2G"`` or ``"1.5GiB"`` (powers of 1024)."""
+
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:I?B)?\s*", text.upper())
+    if match is None:
+        raise ValueError(f"Invalid memory size {text!r}; expected e.g. 512M or 2G")
+    return int(float(match.group(1)) * _UNITS[match.group(2)])
+
+
+def available_memory() -> int | None:
+    """Bytes the system can still hand out, or None when unknown."""
+
+    try:
+        with open("/proc/meminfo", encoding="ascii") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def resolve_budget(value: str = "auto") -> int | None:
+    """Budget in bytes for ``--memory-budget``: a size, ``"auto"`` or ``"off"``.
+
+    ``"auto"`` is :data:`DEFAULT_BUDGET_SHARE` of :func:`available_memory`;
+    ``"off"`` (and ``"auto"`` where the available memory is unknown) means
+    no limit.
+    """
+
+    if value == "off":
+        return None
+    if value == "auto":
+        available = available_memory()
+        return None if available is None else int(DEFAULT_BUDGET_SHARE * available)
+    return parse_size(value)
+
+
+def max_moves(nx: int, ny: int) -> int:
+    """Feasible moves of a maze without any inner walls (both directions)."""
+
+    return 2 * ((nx - 1) * ny + nx * (ny - 1))
+
+
+def feasibility_bytes(nx: int, ny: int, backend: str) -> int:
+    n_states = nx * ny
+    if backend == "dense":
+        return n_states * n_states * np.dtype(int).itemsize
+    if backend == "compact":
+        return n_states * n_states
+    # AdjacencyMatrix: int64 row pointers and int32 columns.
+    return (n_states + 1) * 8 + max_moves(nx, ny) * 4
+
+
+def estimate_footprint(
+    nx: int,
+    ny: int,
+    feasibility: str = "dense",
+    reward_dtype: str = "float64",
+    epochs: int = 1000,
+    record_q_values: bool = False,
+    engine: str = "q-learning",
+    workers: int | None = None,
+    backend: str = "thread",
+) -> dict:
+    """Estimated bytes per structure of a training run.
+
+    Parameters
+    ----------
+    nx, ny: int
+        Maze dimensions.
+    feasibility: str
+        Backend of ``F``.
+    reward_dtype: str
+        dtype of ``R``.
+    epochs: int
+        Training episodes; with ``record_q_values`` each keeps a copy of Q.
+    record_q_values: bool
+        Whether ``Agent.train`` stores Q after every episode.
+    engine: str
+        ``"parallel"`` adds a shared Q and a copy of ``F`` and ``R`` per worker.
+    workers: int | None
+        Workers of the parallel engine (default: one per CPU).
+    backend: str
+        ``"process"`` (live viewer) adds one training process with its own
+        ``F`` and ``R``.
+
+    Returns
+    -------
+    dict[str, int]
+        Bytes per structure; the matrices dominate, the rest is measured
+        per-state overhead. ``--reduce`` is not included: the reduced problem
+        is usually far smaller than the maze.
+    """
+
+    n_states = nx * ny
+    square = n_states * n_states
+    F = feasibility_bytes(nx, ny, feasibility)
+    R = square * np.dtype(reward_dtype).itemsize
+    Q = square * np.dtype(np.float32).itemsize
+    footprint = {
+        "maze cells": n_states * CELL_OBJECT_BYTES,
+        "F": F,
+        "R": R,
+        "Q": Q,
+        # Successor and predecessor lists, plus the F == 1 mask a dense F is scanned with.
+        "neighbour lists": 2 * n_states * NEIGHBOR_LIST_BYTES
+        + 2 * max_moves(nx, ny) * 16
+        + (square if feasibility != "sparse" else 0),
+    }
+    if record_q_values:
+        footprint["Q snapshots"] = epochs * Q
+    if backend == "process":
+        footprint["training process"] = F + R
+    if engine == "parallel":
+        if workers is None:
+            from parallel_training import default_worker_count
+
+            workers = default_worker_count()
+        footprint["shared Q"] = Q
+        footprint["parallel workers"] = min(workers, epochs) * (F + R)
+    return footprint
+
+
+def plan_memory(
+    nx: int,
+    ny: int,
+    budget: int | None = None,
+    feasibility: str = "auto",
+    reduce: bool = False,
+    **run,
+) -> MemoryPlan:
+    """Return the first layout of :data:`LAYOUTS` whose footprint fits ``budget``.
+
+    Parameters
+    ----------
+    nx, ny: int
+        Maze dimensions.
+    budget: int | None
+        Bytes available to the run (None: unlimited).
+    feasibility: str
+        ``"auto"`` or one backend of ``F`` to use regardless of the others.
+    reduce: bool
+        Whether the run trains on a :class:`state_reduction.ReducedProblem`,
+        which needs a dense or compact ``F``.
+    **run
+        Further arguments of :func:`estimate_footprint`.
+
+    Raises
+    ------
+    MemoryBudgetError
+        If no allowed layout fits.
+    """
+
+    if feasibility == "auto":
+        layouts = [layout for layout in LAYOUTS if not (reduce and layout[0] == "sparse")]
+    elif feasibility in FEASIBILITY_BACKENDS:
+        if reduce and feasibility == "sparse":
+            raise ValueError("--reduce needs a dense or compact feasibility matrix")
+        layouts = [layout for layout in LAYOUTS if layout[0] == feasibility]
+    else:
+        raise ValueError(f"Unknown feasibility backend {feasibility!r}; expected auto or one of {FEASIBILITY_BACKENDS}")
+
+    plans = []
+    for backend, reward_dtype in layouts:
+        footprint = estimate_footprint(nx, ny, backend, reward_dtype, **run)
+        plan = MemoryPlan((nx, ny), backend, reward_dtype, footprint, budget)
+        if plan.fits:
+            return plan
+        plans.append(plan)
+    raise MemoryBudgetError(plans)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate the memory a training run needs.")
+    parser.add_argument("--size", nargs=2, type=int, metavar=("NX", "NY"), required=True, help="Maze dimensions.")
+    parser.add_argument("--feasibility", choices=("auto", *FEASIBILITY_BACKENDS), default="auto")
+    parser.add_argument("--memory-budget", default="auto", help="Bytes available, e.g. 2G; auto or off.")
+    parser.add_argument("--epochs", type=int, default=1000)
+    parser.add_argument("--engine", choices=("q-learning", "parallel"), default="q-learning")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--backend", choices=("thread", "process"), default="thread")
+    parser.add_argument("--reduce", action="store_true")
+    args = parser.parse_args(argv)
+    try:
+        budget = resolve_budget(args.memory_budget)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    run = {"epochs": args.epochs, "engine": args.engine, "workers": args.workers, "backend": args.backend}
+    try:
+        plan = plan_memory(*args.size, budget, args.feasibility, args.reduce, **run)
+    except MemoryBudgetError as exc:
+        raise SystemExit(str(exc))
+    print(plan.report())
+
+
+if __name__ == "__main__":
+    main()
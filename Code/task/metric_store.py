@@ -0,0 +1,173 @@
+"""Fixed-capacity metric storage and downsampling for the metrics panel.
+
+Each metric keeps its most recent values in a NumPy ring buffer so memory and
+redraw cost stay constant over arbitrarily long training runs. Plots use a
+downsampled view of at most one point per pixel column.
+"""
+
+import numpy as np
+
+
+class RingSeries:
+    """Ring buffer holding the most recent ``capacity`` values of a metric.
+
+    Parameters
+    ----------
+    capacity: int
+        Maximum number of values kept in memory. Older values are
+        overwritten once the buffer is full.
+    """
+
+    def __init__(self, capacity: int = 100_000):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive.")
+        self.capacity = capacity
+        self.total = 0
+        self._data = np.empty(capacity, dtype=np.float64)
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    @property
+    def first_index(self) -> int:
+        """Zero-based index (over the whole run) of the oldest retained value."""
+
+        return self.total - len(self)
+
+    def append(self, value: float):
+        self._data[self.total % self.capacity] = value
+        self.total += 1
+
+    def get(self, index: int):
+        """Return the value at run index ``index`` or ``None`` if not retained."""
+
+        if not self.first_index <= index < self.total:
+            return None
+        return float(self._data[index % self.capacity])
+
+    def values(self, last: int | None = None) -> np.ndarray:
+        """Return the retained values (or only the ``last`` ones) in order."""
+
+        count = len(self) if last is None else min(last, len(self))
+        if count <= 0:
+            return np.empty(0, dtype=np.float64)
+
+        end = self.total % self.capacity
+        begin = end - count
+        if begin >= 0:
+            return self._data[begin:end].copy()
+        return np.concatenate((self._data[begin:], self._data[:end]))
+
+
+class MetricStore:
+    """Named collection of :class:`RingSeries` sharing one capacity."""
+
+    def __init__(self, capacity: int = 100_000):
+        self.capacity = capacity
+        self._series: dict[str, RingSeries] = {}
+
+    def __bool__(self):
+        return bool(self._series)
+
+    def __len__(self):
+        return len(self._series)
+
+    def __contains__(self, name):
+        return name in self._series
+
+    def __getitem__(self, name) -> RingSeries:
+        return self._series[name]
+
+    def append(self, name: str, value: float):
+        series = self._series.get(name)
+        if series is None:
+            series = self._series[name] = RingSeries(self.capacity)
+        series.append(value)
+
+    def items(self):
+        return self._series.items()
+
+
+def lttb_indices(y: np.ndarray, n_out: int, x: np.ndarray | None = None) -> np.ndarray:
+    """Select ``n_out`` indices with largest-triangle-three-buckets.
+
+    The first and last points are always kept; every bucket in between
+    contributes the point forming the largest triangle with the previously
+    selected point and the average of the next bucket.
+    """
+
+    n = len(y)
+    if n_out >= n or n <= 2:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])
+
+    if x is None:
+        x = np.arange(n, dtype=np.float64)
+    edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(int) + 1
+
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    anchor = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        areas = np.abs(
+            (x[anchor] - avg_x) * (y[start:end] - y[anchor])
+            - (x[anchor] - x[start:end]) * (avg_y - y[anchor])
+        )
+        anchor = start + int(np.argmax(areas))
+        selected[bucket + 1] = anchor
+
+    return selected
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Select the minimum and maximum of ``n_out // 2`` equal-width buckets."""
+
+    n = len(y)
+    buckets = max(1, n_out // 2)
+    if n <= n_out:
+        return np.arange(n)
+
+    bounds = np.linspace(0, n, buckets + 1).astype(int)
+    selected = []
+    for chunk_start, chunk_end in zip(bounds[:-1], bounds[1:]):
+        chunk = y[chunk_start:chunk_end]
+        low, high = int(np.argmin(chunk)), int(np.argmax(chunk))
+        selected.extend(sorted({chunk_start + low, chunk_start + high}))
+    return np.asarray(selected)
+
+
+def downsample(y: np.ndarray, n_out: int, method: str = "lttb") -> tuple[np.ndarray, np.ndarray]:
+    """Return ``(indices, values)`` of at most ``n_out`` points of ``y``."""
+
+    if method == "lttb":
+        indices = lttb_indices(y, n_out)
+    elif method == "minmax":
+        indices = minmax_indices(y, n_out)
+    else:
+        raise ValueError(f"Unknown downsampling method {method!r}.")
+    return indices, y[indices]
+
+
+def plot_points(data, left, bottom, width, height, min_range, method: str = "lttb") -> list[tuple[int, int]]:
+    """Map a downsampled view of ``data`` to integer pixel coordinates.
+
+    At most ``width + 1`` points are returned, spread over ``[left, left +
+    width]`` and scaled vertically into ``[bottom - height, bottom]``.
+    """
+
+    indices, values = downsample(data, max(1, width + 1), method)
+    min_value = float(values.min())
+    value_range = max(float(values.max()) - min_value, min_range)
+    xs = left + (indices * width / max(1, len(data) - 1)).astype(int)
+    ys = bottom - ((values - min_value) / value_range * height).astype(int)
+    return list(zip(xs.tolist(), ys.tolist()))
@@ -0,0 +1,198 @@
+"""Append-only episode metrics writer used while training runs.
+
+Episode metrics are handed to :class:`MetricsSink` from the training thread
+and written in batches by a background thread, so the files on disk are
+always at most one batch behind the training loop. Supported formats:
+
+``"csv"``
+    One row per episode, header taken from the first episode.
+``"jsonl"``
+    One JSON object per line.
+``"npz"``
+    Columnar chunks (one ``.npz`` file per flushed batch with one array per
+    numeric metric) in a ``<stem>_chunks`` directory.
+"""
+
+import csv
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from tracing import traced
+
+SINK_FORMATS = ("csv", "jsonl", "npz")
+
+_STOP = object()
+
+
+class MetricsSink:
+    """Write episode metrics to disk in batches on a background thread.
+
+    Parameters
+    ----------
+    directory: Path | str
+        Directory that receives the output files (created when missing).
+    stem: str
+        Base file name, e.g. ``"metric_series_20250101_120000"``.
+    formats: tuple[str, ...]
+        Any subset of :data:`SINK_FORMATS`.
+    batch_size: int
+        Number of episodes collected before a batch is written.
+    flush_interval: float
+        Maximum number of seconds a partial batch waits before being written.
+    fsync: bool
+        When True, every flushed batch is forced to stable storage.
+    """
+
+    def __init__(
+        self,
+        directory,
+        stem: str,
+        formats=SINK_FORMATS,
+        batch_size: int = 256,
+        flush_interval: float = 1.0,
+        fsync: bool = False,
+    ):
+        unknown = set(formats) - set(SINK_FORMATS)
+        if unknown:
+            raise ValueError(f"Unknown metrics sink formats: {sorted(unknown)}")
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.stem = stem
+        self.formats = tuple(formats)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.episodes_written = 0
+        self.csv_path = self.directory / f"{stem}.csv"
+        self.jsonl_path = self.directory / f"{stem}.jsonl"
+        self.chunk_dir = self.directory / f"{stem}_chunks"
+        self._fieldnames = None
+        self._chunks_written = 0
+        self._queue: "queue.Queue[object]" = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="metrics-sink", daemon=True)
+        self._thread.start()
+
+    def paths(self) -> list[Path]:
+        """Return the files and directories this sink writes to."""
+
+        return [
+            path
+            for fmt, path in (("csv", self.csv_path), ("jsonl", self.jsonl_path), ("npz", self.chunk_dir))
+            if fmt in self.formats
+        ]
+
+    def write(self, metrics):
+        """Queue the metrics of one episode; never blocks on disk I/O."""
+
+        if self._closed:
+            return
+        if not isinstance(metrics, dict):
+            metrics = {"value": metrics}
+        self._queue.put(metrics)
+
+    def close(self, timeout: float | None = None):
+        """Write any pending episodes and stop the background thread."""
+
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._flush(batch)
+                return
+
+            if item is not None:
+                batch.append(item)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._flush(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    @traced("metrics_sink", "flush_metrics")
+    def _flush(self, batch):
+        if not batch:
+            return
+
+        first_episode = self.episodes_written + 1
+        records = [
+            {"episode": first_episode + offset, **_plain_values(metrics)}
+            for offset, metrics in enumerate(batch)
+        ]
+
+        if "csv" in self.formats:
+            self._append_csv(records)
+        if "jsonl" in self.formats:
+            with self.jsonl_path.open("a", encoding="utf-8") as jsonl_file:
+                for record in records:
+                    jsonl_file.write(json.dumps(record, ensure_ascii=False))
+                    jsonl_file.write("\n")
+                self._sync(jsonl_file)
+        if "npz" in self.formats:
+            self._write_chunk(records)
+
+        self.episodes_written += len(records)
+
+    def _append_csv(self, records):
+        write_header = self._fieldnames is None
+        if write_header:
+            self._fieldnames = list(records[0].keys())
+
+        with self.csv_path.open("a", newline="", encoding="utf-8") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=self._fieldnames, extrasaction="ignore", restval="")
+            if write_header:
+                writer.writeheader()
+            writer.writerows(records)
+            self._sync(csv_file)
+
+    def _write_chunk(self, records):
+        columns = {}
+        for name in records[0]:
+            values = [record.get(name) for record in records]
+            if all(isinstance(value, (bool, int, float)) for value in values):
+                columns[name] = np.asarray(values)
+
+        self.chunk_dir.mkdir(exist_ok=True)
+        chunk_path = self.chunk_dir / f"chunk_{self._chunks_written:06d}.npz"
+        np.savez(chunk_path, **columns)
+        self._chunks_written += 1
+
+    def _sync(self, handle):
+        if self.fsync:
+            handle.flush()
+            os.fsync(handle.fileno())
+
+
+def _plain_values(metrics: dict) -> dict:
+    """Convert NumPy scalars to built-in types so they serialise cleanly."""
+
+    return {str(key): value.item() if isinstance(value, np.generic) else value for key, value in metrics.items()}
+
+
+def load_chunks(chunk_dir) -> dict[str, np.ndarray]:
+    """Concatenate all columnar chunks in ``chunk_dir`` into full arrays."""
+
+    columns: dict[str, list[np.ndarray]] = {}
+    for chunk_path in sorted(Path(chunk_dir).glob("chunk_*.npz")):
+        with np.load(chunk_path) as chunk:
+            for name in chunk.files:
+                columns.setdefault(name, []).append(chunk[name])
+    return {name: np.concatenate(parts) for name, parts in columns.items()}
@@ -0,0 +1,213 @@
+"""Parallel asynchronous Q-learning on one shared Q table.
+
+:func:`train_parallel` starts several worker processes that each run
+``Agent.train`` on their own share of the episode budget. All workers read
+and write the same ``Q`` in shared memory without locks (Hogwild-style):
+the updates touch single entries and a lost update costs no more than one
+sample.
+
+Every worker has its own NumPy RNG stream (spawned from one
+:class:`numpy.random.SeedSequence`) and its own exploration floor, so the
+workers explore different parts of the maze. The coordinator in the parent
+forwards the metrics of every episode to ``episode_callback`` in the
+format ``Agent.train`` uses, and runs the greedy-walk check of
+``greedy_check_every`` on the shared table so it can stop all workers at
+once.
+"""
+
+import copy
+import multiprocessing
+import os
+import queue
+
+import numpy as np
+
+from callback_protocol import RESET_SIGNAL
+from convert import neighbor_lists
+from process_backend import SharedTrainingBuffers
+
+
+def default_worker_count() -> int:
+    return max(1, os.cpu_count() or 1)
+
+
+def exploration_floors(workers: int, min_epsilon: float = 0.01, max_floor: float = 0.3) -> np.ndarray:
+    """Per-worker ``min_epsilon``: worker 0 keeps ``min_epsilon``, the rest
+    are spread geometrically up to ``max_floor``."""
+
+    if workers == 1:
+        return np.array([min_epsilon])
+    return np.geomspace(min_epsilon, max(min_epsilon, max_floor), workers)
+
+
+class _Stopped(Exception):
+    pass
+
+
+def _worker(index, agent, F, name, episodes, seed, options, stop_event, results, poll_every):
+    buffers = SharedTrainingBuffers(agent.n_states, 1, name=name)
+    agent.Q = buffers.Q
+    np.random.seed(seed)
+    steps = 0
+
+    def state_callback(state):
+        nonlocal steps
+        steps += 1
+        if (state == RESET_SIGNAL or steps % poll_every == 0) and stop_event.is_set():
+            raise _Stopped
+
+    def episode_callback(metrics):
+        results.put(("metrics", index, metrics))
+
+    try:
+        stop = agent.train(F, episodes, state_callback=state_callback, episode_callback=episode_callback, **options)
+    except _Stopped:
+        stop = {"reason": "stopped", "episodes": None}
+    results.put(("done", index, stop))
+    agent.Q = None
+    buffers.close()
+
+
+def _discard(results):
+    try:
+        while True:
+            results.get_nowait()
+    except queue.Empty:
+        pass
+
+
+def train_parallel(
+    agent,
+    F,
+    max_epochs,
+    workers=None,
+    seed=None,
+    episode_callback=None,
+    greedy_check_every=None,
+    min_epsilon=0.01,
+    floors=None,
+    poll_every=256,
+    **options,
+):
+    """Train ``agent`` with ``workers`` Hogwild worker processes.
+
+    Parameters
+    ----------
+    agent: Agent
+        Agent to train. ``agent.Q`` is updated in place from the shared
+        table at every greedy check and when training ends.
+    F: np.ndarray
+        Feasibility matrix.
+    max_epochs: int
+        Total number of episodes, divided over the workers.
+    workers: int | None
+        Number of worker processes (default: one per CPU).
+    seed: int | None
+        Root seed of the per-worker RNG streams.
+    episode_callback: callable | None
+        Called in the parent with the metrics of every episode, in the
+        order they arrive.
+    greedy_check_every: int | None
+        Every this many episodes (over all workers) walk greedily from
+        ``start`` on the shared table and stop every worker once the walk
+        reaches the goal.
+    min_epsilon: float
+        Exploration floor of the first worker.
+    floors: sequence[float] | None
+        Explicit exploration floor per worker; overrides
+        :func:`exploration_floors`.
+    poll_every: int
+        Workers check for a stop request at every episode start and every
+        this many steps.
+    **options:
+        Further keyword arguments for ``Agent.train`` in every worker, e.g.
+        ``q_tolerance``, ``planning`` or ``update_rule``. Q-tolerance and
+        policy criteria apply per worker.
+
+    Returns
+    -------
+    dict
+        ``{"reason": ..., "episodes": ..., "worker_episodes": [...]}``.
+        ``reason`` is ``"greedy_solved"`` when the coordinator stopped the
+        run, otherwise the reason of the worker that finished last.
+    """
+
+    workers = default_worker_count() if workers is None else workers
+    if workers <= 0:
+        raise ValueError("workers must be positive")
+    workers = min(workers, max_epochs)
+    floors = exploration_floors(workers, min_epsilon) if floors is None else np.asarray(floors, dtype=float)
+    if floors.size != workers:
+        raise ValueError(f"Expected {workers} exploration floors, got {floors.size}")
+    shares = [max_epochs // workers + (index < max_epochs % workers) for index in range(workers)]
+    seeds = [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(workers)]
+
+    buffers = SharedTrainingBuffers(agent.n_states, 1)
+    buffers.Q[...] = agent.Q
+    # Workers get everything but Q, which they attach to by name.
+    worker_agent = copy.copy(agent)
+    worker_agent.Q = None
+
+    context = multiprocessing.get_context("spawn")
+    stop_event = context.Event()
+    results = context.Queue()
+    processes = [
+        context.Process(
+            target=_worker,
+            args=(
+                index,
+                worker_agent,
+                F,
+                buffers.name,
+                shares[index],
+                seeds[index],
+                {**options, "min_epsilon": float(floors[index])},
+                stop_event,
+                results,
+                poll_every,
+            ),
+            daemon=True,
+        )
+        for index in range(workers)
+    ]
+
+    neighbors = neighbor_lists(F) if greedy_check_every else None
+    worker_episodes = [0] * workers
+    reason = "max_epochs"
+    finished = 0
+    try:
+        for process in processes:
+            process.start()
+        while finished < workers:
+            try:
+                kind, index, payload = results.get(timeout=1.0)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    raise RuntimeError("Parallel training workers exited without reporting")
+                continue
+            if kind == "done":
+                finished += 1
+                if not stop_event.is_set():
+                    reason = payload["reason"]
+                continue
+
+            worker_episodes[index] += 1
+            if episode_callback is not None:
+                episode_callback(payload)
+            total = sum(worker_episodes)
+            if greedy_check_every and not stop_event.is_set() and total % greedy_check_every == 0:
+                agent.Q[...] = buffers.Q
+                if agent.greedy_path(neighbors) is not None:
+                    reason = "greedy_solved"
+                    stop_event.set()
+    finally:
+        stop_event.set()
+        for process in processes:
+            # A worker only exits once its queued messages are read.
+            while process.is_alive():
+                _discard(results)
+                process.join(0.1)
+        agent.Q[...] = buffers.Q
+        buffers.close()
+
+    return {"reason": reason, "episodes": sum(worker_episodes), "worker_episodes": worker_episodes}
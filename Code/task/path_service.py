@@ -0,0 +1,268 @@
+"""Shortest-path queries for arbitrary (start, goal) pairs in one loaded maze.
+
+All shortest paths to one goal form a tree, so the service computes, per
+goal, a next-hop array (one breadth-first search from the goal) and keeps
+the most recently used goals in a bounded LRU cache. Every start then
+shares the cached tree: a path is read off by following next hops and its
+length is a single array lookup.
+
+A small HTTP front end lets many clients query one service concurrently::
+
+    python path_service.py --size 50 50 --seed 1 --port 8765
+    curl 'http://127.0.0.1:8765/path?start=0&goal=2499'
+    curl 'http://127.0.0.1:8765/path?start=0,0&goal=49,49'
+    curl -d '{"pairs": [[0, 2499], [10, 2499]]}' http://127.0.0.1:8765/paths
+    curl http://127.0.0.1:8765/stats
+"""
+
+import argparse
+import json
+import threading
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from cli import seed_everything
+from convert import Feasibility, as_matrix, neighbor_lists
+from maze import Maze
+
+
+class PathService:
+    """Answer path and distance queries with an LRU cache of next-hop trees.
+
+    Parameters
+    ----------
+    F: np.ndarray
+        Feasibility matrix of the maze.
+    cache_size: int
+        Maximum number of goals whose next-hop trees are kept.
+    numbered_grid: np.ndarray | None
+        ``Feasibility.numbered_grid``; enables ``(x, y)`` cell coordinates.
+    """
+
+    def __init__(self, F, cache_size: int = 64, numbered_grid=None):
+        if cache_size <= 0:
+            raise ValueError("cache_size must be positive")
+        F = as_matrix(F)
+        self.n_states = F.shape[0]
+        # Moves that lead *into* a state, i.e. the edges a search from the goal follows backwards.
+        self.predecessors = neighbor_lists(F.T)
+        self.cache_size = cache_size
+        self.numbered_grid = numbered_grid
+        self.hits = 0
+        self.misses = 0
+        # Bumped by every update_edge; a tree built across a change is not cached.
+        self.generation = 0
+        self._trees = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_feasibility(cls, feasibility, cache_size: int = 64):
+        return cls(feasibility.F_matrix, cache_size, feasibility.numbered_grid)
+
+    def state_id(self, cell) -> int:
+        """Return the state ID for a state ID or an ``(x, y)`` cell."""
+
+        if isinstance(cell, (tuple, list)):
+            if self.numbered_grid is None:
+                raise ValueError("Cell coordinates need a numbered grid")
+            x, y = cell
+            if not (0 <= x < self.numbered_grid.shape[0] and 0 <= y < self.numbered_grid.shape[1]):
+                raise ValueError(f"Cell {cell} is outside the maze")
+            return int(self.numbered_grid[x, y])
+        state = int(cell)
+        if not 0 <= state < self.n_states:
+            raise ValueError(f"State {state} is outside the maze")
+        return state
+
+    def tree(self, goal: int):
+        """Return ``(next_hop, distance)`` arrays for ``goal`` (cached).
+
+        ``next_hop[s]`` is the next state on a shortest path from ``s`` to
+        the goal and ``distance[s]`` its number of moves; both are -1 when
+        the goal cannot be reached from ``s``.
+        """
+
+        with self._lock:
+            tree = self._trees.get(goal)
+            if tree is not None:
+                self._trees.move_to_end(goal)
+                self.hits += 1
+                return tree
+            self.misses += 1
+            generation = self.generation
+
+        tree = self._build_tree(goal)
+        with self._lock:
+            if generation != self.generation:
+                # The maze changed during the search; answer this query but do not keep the tree.
+                return tree
+            self._trees[goal] = tree
+            self._trees.move_to_end(goal)
+            while len(self._trees) > self.cache_size:
+                self._trees.popitem(last=False)
+        return tree
+
+    def _build_tree(self, goal: int):
+        next_hop = np.full(self.n_states, -1, dtype=np.int64)
+        distance = np.full(self.n_states, -1, dtype=np.int64)
+        next_hop[goal] = goal
+        distance[goal] = 0
+        frontier = deque([goal])
+        while frontier:
+            state = frontier.popleft()
+            for previous in self.predecessors[state].tolist():
+                if distance[previous] < 0:
+                    distance[previous] = distance[state] + 1
+                    next_hop[previous] = state
+                    frontier.append(previous)
+        next_hop.setflags(write=False)
+        distance.setflags(write=False)
+        return next_hop, distance
+
+    def update_edge(self, u: int, v: int, feasible: bool):
+        """Add or remove the move ``u -> v`` and drop the cached trees it changes.
+
+        Removing a move only affects goals whose route from ``u`` used it;
+        adding one only affects goals it brings closer to ``u``.
+        """
+
+        with self._lock:
+            self.generation += 1
+            if feasible:
+                self.predecessors[v] = np.union1d(self.predecessors[v], [u])
+            else:
+                self.predecessors[v] = self.predecessors[v][self.predecessors[v] != u]
+            for goal, (next_hop, distance) in list(self._trees.items()):
+                if feasible:
+                    stale = distance[v] >= 0 and (distance[u] < 0 or distance[u] > distance[v] + 1)
+                else:
+                    stale = next_hop[u] == v and u != goal
+                if stale:
+                    del self._trees[goal]
+
+    def distance(self, start, goal) -> int | None:
+        start, goal = self.state_id(start), self.state_id(goal)
+        length = int(self.tree(goal)[1][start])
+        return None if length < 0 else length
+
+    def path(self, start, goal) -> list[int] | None:
+        """States on a shortest path from ``start`` to ``goal``, or None."""
+
+        start, goal = self.state_id(start), self.state_id(goal)
+        next_hop, distance = self.tree(goal)
+        if distance[start] < 0:
+            return None
+        path = [start]
+        while path[-1] != goal:
+            path.append(int(next_hop[path[-1]]))
+        return path
+
+    def query(self, start, goal) -> dict:
+        start, goal = self.state_id(start), self.state_id(goal)
+        path = self.path(start, goal)
+        return {"start": start, "goal": goal, "path": path, "length": None if path is None else len(path) - 1}
+
+    def query_many(self, pairs) -> list[dict]:
+        """Answer many ``(start, goal)`` pairs, building each goal's tree once."""
+
+        pairs = [(self.state_id(start), self.state_id(goal)) for start, goal in pairs]
+        for goal in dict.fromkeys(goal for _, goal in pairs):
+            self.tree(goal)
+        return [self.query(start, goal) for start, goal in pairs]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "cached_goals": len(self._trees),
+                "cache_size": self.cache_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def _parse_cell(raw: str):
+    parts = raw.split(",")
+    if len(parts) == 2:
+        return [int(parts[0]), int(parts[1])]
+    return int(raw)
+
+
+def make_handler(service: PathService):
+    """Create a request handler class bound to ``service``."""
+
+    class PathRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/stats":
+                self._send(200, service.stats())
+                return
+            if url.path != "/path":
+                self._send(404, {"error": f"Unknown endpoint {url.path}"})
+                return
+            params = parse_qs(url.query)
+            try:
+                start = _parse_cell(params["start"][0])
+                goal = _parse_cell(params["goal"][0])
+                self._send(200, service.query(start, goal))
+            except (KeyError, ValueError) as error:
+                self._send(400, {"error": str(error)})
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/paths":
+                self._send(404, {"error": f"Unknown endpoint {self.path}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                self._send(200, {"results": service.query_many(body["pairs"])})
+            except (KeyError, TypeError, ValueError) as error:
+                self._send(400, {"error": str(error)})
+
+        def _send(self, status, payload):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return PathRequestHandler
+
+
+def make_server(service: PathService, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """Create (but do not start) a threaded HTTP server for ``service``."""
+
+    return ThreadingHTTPServer((host, port), make_handler(service))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve shortest-path queries for one random maze over HTTP.")
+    parser.add_argument("--size", nargs=2, type=int, default=[20, 20], metavar=("NX", "NY"), help="Maze dimensions.")
+    parser.add_argument("--start", nargs=2, type=int, default=[0, 0], metavar=("X", "Y"), help="Maze start cell.")
+    parser.add_argument("--seed", type=int, help="Seed for maze generation.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on.")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on.")
+    parser.add_argument("--cache-size", type=int, default=64, help="Number of goals whose path trees are cached.")
+    args = parser.parse_args(argv)
+
+    seed_everything(args.seed)
+    maze = Maze(args.size[0], args.size[1], list(args.start))
+    service = PathService.from_feasibility(Feasibility(maze), args.cache_size)
+    server = make_server(service, args.host, args.port)
+    print(f"Serving paths for a {args.size[0]}x{args.size[1]} maze on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
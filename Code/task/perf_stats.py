@@ -0,0 +1,143 @@
+"""Frame timing and throughput counters for the live viewer.
+
+:class:`ViewerStats` splits every frame of ``LiveMazeViewer.run`` into
+:data:`PHASES` and keeps the most recent frames in fixed-size windows, next
+to the depth of the state and metrics queues and the number of training
+states consumed. The viewer draws :meth:`ViewerStats.hud_lines` as an
+overlay (key ``p``), and every ``log_interval`` seconds a snapshot is
+appended to a JSON-lines file, so a slow setup can be tuned from data.
+"""
+
+import json
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+# Parts of one frame, in the order the render loop runs them.
+PHASES = ("drain", "scale", "blit", "flip")
+
+
+class ViewerStats:
+    """Rolling per-frame statistics of the render loop.
+
+    Parameters
+    ----------
+    window: int
+        Number of recent frames the averages are taken over.
+    log_path: Path | str | None
+        JSON-lines file that receives a :meth:`snapshot` every
+        ``log_interval`` seconds (None disables logging).
+    log_interval: float
+        Seconds between two logged snapshots.
+    clock: callable
+        Time source in seconds; replaceable in tests.
+    """
+
+    def __init__(self, window: int = 120, log_path=None, log_interval: float = 5.0, clock=time.perf_counter):
+        self.window = window
+        self.log_path = Path(log_path) if log_path is not None else None
+        self.log_interval = log_interval
+        self.clock = clock
+        self.frames = 0
+        self.states_total = 0
+        self.snapshots_logged = 0
+        self._phases = {phase: deque(maxlen=window) for phase in PHASES}
+        self._frame_seconds = deque(maxlen=window)
+        self._frame_ends = deque(maxlen=window + 1)
+        self._states = deque(maxlen=window)
+        self._update_depth = 0
+        self._metrics_depth = 0
+        self._current = dict.fromkeys(PHASES, 0.0)
+        self._frame_start = None
+        self._mark = None
+        self._next_log = None
+        if self.log_path is not None:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def begin_frame(self):
+        now = self.clock()
+        self._frame_start = self._mark = now
+        self._current = dict.fromkeys(PHASES, 0.0)
+        if self._next_log is None:
+            self._next_log = now + self.log_interval
+            self._frame_ends.append(now)
+
+    def mark(self, phase: str):
+        """Charge the time since the previous mark to ``phase`` (ignored outside a frame)."""
+
+        if self._mark is None:
+            return
+        now = self.clock()
+        self._current[phase] += now - self._mark
+        self._mark = now
+
+    def end_frame(self, states: int, update_depth: int, metrics_depth: int):
+        """Close the frame.
+
+        Parameters
+        ----------
+        states: int
+            Training states consumed by this frame (including updates a
+            bounded queue dropped since the previous frame).
+        update_depth, metrics_depth: int
+            Pending items in the state and metrics queues.
+        """
+
+        now = self.clock()
+        for phase, seconds in self._current.items():
+            self._phases[phase].append(seconds)
+        self._frame_seconds.append(now - self._frame_start)
+        self._frame_ends.append(now)
+        self._states.append(states)
+        self.states_total += states
+        self._update_depth = update_depth
+        self._metrics_depth = metrics_depth
+        self._mark = None
+        self.frames += 1
+        if self.log_path is not None and now >= self._next_log:
+            self._next_log = now + self.log_interval
+            self.write_snapshot()
+
+    def snapshot(self) -> dict:
+        """Averages over the last ``window`` frames, times in milliseconds."""
+
+        span = self._frame_ends[-1] - self._frame_ends[0] if len(self._frame_ends) > 1 else 0.0
+        snapshot = {"frames": self.frames}
+        for phase in PHASES:
+            snapshot[f"{phase}_ms"] = _mean_ms(self._phases[phase])
+        snapshot["frame_ms"] = _mean_ms(self._frame_seconds)
+        snapshot["fps"] = len(self._frame_seconds) / span if span > 0 else 0.0
+        snapshot["update_queue"] = self._update_depth
+        snapshot["metrics_queue"] = self._metrics_depth
+        snapshot["states_per_frame"] = float(np.mean(self._states)) if self._states else 0.0
+        snapshot["steps_per_second"] = sum(self._states) / span if span > 0 else 0.0
+        snapshot["states_total"] = self.states_total
+        return snapshot
+
+    def write_snapshot(self):
+        if self.log_path is None:
+            return
+        record = {"time": time.time(), **self.snapshot()}
+        with self.log_path.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record))
+            handle.write("\n")
+        self.snapshots_logged += 1
+
+    def hud_lines(self) -> list:
+        """Text lines of the on-screen overlay."""
+
+        snapshot = self.snapshot()
+        phases = " ".join(f"{phase} {snapshot[f'{phase}_ms']:.1f}" for phase in PHASES)
+        return [
+            f"frame {snapshot['frame_ms']:.1f} ms  {snapshot['fps']:.0f} fps",
+            phases,
+            f"queues: states {snapshot['update_queue']}  metrics {snapshot['metrics_queue']}",
+            f"states/frame {snapshot['states_per_frame']:.0f}",
+            f"training {snapshot['steps_per_second']:,.0f} steps/s",
+        ]
+
+
+def _mean_ms(values) -> float:
+    return 1000.0 * float(np.mean(values)) if values else 0.0
@@ -0,0 +1,161 @@
+"""Model-based planning updates that run alongside ``Agent.train``.
+
+The maze model is known exactly: taking action ``a`` in state ``s`` moves
+the agent to state ``a`` and yields ``R[s, a]``. Planners use that model to
+apply extra Bellman backups between real steps:
+
+``"dyna"``
+    Dyna-Q: after every real step, replay ``steps`` transitions sampled
+    uniformly from the (state, action) pairs seen so far.
+``"prioritized"``
+    Prioritized sweeping: keep a priority queue of (state, action) pairs
+    keyed by their Bellman error, starting from the transitions into the
+    goal, and after every real step back up the ``steps`` most urgent pairs,
+    queueing the predecessors of every updated state.
+
+Both planners report which states they updated so the caller can keep its
+convergence bookkeeping exact.
+"""
+
+import heapq
+
+import numpy as np
+
+from convert import as_matrix, neighbor_lists
+
+PLANNING_MODES = ("none", "dyna", "prioritized")
+
+
+def bellman_target(agent, neighbors, state, action) -> float:
+    """Return ``R[s, a] + gamma * max Q[a, :]`` over the feasible actions of ``a``."""
+
+    next_actions = neighbors[action]
+    max_q = float(agent.Q[action, next_actions].max()) if next_actions.size else 0.0
+    gamma = agent.gamma if agent.discounts is None else agent.discounts[state, action]
+    return float(agent.R[state, action]) + gamma * max_q
+
+
+def backup(agent, neighbors, state, action) -> float:
+    """Apply one Q-learning backup to ``(state, action)`` and return ``|dQ|``."""
+
+    old_q = agent.Q[state, action]
+    agent.Q[state, action] = (1 - agent.lrn_rate) * old_q + agent.lrn_rate * bellman_target(
+        agent, neighbors, state, action
+    )
+    return abs(float(agent.Q[state, action] - old_q))
+
+
+class DynaPlanner:
+    """Replay uniformly sampled, previously observed transitions.
+
+    Parameters
+    ----------
+    agent: Agent
+        Agent whose ``Q`` is updated in place.
+    neighbors: list[np.ndarray]
+        Feasible actions per state, see :func:`convert.neighbor_lists`.
+    steps: int
+        Planning backups per real step.
+    rng: np.random.Generator
+        Source of the replay samples.
+    """
+
+    def __init__(self, agent, neighbors, steps: int, rng: np.random.Generator):
+        self.agent = agent
+        self.neighbors = neighbors
+        self.steps = steps
+        self.rng = rng
+        self._seen = set()
+        self._states = []
+        self._actions = []
+
+    def observe(self, state: int, action: int):
+        """Record a real transition and replay ``steps`` transitions.
+
+        Returns ``(max_delta, updated_states)``.
+        """
+
+        if (state, action) not in self._seen:
+            self._seen.add((state, action))
+            self._states.append(state)
+            self._actions.append(action)
+
+        max_delta = 0.0
+        samples = self.rng.integers(0, len(self._states), size=self.steps)
+        for index in samples.tolist():
+            delta = backup(self.agent, self.neighbors, self._states[index], self._actions[index])
+            max_delta = max(max_delta, delta)
+        return max_delta, [self._states[index] for index in samples.tolist()]
+
+
+class PrioritizedSweepingPlanner:
+    """Back up the transitions with the largest Bellman error first.
+
+    Parameters
+    ----------
+    agent: Agent
+        Agent whose ``Q`` is updated in place.
+    neighbors: list[np.ndarray]
+        Feasible actions per state.
+    predecessors: list[np.ndarray]
+        States from which each state can be reached (``neighbor_lists(F.T)``).
+    steps: int
+        Planning backups per real step.
+    theta: float
+        Minimum Bellman error for a pair to be queued.
+    """
+
+    def __init__(self, agent, neighbors, predecessors, steps: int, theta: float = 1e-4):
+        self.agent = agent
+        self.neighbors = neighbors
+        self.predecessors = predecessors
+        self.steps = steps
+        self.theta = theta
+        self._heap = []
+        self._priority = {}
+        for state in predecessors[int(agent.goal)].tolist():
+            self._push(state, int(agent.goal))
+
+    def _push(self, state: int, action: int):
+        error = abs(bellman_target(self.agent, self.neighbors, state, action) - float(self.agent.Q[state, action]))
+        if error <= self.theta or error <= self._priority.get((state, action), 0.0):
+            return
+        # Stale heap entries are skipped when popped; _priority holds the live value.
+        self._priority[(state, action)] = error
+        heapq.heappush(self._heap, (-error, state, action))
+
+    def observe(self, state: int, action: int):
+        """Queue the real transition's predecessors and run planning backups.
+
+        The real step itself was already backed up by the caller. Returns
+        ``(max_delta, updated_states)``.
+        """
+
+        for predecessor in self.predecessors[state].tolist():
+            self._push(predecessor, state)
+
+        max_delta = 0.0
+        updated = []
+        while self._heap and len(updated) < self.steps:
+            neg_error, s, a = heapq.heappop(self._heap)
+            if self._priority.get((s, a)) != -neg_error:
+                continue
+            del self._priority[(s, a)]
+            max_delta = max(max_delta, backup(self.agent, self.neighbors, s, a))
+            updated.append(s)
+            for predecessor in self.predecessors[s].tolist():
+                self._push(predecessor, s)
+        return max_delta, updated
+
+
+def make_planner(mode, agent, neighbors, F, steps: int):
+    """Create the planner for ``mode`` or return None for ``"none"``."""
+
+    if mode in (None, "none"):
+        return None
+    if mode == "dyna":
+        # Seed from the global NumPy RNG so seeded runs stay reproducible.
+        return DynaPlanner(agent, neighbors, steps, np.random.default_rng(np.random.randint(0, 2**31 - 1)))
+    if mode == "prioritized":
+        return PrioritizedSweepingPlanner(agent, neighbors, neighbor_lists(as_matrix(F).T), steps)
+    raise ValueError(f"Unknown planning mode {mode!r}; expected one of {PLANNING_MODES}")
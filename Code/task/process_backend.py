@@ -0,0 +1,394 @@
+"""Run ``Agent.train`` in a separate process next to a live viewer.
+
+With the thread backend the pure-Python training loop and the Pygame render
+loop share one interpreter and fight over the GIL. The process backend
+moves training into a child process instead:
+
+* ``Q``, per-state visit counts and a ring buffer of recent states live in
+  :mod:`multiprocessing.shared_memory`. The parent's ``agent.Q`` is a view
+  of the shared block, so viewers read it without copying.
+* :class:`SharedStateSource` turns the visit counts and the ring into the
+  same :class:`render_queue.CoalescedUpdate` items a coalescing render queue
+  produces, so ``LiveMazeViewer`` can drain it instead of its own queue.
+* Control messages (pause, resume, reset, stop) go to the child over one
+  pipe; episode metrics and the final result come back over another.
+
+The child is started with the ``spawn`` method so it never inherits the
+parent's Pygame state.
+"""
+
+import copy
+import multiprocessing
+import threading
+from collections import Counter
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from callback_protocol import RESET_SIGNAL
+from render_queue import CoalescedUpdate
+
+BACKENDS = ("thread", "process")
+
+# Header slots of the shared block.
+_WRITE_COUNT = 0
+_GENERATION = 1
+_HEADER_SLOTS = 4
+# Ring entry marking the start of an episode.
+_RING_RESET = -1
+
+
+class SharedTrainingBuffers:
+    """``Q``, visit counts and a ring of recent states in one shared block.
+
+    Parameters
+    ----------
+    n_states: int
+        Number of states of the maze.
+    ring_capacity: int
+        Number of recent states kept in the ring buffer.
+    name: str | None
+        Name of an existing block to attach to; None creates a new block.
+    """
+
+    def __init__(self, n_states: int, ring_capacity: int = 4096, name: str | None = None):
+        self.n_states = n_states
+        self.ring_capacity = ring_capacity
+        q_bytes = n_states * n_states * np.dtype(np.float32).itemsize
+        int_slots = _HEADER_SLOTS + n_states + ring_capacity
+        size = q_bytes + int_slots * np.dtype(np.int64).itemsize
+        self.owner = name is None
+        self._shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+
+        buffer = self._shm.buf
+        self.Q = np.ndarray((n_states, n_states), dtype=np.float32, buffer=buffer)
+        ints = np.ndarray((int_slots,), dtype=np.int64, buffer=buffer, offset=q_bytes)
+        self.header = ints[:_HEADER_SLOTS]
+        self.visits = ints[_HEADER_SLOTS : _HEADER_SLOTS + n_states]
+        self.ring = ints[_HEADER_SLOTS + n_states :]
+        if self.owner:
+            self.Q.fill(0.0)
+            ints.fill(0)
+        self.closed = False
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def record(self, state):
+        """Append a state (or ``RESET_SIGNAL``) to the ring and count the visit.
+
+        Only the training process writes, so the write counter is bumped
+        after the entry is in place and readers never see a torn entry.
+        """
+
+        count = int(self.header[_WRITE_COUNT])
+        if state == RESET_SIGNAL:
+            self.ring[count % self.ring_capacity] = _RING_RESET
+        else:
+            self.ring[count % self.ring_capacity] = state
+            self.visits[state] += 1
+        self.header[_WRITE_COUNT] = count + 1
+
+    def reset(self):
+        """Zero ``Q`` and the visit counts and start a new generation."""
+
+        self.Q.fill(0.0)
+        self.visits.fill(0)
+        self.header[_GENERATION] += 1
+
+    def close(self):
+        """Drop the array views and detach; the owner also frees the block."""
+
+        if self.closed:
+            return
+        self.closed = True
+        self.Q = self.header = self.visits = self.ring = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+class SharedStateSource:
+    """Viewer-side reader of :class:`SharedTrainingBuffers`.
+
+    Drop-in replacement for :class:`render_queue.CoalescingStateQueue`:
+    :meth:`drain` returns at most one :class:`CoalescedUpdate` with the
+    visits since the previous call (from the shared counts, so they stay
+    exact) and the most recent state (from the ring). ``dropped`` counts
+    ring entries that were overwritten before they were read.
+    """
+
+    policy = "coalesce"
+
+    def __init__(self, buffers: SharedTrainingBuffers):
+        self.buffers = buffers
+        self.dropped = 0
+        self.coalesced = 0
+        self.closed = False
+        self._read_count = 0
+        self._generation = 0
+        self._seen_visits = np.zeros(buffers.n_states, dtype=np.int64)
+
+    def put(self, state):
+        # States are written by the training process, not through the viewer.
+        self.dropped += 1
+
+    def drain(self) -> list:
+        buffers = self.buffers
+        if self.closed or buffers.closed:
+            return []
+
+        write_count = int(buffers.header[_WRITE_COUNT])
+        visits = buffers.visits.copy()
+        reset = False
+        if int(buffers.header[_GENERATION]) != self._generation:
+            self._generation = int(buffers.header[_GENERATION])
+            self._seen_visits.fill(0)
+            reset = True
+        if write_count == self._read_count and not reset:
+            return []
+
+        first = max(self._read_count, write_count - buffers.ring_capacity)
+        self.dropped += first - self._read_count
+        self._read_count = write_count
+        latest_state = None
+        if write_count > first:
+            recent = buffers.ring[np.arange(first, write_count) % buffers.ring_capacity]
+            reset = reset or bool((recent == _RING_RESET).any())
+            if recent[-1] != _RING_RESET:
+                latest_state = int(recent[-1])
+
+        changed = np.flatnonzero(visits > self._seen_visits)
+        delta = visits[changed] - self._seen_visits[changed]
+        self._seen_visits = visits
+        self.coalesced += max(0, int(delta.sum()) - 1)
+        return [CoalescedUpdate(Counter(dict(zip(changed.tolist(), delta.tolist()))), latest_state, reset)]
+
+    def qsize(self) -> int:
+        if self.buffers.closed:
+            return 0
+        return int(self.buffers.header[_WRITE_COUNT]) - self._read_count
+
+    def close(self):
+        self.closed = True
+
+
+class _Restart(Exception):
+    pass
+
+
+class _Stop(Exception):
+    pass
+
+
+def _training_process(args, agent, feasibility, name, ring_capacity, control, events, poll_every):
+    # Imported in the child only; cli pulls in the whole training stack.
+    from cli import seed_everything, train_agent
+
+    buffers = SharedTrainingBuffers(agent.n_states, ring_capacity, name=name)
+    agent.Q = buffers.Q
+    seed_everything(args.seed)
+    steps = 0
+
+    def handle(message):
+        if message == "stop":
+            raise _Stop
+        if message == "reset":
+            raise _Restart
+        if message == "pause":
+            while True:
+                message = control.recv()
+                if message == "resume":
+                    return
+                if message != "pause":
+                    handle(message)
+
+    def state_callback(state):
+        nonlocal steps
+        buffers.record(state)
+        steps += 1
+        if (state == RESET_SIGNAL or steps % poll_every == 0) and control.poll():
+            handle(control.recv())
+
+    def episode_callback(metrics):
+        events.send(("metrics", metrics))
+
+    try:
+        while True:
+            try:
+                stop = train_agent(
+                    args,
+                    agent,
+                    feasibility,
+                    state_callback=state_callback,
+                    episode_callback=episode_callback,
+                )
+                break
+            except _Restart:
+                buffers.reset()
+                events.send(("reset", None))
+    except _Stop:
+        stop = {"reason": "stopped", "episodes": None}
+    events.send(("done", stop))
+    events.close()
+    agent.Q = None
+    buffers.close()
+
+
+class ProcessTrainer:
+    """Train ``agent`` in a child process while the parent renders.
+
+    After construction ``agent.Q`` is a view of the shared ``Q``; the child
+    trains into it with :func:`cli.train_agent`, so every option of the
+    shared command line (planning, ``--reduce``, ...) is supported.
+
+    Parameters
+    ----------
+    args: argparse.Namespace
+        Parsed options of the shared command line (see :mod:`cli`).
+    agent: Agent
+        Agent to train; its ``Q`` is moved into shared memory.
+    feasibility: Feasibility
+        Feasibility of the maze.
+    episode_callback: callable | None
+        Called in the parent, from a listener thread, with the metrics of
+        every episode the child finishes.
+    ring_capacity: int
+        Number of recent states kept for the viewer.
+    poll_every: int
+        The child checks the control pipe at every episode start and every
+        this many steps.
+    """
+
+    def __init__(self, args, agent, feasibility, episode_callback=None, ring_capacity: int = 4096, poll_every: int = 256):
+        self.args = args
+        self.agent = agent
+        self.feasibility = feasibility
+        self.episode_callback = episode_callback
+        self.poll_every = poll_every
+        self.buffers = SharedTrainingBuffers(agent.n_states, ring_capacity)
+        self.buffers.Q[...] = agent.Q
+        agent.Q = self.buffers.Q
+        self.state_source = SharedStateSource(self.buffers)
+        self.done = threading.Event()
+        self.paused = False
+        self.result = None
+        self.episodes = 0
+        self._process = None
+        self._listener = None
+        self._control = None
+
+    def start(self):
+        context = multiprocessing.get_context("spawn")
+        control_reader, self._control = context.Pipe(duplex=False)
+        events, event_writer = context.Pipe(duplex=False)
+        # The child gets everything but Q, which it attaches to by name.
+        child_agent = copy.copy(self.agent)
+        child_agent.Q = None
+        self._process = context.Process(
+            target=_training_process,
+            args=(
+                self.args,
+                child_agent,
+                self.feasibility,
+                self.buffers.name,
+                self.buffers.ring_capacity,
+                control_reader,
+                event_writer,
+                self.poll_every,
+            ),
+            # Not a daemon, so --engine parallel can start its own workers.
+            daemon=False,
+        )
+        self._process.start()
+        control_reader.close()
+        event_writer.close()
+        self._listener = threading.Thread(target=self._listen, args=(events,), daemon=True)
+        self._listener.start()
+
+    def _listen(self, events):
+        try:
+            while True:
+                kind, payload = events.recv()
+                if kind == "metrics":
+                    self.episodes += 1
+                    if self.episode_callback is not None:
+                        self.episode_callback(payload)
+                elif kind == "reset":
+                    self.episodes = 0
+                elif kind == "done":
+                    self.result = payload
+                    if self.result.get("episodes") is None:
+                        self.result["episodes"] = self.episodes
+                    break
+        except EOFError:
+            self.result = {"reason": "crashed", "episodes": self.episodes}
+        finally:
+            events.close()
+            self.done.set()
+
+    def _send(self, message: str):
+        if self._control is not None and not self.done.is_set():
+            try:
+                self._control.send(message)
+            except (BrokenPipeError, OSError):
+                pass
+
+    def pause(self):
+        if not self.paused:
+            self.paused = True
+            self._send("pause")
+
+    def resume(self):
+        if self.paused:
+            self.paused = False
+            self._send("resume")
+
+    def toggle_pause(self):
+        if self.paused:
+            self.resume()
+        else:
+            self.pause()
+
+    def reset(self):
+        """Restart training from a zero ``Q`` (also resumes a paused run)."""
+
+        self.paused = False
+        self._send("reset")
+
+    def stop(self):
+        self.paused = False
+        self._send("stop")
+
+    def join(self, timeout=None):
+        """Wait for training to finish and return ``Agent.train``'s result.
+
+        The result is ``{"reason": "stopped", ...}`` after :meth:`stop` and
+        ``{"reason": "crashed", ...}`` if the child died.
+        """
+
+        self.done.wait(timeout)
+        if self._process is not None:
+            self._process.join(timeout)
+        return self.result
+
+    def run(self):
+        """Start training and wait for it; returns :meth:`join`'s result."""
+
+        self.start()
+        return self.join()
+
+    def close(self):
+        """Stop the child, copy ``Q`` back into ``agent`` and free the shared block.
+
+        Call this once nothing (e.g. a viewer) reads the shared arrays anymore.
+        """
+
+        if self.buffers.closed:
+            return
+        self.stop()
+        self.join()
+        self.agent.Q = np.array(self.buffers.Q)
+        self.state_source.close()
+        self.buffers.close()
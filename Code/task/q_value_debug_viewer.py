@@ -4,19 +4,37 @@ import threading
 
 import numpy as np
 import pygame
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 
-from convert import Feasibility
-from draw import cell_side, draw_image, line_thickness, margin
-from learn import Agent
-from live_training_viewer import prompt_for_value
-from maze import Maze
+from cli import build_parser, build_problem, resolve_run_arguments, train_agent
+from convert import feasible_edges
+from draw import cell_side, draw_image, line_thickness, load_font, margin
+from process_backend import BACKENDS, ProcessTrainer
 
 
 class QValueDebugViewer:
-    """Render a maze annotated with live-updating per-cell Q-values."""
-
-    def __init__(self, maze, feasibility, agent, title: str = "Q-value debug viewer"):
+    """Render a maze as a live-updating heatmap of per-cell max Q-values.
+
+    The masked maximum over feasible actions is computed for all states at
+    once. Text labels are only drawn when cells are large enough on screen to
+    read them, and the frame is only recomposed when the values (or the label
+    visibility) change. Large mazes are drawn at a reduced cell size so the
+    image stays within ``max_image_size`` pixels.
+    """
+
+    heat_low = np.array([235, 242, 255], dtype=np.float32)
+    heat_high = np.array([255, 120, 40], dtype=np.float32)
+
+    def __init__(
+        self,
+        maze,
+        feasibility,
+        agent,
+        title: str = "Q-value debug viewer",
+        max_image_size: int = 2400,
+        label_min_pixels: int = 40,
+        max_labels: int = 2500,
+    ):
         self.maze = maze
         self.feasibility = feasibility
         self.agent = agent
@@ -32,34 +50,143 @@ class QValueDebugViewer:
         self.base_height = None
         self.maze_width = None
         self.maze_height = None
+        self.label_min_pixels = label_min_pixels
+        self.max_labels = max_labels
+
+        nx, ny = self.maze.maze_grid.shape
+        if margin + cell_side * max(nx, ny) <= max_image_size:
+            self.cell_px = cell_side
+            self.grid_origin = margin + line_thickness - cell_side // 2
+        else:
+            self.cell_px = max(2, (max_image_size - 2 * line_thickness) // max(nx, ny))
+            self.grid_origin = line_thickness
+
+        # Feasible (state, next_state) pairs grouped by state, computed once.
+        rows, cols = feasible_edges(self.feasibility.F_matrix)
+        self._edge_rows = rows
+        self._edge_cols = cols
+        self._row_starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]]) if rows.size else rows
+        self._last_values = None
+        self._labels_shown = None
 
         self._init_display()
 
     def _init_display(self):
         pygame.init()
-        self.maze_width, self.maze_height = (
-            margin + cell_side * dim for dim in self.maze.maze_grid.shape
-        )
+        nx, ny = self.maze.maze_grid.shape
+        if self.cell_px == cell_side:
+            self.maze_width, self.maze_height = (margin + cell_side * dim for dim in (nx, ny))
+        else:
+            self.maze_width = 2 * self.grid_origin + self.cell_px * nx
+            self.maze_height = 2 * self.grid_origin + self.cell_px * ny
         self.base_width = self.maze_width
         self.base_height = self.maze_height
         self.screen = pygame.display.set_mode((self.base_width, self.base_height))
         pygame.display.set_caption(self.title)
         self.clock = pygame.time.Clock()
         self.base_image = self._render_base_image()
+        self._base_array = np.asarray(self.base_image, dtype=np.uint16)
         self.background = self._compose_frame()
 
     def _render_base_image(self):
+        if self.cell_px != cell_side:
+            return self._render_compact_base_image()
+
         img = Image.new("RGB", (self.base_width, self.base_height), (255, 255, 255))
         drawer = ImageDraw.Draw(img)
         draw_image(drawer, self.maze.maze_grid)
         self._highlight_start_and_end(drawer)
         return img
 
-    def _compose_frame(self):
-        img = self.base_image.copy()
-        drawer = ImageDraw.Draw(img)
-        self._annotate_q_values(drawer)
-        return pygame.image.fromstring(img.tobytes(), img.size, img.mode)
+    def _render_compact_base_image(self):
+        """Draw walls straight into an array for mazes too large for draw_image."""
+
+        nx, ny = self.maze.maze_grid.shape
+        size, origin = self.cell_px, self.grid_origin
+        pixels = np.full((self.base_height, self.base_width, 3), 255, dtype=np.uint8)
+
+        for cell, color in (
+            (self._find_cell_with_status("Start"), (0, 255, 0)),
+            (self._find_cell_with_status("End"), (255, 0, 0)),
+        ):
+            if cell is not None:
+                left, top = origin + cell.x * size, origin + cell.y * size
+                pixels[top : top + size, left : left + size] = color
+
+        walls_s = np.array([[cell.walls["S"] for cell in column] for column in self.maze.maze_grid])
+        walls_e = np.array([[cell.walls["E"] for cell in column] for column in self.maze.maze_grid])
+        offsets = np.arange(size + 1)
+
+        xs, ys = np.nonzero(walls_s)
+        rows = origin + (ys + 1) * size
+        cols = (origin + xs * size)[:, None] + offsets
+        pixels[np.minimum(rows, self.base_height - 1)[:, None], np.minimum(cols, self.base_width - 1)] = 0
+
+        xs, ys = np.nonzero(walls_e)
+        cols = origin + (xs + 1) * size
+        rows = (origin + ys * size)[:, None] + offsets
+        pixels[np.minimum(rows, self.base_height - 1), np.minimum(cols, self.base_width - 1)[:, None]] = 0
+
+        # Outer north and west borders (cells on those edges always keep them).
+        pixels[origin, origin : origin + nx * size + 1] = 0
+        pixels[origin : origin + ny * size + 1, origin] = 0
+        return Image.fromarray(pixels, "RGB")
+
+    def max_q_values(self) -> np.ndarray:
+        """Return the max Q over feasible actions for every state (0 if none)."""
+
+        values = np.zeros(self.feasibility.cells, dtype=np.float32)
+        if self._edge_rows.size:
+            q = np.asarray(self.agent.Q)[self._edge_rows, self._edge_cols]
+            values[self._edge_rows[self._row_starts]] = np.maximum.reduceat(q, self._row_starts)
+        return values
+
+    def _labels_visible(self):
+        return (
+            self.feasibility.cells <= self.max_labels
+            and self.cell_px * self.zoom >= self.label_min_pixels
+        )
+
+    def _heat_colors(self, values: np.ndarray) -> np.ndarray:
+        low, high = float(values.min()), float(values.max())
+        ratio = (values - low) / max(high - low, 1e-9)
+        colors = self.heat_low + ratio[:, None] * (self.heat_high - self.heat_low)
+        return colors.astype(np.uint16)
+
+    def _compose_frame(self, values: np.ndarray | None = None):
+        if values is None:
+            values = self.max_q_values()
+        nx, ny = self.maze.maze_grid.shape
+        size, origin = self.cell_px, self.grid_origin
+
+        # numbered_grid is indexed [x, y]; images are indexed [row=y, col=x].
+        colors = self._heat_colors(values)[self.feasibility.numbered_grid].transpose(1, 0, 2)
+        heat = np.full_like(self._base_array, 255)
+        heat[origin : origin + ny * size, origin : origin + nx * size] = colors.repeat(size, 0).repeat(size, 1)
+        composed = (self._base_array * heat // 255).astype(np.uint8)
+
+        labels_visible = self._labels_visible()
+        if labels_visible:
+            img = Image.fromarray(composed, "RGB")
+            self._annotate_q_values(ImageDraw.Draw(img), values)
+            composed = np.asarray(img)
+
+        self._last_values = values
+        self._labels_shown = labels_visible
+        return pygame.image.frombuffer(composed.tobytes(), (self.base_width, self.base_height), "RGB")
+
+    def _refresh_frame(self):
+        """Recompose the frame only when Q or the label visibility changed."""
+
+        values = self.max_q_values()
+        if (
+            self._last_values is not None
+            and self._labels_shown == self._labels_visible()
+            and np.array_equal(values, self._last_values)
+        ):
+            return False
+        self.background = self._compose_frame(values)
+        return True
 
     def _highlight_start_and_end(self, drawer: ImageDraw.ImageDraw):
         padding = line_thickness
@@ -89,29 +216,15 @@ class QValueDebugViewer:
         return None
 
     def _cell_center(self, cell):
-        x = margin + line_thickness + cell.x * cell_side
-        y = margin + line_thickness + cell.y * cell_side
+        x = self.grid_origin + cell.x * self.cell_px + self.cell_px // 2
+        y = self.grid_origin + cell.y * self.cell_px + self.cell_px // 2
         return int(x), int(y)
 
-    def _annotate_q_values(self, drawer: ImageDraw.ImageDraw):
-        state_to_indices = {
-            int(state): (i, j)
-            for i, row in enumerate(self.feasibility.numbered_grid)
-            for j, state in enumerate(row)
-        }
-
-        for state, (x_idx, y_idx) in state_to_indices.items():
-            cell = self.maze.maze_grid[x_idx, y_idx]
-            center_x, center_y = self._cell_center(cell)
-            q_values = self.agent.Q[state]
-            mask = self.feasibility.F_matrix[state] == 1
-            filtered = q_values[mask]
-            value = float(np.max(filtered)) if filtered.size else 0.0
-            label = f"{value:.1f}"
-            try:
-                font = ImageFont.truetype("Arial Unicode.ttf", 24)
-            except OSError:
-                font = ImageFont.load_default()
+    def _annotate_q_values(self, drawer: ImageDraw.ImageDraw, values: np.ndarray):
+        font = load_font(24)
+        for (x_idx, y_idx), state in np.ndenumerate(self.feasibility.numbered_grid):
+            center_x, center_y = self._cell_center(self.maze.maze_grid[x_idx, y_idx])
+            label = f"{values[state]:.1f}"
             text_box = drawer.textbbox((0, 0), label, font=font)
             text_width = text_box[2] - text_box[0]
             text_height = text_box[3] - text_box[1]
@@ -155,8 +268,9 @@ class QValueDebugViewer:
                     elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
                         self._change_zoom(-0.1)
 
-            # Recompose the frame so Q-values update live as training progresses.
-            self.background = self._compose_frame()
+            # Q-values update live as training progresses; only recompose
+            # the frame when they actually changed.
+            self._refresh_frame()
 
             self._blit_scaled_surface()
             pygame.display.flip()
@@ -168,70 +282,45 @@ class QValueDebugViewer:
         pygame.quit()
 
 
-def train_agent_with_inputs(train_immediately: bool = True):
-    """Configure an agent from user input and optionally start training."""
-
-    dimensions = prompt_for_value(
-        "Enter maze dimensions separated by a space (e.g. 4 4): ",
-        lambda raw: [int(v) for v in raw.split()],
-        lambda vals: len(vals) == 2 and all(v > 0 for v in vals),
-        "Please provide two positive integers separated by a space.",
-    )
-    dimension1, dimension2 = dimensions
+def train_agent_with_inputs(train_immediately: bool = True, argv=None):
+    """Configure an agent from command-line options (prompting for missing
+    values) and optionally start training."""
 
-    start_coords = prompt_for_value(
-        "Enter x and y coordinates of the maze start separated by a space: ",
-        lambda raw: [int(v) for v in raw.split()],
-        lambda vals: len(vals) == 2 and 0 <= vals[0] < dimension1 and 0 <= vals[1] < dimension2,
-        "Start coordinates should be inside the maze. Numbering is zero-based.",
+    parser = build_parser("Train a Q-learning agent and show its Q-values on the maze.", view=False)
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="thread",
+        help="Train in a thread next to the viewer or in a separate process with shared-memory Q.",
     )
-    start_x, start_y = start_coords
-
-    gamma = prompt_for_value(
-        "Enter the gamma value (0, 1]: ",
-        float,
-        lambda val: 0 < val <= 1,
-        "Gamma should be a number between 0 and 1.",
-    )
-
-    lrn_rate = prompt_for_value(
-        "Enter the learning rate value (0, 1]: ",
-        float,
-        lambda val: 0 < val <= 1,
-        "Learning rate should be a number between 0 and 1.",
-    )
-
-    max_epochs = 1000
-
-    maze = Maze(dimension1, dimension2, [start_x, start_y])
-    feasibility = Feasibility(maze)
-    agent = Agent(feasibility, gamma, lrn_rate, maze, start_x, start_y)
+    args = resolve_run_arguments(parser, parser.parse_args(argv))
+    maze, feasibility, agent = build_problem(args)
 
     if train_immediately:
-        agent.train(
-            feasibility.F_matrix,
-            max_epochs,
-            record_episodes=False,
-            record_q_values=False,
-        )
+        train_agent(args, agent, feasibility)
         return maze, feasibility, agent
 
-    return maze, feasibility, agent, max_epochs
+    return maze, feasibility, agent, args
+
 
+def main(argv=None):
+    maze, feasibility, agent, args = train_agent_with_inputs(train_immediately=False, argv=argv)
+    if args.backend == "process":
+        # agent.Q becomes a view of the shared block, so the heatmap reads
+        # the child's updates without copying.
+        trainer = ProcessTrainer(args, agent, feasibility)
+        viewer = QValueDebugViewer(maze, feasibility, agent)
+        trainer.start()
+        viewer.run(completion_event=trainer.done)
+        trainer.close()
+        return
 
-def main():
-    maze, feasibility, agent, max_epochs = train_agent_with_inputs(train_immediately=False)
     viewer = QValueDebugViewer(maze, feasibility, agent)
 
     training_done = threading.Event()
 
     def training_task():
-        agent.train(
-            feasibility.F_matrix,
-            max_epochs,
-            record_episodes=False,
-            record_q_values=False,
-        )
+        train_agent(args, agent, feasibility)
         training_done.set()
 
     training_thread = threading.Thread(target=training_task, daemon=True)
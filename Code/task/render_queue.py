@@ -0,0 +1,172 @@
+"""Queues that carry updates from the training thread to the render loop.
+
+Training usually produces states much faster than the viewer can draw them.
+The queues in this module bound the amount of pending work with a
+configurable backpressure policy:
+
+``"block"``
+    Producers wait until the render loop has drained enough items.
+``"drop_oldest"``
+    The oldest pending item is discarded to make room for a new one.
+``"coalesce"``
+    State updates are folded into visit counts plus the latest position, so
+    each frame consumes a single aggregate (only for state updates).
+"""
+
+import threading
+from collections import Counter, deque
+
+from callback_protocol import RESET_SIGNAL
+
+QUEUE_POLICIES = ("block", "drop_oldest", "coalesce")
+
+
+class RenderQueue:
+    """Thread-safe FIFO queue with a bounded size and backpressure policy.
+
+    Parameters
+    ----------
+    maxsize: int
+        Maximum number of pending items. ``0`` keeps the queue unbounded.
+    policy: str
+        Either ``"block"`` or ``"drop_oldest"``.
+    """
+
+    def __init__(self, maxsize: int = 0, policy: str = "block"):
+        if policy not in ("block", "drop_oldest"):
+            raise ValueError(f"Unsupported queue policy for RenderQueue: {policy!r}")
+        if maxsize < 0:
+            raise ValueError("maxsize cannot be negative.")
+
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self.coalesced = 0
+        self.closed = False
+        self._items = deque()
+        self._not_full = threading.Condition(threading.Lock())
+
+    def put(self, item):
+        """Add an item, applying the backpressure policy when the queue is full."""
+
+        with self._not_full:
+            if self.closed:
+                self.dropped += 1
+                return
+
+            if self.maxsize:
+                if self.policy == "block":
+                    while len(self._items) >= self.maxsize and not self.closed:
+                        self._not_full.wait()
+                    if self.closed:
+                        self.dropped += 1
+                        return
+                else:
+                    while len(self._items) >= self.maxsize:
+                        self._items.popleft()
+                        self.dropped += 1
+
+            self._items.append(item)
+
+    def drain(self) -> list:
+        """Remove and return all pending items in FIFO order."""
+
+        with self._not_full:
+            items = list(self._items)
+            self._items.clear()
+            self._not_full.notify_all()
+        return items
+
+    def qsize(self) -> int:
+        with self._not_full:
+            return len(self._items)
+
+    def close(self):
+        """Stop accepting items and release any blocked producers."""
+
+        with self._not_full:
+            self.closed = True
+            self._not_full.notify_all()
+
+
+class CoalescedUpdate:
+    """Aggregate of all state updates received between two frames."""
+
+    __slots__ = ("visits", "latest_state", "reset")
+
+    def __init__(self, visits: Counter, latest_state, reset: bool):
+        self.visits = visits
+        self.latest_state = latest_state
+        self.reset = reset
+
+
+class CoalescingStateQueue:
+    """State queue that keeps only visit counts and the latest position.
+
+    Memory stays bounded by the number of distinct states, regardless of how
+    fast the training loop emits updates. ``RESET_SIGNAL`` entries are kept as
+    a flag so the viewer can still break the trail between episodes.
+    """
+
+    policy = "coalesce"
+
+    def __init__(self, maxsize: int = 0):
+        # ``maxsize`` is accepted for signature parity; the aggregate is
+        # already bounded by the number of states.
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.coalesced = 0
+        self.closed = False
+        self._lock = threading.Lock()
+        self._visits = Counter()
+        self._latest_state = None
+        self._reset = False
+        self._pending = 0
+
+    def put(self, state):
+        with self._lock:
+            if self.closed:
+                self.dropped += 1
+                return
+
+            if state == RESET_SIGNAL:
+                self._reset = True
+                self._latest_state = None
+                return
+
+            if self._pending:
+                self.coalesced += 1
+            self._visits[state] += 1
+            self._latest_state = state
+            self._pending += 1
+
+    def drain(self) -> list:
+        """Return a list holding at most one :class:`CoalescedUpdate`."""
+
+        with self._lock:
+            if not self._visits and not self._reset:
+                return []
+            update = CoalescedUpdate(self._visits, self._latest_state, self._reset)
+            self._visits = Counter()
+            self._latest_state = None
+            self._reset = False
+            self._pending = 0
+        return [update]
+
+    def qsize(self) -> int:
+        with self._lock:
+            return self._pending
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+
+
+def make_render_queue(maxsize: int = 0, policy: str = "block"):
+    """Create the queue matching ``policy`` (one of :data:`QUEUE_POLICIES`)."""
+
+    if policy not in QUEUE_POLICIES:
+        raise ValueError(f"Unknown queue policy {policy!r}; expected one of {QUEUE_POLICIES}.")
+    if policy == "coalesce":
+        return CoalescingStateQueue(maxsize)
+    return RenderQueue(maxsize, policy)
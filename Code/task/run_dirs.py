@@ -0,0 +1,48 @@
+"""Output locations for training runs.
+
+Each run writes into its own ``data/runs/<timestamp>`` directory; only the
+most recent ``keep_runs`` directories are kept.
+"""
+
+import datetime
+import shutil
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+
+
+def create_run_directory(base_dir=DATA_DIR, keep_runs: int | None = 20) -> Path:
+    """Create ``<base_dir>/runs/<timestamp>`` and apply the retention policy.
+
+    Parameters
+    ----------
+    base_dir: Path | str
+        Root data directory.
+    keep_runs: int | None
+        Number of run directories (including the new one) to keep. Older
+        runs are removed; ``None`` keeps everything.
+    """
+
+    runs_dir = Path(base_dir) / "runs"
+    runs_dir.mkdir(parents=True, exist_ok=True)
+    name = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    run_dir = runs_dir / name
+    suffix = 1
+    while run_dir.exists():
+        run_dir = runs_dir / f"{name}_{suffix}"
+        suffix += 1
+    run_dir.mkdir()
+
+    if keep_runs is not None:
+        apply_retention(runs_dir, keep_runs)
+    return run_dir
+
+
+def apply_retention(runs_dir, keep_runs: int) -> list[Path]:
+    """Delete all but the newest ``keep_runs`` run directories."""
+
+    runs = sorted((path for path in Path(runs_dir).iterdir() if path.is_dir()), key=lambda p: p.name)
+    expired = runs[: max(0, len(runs) - keep_runs)]
+    for run in expired:
+        shutil.rmtree(run, ignore_errors=True)
+    return expired
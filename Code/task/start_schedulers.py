@@ -0,0 +1,191 @@
+"""Start-state schedulers for ``Agent.train``.
+
+A scheduler picks the state each training episode starts from and is told
+how the episode went. ``Agent.train`` calls, per run and per episode::
+
+    scheduler.bind(agent, neighbors, predecessors)   # once
+    start = scheduler.next_start()                   # every episode
+    scheduler.visit(state)                           # every step, only if
+                                                     # scheduler.needs_visits
+    scheduler.end_episode(start, metrics)            # every episode
+
+All schedulers draw from the global NumPy RNG, so seeded runs stay
+reproducible.
+"""
+
+from abc import ABC, abstractmethod
+from collections import deque
+
+import numpy as np
+
+START_SCHEDULERS = ("fixed", "reverse", "count")
+
+
+class StartScheduler(ABC):
+    """Base class; subclasses implement :meth:`next_start`."""
+
+    needs_visits = False
+
+    def bind(self, agent, neighbors, predecessors):
+        self.agent = agent
+        self.neighbors = neighbors
+        self.predecessors = predecessors
+
+    @abstractmethod
+    def next_start(self) -> int:
+        """State the next episode starts from."""
+
+    def visit(self, state: int):
+        pass
+
+    def end_episode(self, start: int, metrics: dict):
+        pass
+
+
+class FixedStart(StartScheduler):
+    """Start at ``agent.start``, or at a uniformly random state with
+    probability ``exploration_prob`` (the original behaviour of ``train``).
+    """
+
+    def __init__(self, exploration_prob: float = 0.05):
+        self.exploration_prob = exploration_prob
+
+    def next_start(self) -> int:
+        if np.random.random() < self.exploration_prob:
+            return np.random.randint(0, self.agent.n_states)
+        return self.agent.start
+
+
+def goal_distances(predecessors, goal: int) -> np.ndarray:
+    """Breadth-first number of moves from every state to ``goal`` (-1 if unreachable)."""
+
+    distances = np.full(len(predecessors), -1, dtype=np.int64)
+    distances[goal] = 0
+    frontier = deque([goal])
+    while frontier:
+        state = frontier.popleft()
+        for previous in predecessors[state].tolist():
+            if distances[previous] < 0:
+                distances[previous] = distances[state] + 1
+                frontier.append(previous)
+    return distances
+
+
+class ReverseCurriculum(StartScheduler):
+    """Start close to the goal and move outward as episodes succeed.
+
+    Episodes start at a uniformly chosen state at most ``radius`` moves from
+    the goal. An episode succeeds when it reaches the goal within
+    ``success_slack`` times the shortest distance from its start. Once the
+    success rate over the last ``window`` episodes reaches ``promote_at``
+    the radius grows by ``radius_step``. When the radius covers
+    ``agent.start``, a fraction ``final_start_prob`` of the episodes starts
+    there.
+
+    Parameters
+    ----------
+    initial_radius: int
+        Radius of the first stage.
+    radius_step: int
+        Growth of the radius per promotion.
+    window: int
+        Number of recent episodes used for the success rate.
+    promote_at: float
+        Success rate required for a promotion.
+    success_slack: float
+        Allowed ratio of steps taken to shortest distance for a success.
+    final_start_prob: float
+        Probability of starting at ``agent.start`` once it is in range.
+    """
+
+    def __init__(
+        self,
+        initial_radius: int = 1,
+        radius_step: int = 3,
+        window: int = 5,
+        promote_at: float = 0.6,
+        success_slack: float = 2.0,
+        final_start_prob: float = 0.5,
+    ):
+        self.radius = initial_radius
+        self.radius_step = radius_step
+        self.promote_at = promote_at
+        self.success_slack = success_slack
+        self.final_start_prob = final_start_prob
+        self.outcomes = deque(maxlen=window)
+
+    def bind(self, agent, neighbors, predecessors):
+        super().bind(agent, neighbors, predecessors)
+        self.distances = goal_distances(predecessors, int(agent.goal))
+        self.max_distance = int(self.distances.max())
+        # States ordered by distance so every stage is a prefix of this array.
+        candidates = np.flatnonzero(self.distances > 0)
+        self._by_distance = candidates[np.argsort(self.distances[candidates], kind="stable")]
+        self._sorted_distances = self.distances[self._by_distance]
+
+    def next_start(self) -> int:
+        start_distance = self.distances[self.agent.start]
+        if 0 <= start_distance <= self.radius and np.random.random() < self.final_start_prob:
+            return self.agent.start
+        count = int(np.searchsorted(self._sorted_distances, self.radius, side="right"))
+        if count == 0:
+            return self.agent.start
+        return int(self._by_distance[np.random.randint(0, count)])
+
+    def end_episode(self, start: int, metrics: dict):
+        budget = self.success_slack * self.distances[start]
+        self.outcomes.append(bool(metrics["terminal"]) and metrics["steps"] <= budget)
+        if (
+            self.radius < self.max_distance
+            and len(self.outcomes) == self.outcomes.maxlen
+            and np.mean(self.outcomes) >= self.promote_at
+        ):
+            self.radius = min(self.max_distance, self.radius + self.radius_step)
+            self.outcomes.clear()
+
+
+class CountBasedStart(StartScheduler):
+    """Prefer rarely visited states as episode starts.
+
+    A state visited ``n`` times is chosen with probability proportional to
+    ``(1 + n) ** -power``; states without feasible actions (and the goal)
+    are never chosen.
+    """
+
+    needs_visits = True
+
+    def __init__(self, power: float = 0.5):
+        self.power = power
+
+    def bind(self, agent, neighbors, predecessors):
+        super().bind(agent, neighbors, predecessors)
+        self.counts = np.zeros(agent.n_states, dtype=np.int64)
+        self._eligible = np.array([actions.size > 0 for actions in neighbors])
+        self._eligible[int(agent.goal)] = False
+        eligible_states = np.flatnonzero(self._eligible)
+        self._last_eligible = int(eligible_states[-1]) if eligible_states.size else -1
+
+    def next_start(self) -> int:
+        cumulative = np.cumsum(np.where(self._eligible, (1.0 + self.counts) ** -self.power, 0.0))
+        total = cumulative[-1]
+        if total == 0:
+            return self.agent.start
+        # Scale by the last cumulative weight (weights.sum() can differ in the
+        # last bits) and clip a draw that rounds up to it to the last eligible state.
+        state = int(np.searchsorted(cumulative, np.random.random() * total, side="right"))
+        return min(state, self._last_eligible)
+
+    def visit(self, state: int):
+        self.counts[state] += 1
+
+
+def make_start_scheduler(name: str, exploration_prob: float = 0.05) -> StartScheduler:
+    """Create a scheduler from its name in :data:`START_SCHEDULERS`."""
+
+    if name == "fixed":
+        return FixedStart(exploration_prob)
+    if name == "reverse":
+        return ReverseCurriculum()
+    if name == "count":
+        return CountBasedStart()
+    raise ValueError(f"Unknown start scheduler {name!r}; expected one of {START_SCHEDULERS}")
@@ -0,0 +1,201 @@
+"""Shrink the state space before training.
+
+Two reductions are applied to the feasibility graph of a maze:
+
+Dead-end filling
+    States that are not the start or the goal and have at most one
+    remaining neighbour are removed, repeatedly, together with every state
+    that cannot be reached from the start. Such states can never lie on a
+    path between start and goal. In a perfect maze only the solution path
+    survives.
+Corridor contraction
+    Chains of states with exactly two neighbours are replaced by one
+    macro-edge between the states at either end. The macro-edge carries the
+    discounted reward of the whole chain and a discount of
+    ``gamma ** length``, so Q-learning on the reduced graph is exact.
+
+:class:`ReducedProblem` keeps the mapping back to the original state IDs so
+learned paths and Q-values can be used by ``Agent.walk`` and the viewers.
+"""
+
+from collections import deque
+
+import numpy as np
+
+from convert import AdjacencyMatrix, neighbor_lists
+
+
+class ReducedProblem:
+    """A reduced feasibility graph and the mapping back to original states.
+
+    Parameters
+    ----------
+    F: np.ndarray
+        Original (symmetric) feasibility matrix.
+    R: np.ndarray
+        Original reward matrix, e.g. ``Agent.R``.
+    start: int
+        Original start state.
+    goal: int
+        Original goal state.
+    gamma: float
+        Discount factor used to weight macro-edges.
+    fill_dead_ends: bool
+        Remove dead ends and states unreachable from ``start``.
+    contract_corridors: bool
+        Replace chains of degree-2 states by macro-edges.
+
+    Attributes
+    ----------
+    states: np.ndarray
+        Original ID of every reduced state.
+    F, R, discounts: np.ndarray
+        Matrices of the reduced problem, indexed by reduced state.
+    start, goal: int
+        Reduced IDs of the start and goal.
+    """
+
+    def __init__(self, F, R, start, goal, gamma, fill_dead_ends=True, contract_corridors=True):
+        if isinstance(F, AdjacencyMatrix):
+            raise ValueError("ReducedProblem needs a dense or compact feasibility matrix")
+        self.original_F = np.asarray(F)
+        self.original_R = np.asarray(R)
+        self.gamma = gamma
+        self.n_original = self.original_F.shape[0]
+        start, goal = int(start), int(goal)
+        self.neighbors = neighbor_lists(self.original_F)
+
+        alive = self._reachable(start)
+        if fill_dead_ends:
+            self._fill_dead_ends(alive, start, goal)
+        self.alive = alive
+
+        degree = np.array([int(alive[actions].sum()) for actions in self.neighbors])
+        kept = alive.copy()
+        if contract_corridors:
+            kept &= degree != 2
+            kept[[start, goal]] = True
+        self.states = np.flatnonzero(kept)
+        self.index = np.full(self.n_original, -1, dtype=np.int64)
+        self.index[self.states] = np.arange(self.states.size)
+        self.start = int(self.index[start])
+        self.goal = int(self.index[goal])
+
+        size = self.states.size
+        self.F = np.zeros((size, size), dtype=int)
+        self.R = np.zeros((size, size))
+        self.discounts = np.zeros((size, size))
+        # Interior original states of every macro-edge, keyed by reduced (u, v).
+        self.edge_paths = {}
+        for u in range(size):
+            origin = int(self.states[u])
+            for first in self.neighbors[origin].tolist():
+                if alive[first]:
+                    self._add_chain(u, origin, first)
+
+    def _reachable(self, start):
+        reachable = np.zeros(self.n_original, dtype=bool)
+        reachable[start] = True
+        frontier = deque([start])
+        while frontier:
+            state = frontier.popleft()
+            for neighbor in self.neighbors[state].tolist():
+                if not reachable[neighbor]:
+                    reachable[neighbor] = True
+                    frontier.append(neighbor)
+        return reachable
+
+    def _fill_dead_ends(self, alive, start, goal):
+        degree = np.array([int(alive[actions].sum()) for actions in self.neighbors])
+        frontier = deque(
+            state for state in np.flatnonzero(alive & (degree <= 1)).tolist() if state not in (start, goal)
+        )
+        while frontier:
+            state = frontier.popleft()
+            if not alive[state]:
+                continue
+            alive[state] = False
+            for neighbor in self.neighbors[state].tolist():
+                if alive[neighbor]:
+                    degree[neighbor] -= 1
+                    if degree[neighbor] <= 1 and neighbor not in (start, goal):
+                        frontier.append(neighbor)
+
+    def _add_chain(self, u, origin, first):
+        # Follow the corridor from ``origin`` through ``first`` to the next kept state.
+        interior = []
+        reward = 0.0
+        discount = 1.0
+        previous, current = origin, first
+        while True:
+            reward += discount * float(self.original_R[previous, current])
+            discount *= self.gamma
+            if self.index[current] >= 0:
+                break
+            interior.append(current)
+            following = [n for n in self.neighbors[current].tolist() if self.alive[n] and n != previous]
+            previous, current = current, following[0]
+
+        v = int(self.index[current])
+        if v == u:
+            return
+        if self.F[u, v] and self.R[u, v] >= reward:
+            return  # keep the better of two parallel corridors
+        self.F[u, v] = 1
+        self.R[u, v] = reward
+        self.discounts[u, v] = discount
+        self.edge_paths[(u, v)] = interior
+
+    @property
+    def reduction(self) -> float:
+        """Fraction of the original states that were removed or contracted."""
+
+        return 1.0 - self.states.size / self.n_original
+
+    def expand_path(self, path):
+        """Map a path of reduced states back to original states.
+
+        Non-integer markers such as ``"break"`` are passed through.
+        """
+
+        expanded = []
+        previous = None
+        for state in path:
+            if not isinstance(state, (int, np.integer)):
+                expanded.append(state)
+                continue
+            state = int(state)
+            if previous is not None:
+                expanded.extend(self.edge_paths.get((previous, state), []))
+            expanded.append(int(self.states[state]))
+            previous = state
+        return expanded
+
+    def lift_q(self, Q):
+        """Turn the Q matrix of the reduced problem into an original-sized one.
+
+        The first move of every macro-edge gets the learned value; the moves
+        along the corridor are filled in backwards from the value of the
+        state the corridor leads to. Moves into removed states get a value
+        below every other entry so greedy walks never take them.
+        """
+
+        lifted = np.zeros((self.n_original, self.n_original), dtype=np.float32)
+        feasible = np.asarray(self.F) == 1
+        values = np.where(feasible.any(axis=1), np.where(feasible, Q, -np.inf).max(axis=1), 0.0)
+
+        for (u, v), interior in self.edge_paths.items():
+            chain = [int(self.states[u]), *interior, int(self.states[v])]
+            q_next = float(values[v])
+            for position in range(len(chain) - 2, 0, -1):
+                a, b = chain[position], chain[position + 1]
+                q_next = float(self.original_R[a, b]) + self.gamma * q_next
+                lifted[a, b] = q_next
+            lifted[chain[0], chain[1]] = Q[u, v]
+
+        # Everything that leads out of the kept graph ranks last.
+        floor = float(min(lifted.min(), 0.0)) - 1.0
+        removed = ~self.alive
+        into_removed = (self.original_F == 1) & removed[np.newaxis, :]
+        lifted[into_removed] = floor
+        return lifted
@@ -0,0 +1,37 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from artifact_export import ArtifactExporter, SeriesSnapshot, SurfaceSnapshot
+from run_dirs import apply_retention, create_run_directory
+
+
+class ArtifactExportTestCase(unittest.TestCase):
+    def test_run_directories_are_versioned_and_pruned(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            runs = [create_run_directory(tmp, keep_runs=None) for _ in range(4)]
+            self.assertEqual(len({run.name for run in runs}), 4)
+
+            expired = apply_retention(Path(tmp) / "runs", keep_runs=2)
+            self.assertEqual(expired, runs[:2])
+            self.assertEqual(sorted((Path(tmp) / "runs").iterdir()), runs[2:])
+
+    def test_exporter_future_reports_written_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            run_dir = Path(tmp)
+            surface = SurfaceSnapshot((2, 2), bytes(16))
+            series = [SeriesSnapshot("steps", np.arange(5.0), first_index=10)]
+            exporter = ArtifactExporter(max_workers=2)
+            future = exporter.submit(run_dir, "t", {"maze_view": surface}, series, [(0, 0, 0)])
+            exporter.shutdown()
+
+            names = sorted(path.name for path in future.result(timeout=10))
+            self.assertEqual(
+                names,
+                ["maze_view_t.png", "metric_series_t.csv", "metric_series_t.json", "metric_steps_t.png"],
+            )
+            rows = json.loads((run_dir / "metric_series_t.json").read_text(encoding="utf-8"))
+            self.assertEqual(rows[0], {"episode": 11, "steps": 0.0})
@@ -0,0 +1,46 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from cli import BATCH_DEFAULTS, build_parser, build_problem, resolve_run_arguments, run_summary, write_summary
+
+
+class CliTestCase(unittest.TestCase):
+    def parse(self, *argv):
+        parser = build_parser("test")
+        return resolve_run_arguments(parser, parser.parse_args(list(argv)))
+
+    def test_batch_mode_uses_defaults(self):
+        args = self.parse("--batch", "--gamma", "0.8")
+        self.assertEqual(args.size, BATCH_DEFAULTS["size"])
+        self.assertEqual(args.start, BATCH_DEFAULTS["start"])
+        self.assertEqual(args.gamma, 0.8)
+        self.assertEqual(args.lrn_rate, BATCH_DEFAULTS["lrn_rate"])
+
+    def test_invalid_start_is_rejected(self):
+        with self.assertRaises(SystemExit):
+            self.parse("--batch", "--size", "3", "3", "--start", "3", "0")
+
+    def test_seeded_runs_are_reproducible(self):
+        args = self.parse("--batch", "--size", "4", "3", "--seed", "7", "--epochs", "200")
+        paths = []
+        for _ in range(2):
+            maze, feasibility, agent = build_problem(args)
+            agent.train(feasibility.F_matrix, args.epochs)
+            agent.walk(maze, feasibility)
+            paths.append(agent.path)
+        self.assertEqual(paths[0], paths[1])
+
+        summary = run_summary(args, agent, agent.path, 0.5)
+        self.assertTrue(summary["solved"])
+        self.assertEqual(summary["path_length"], len(summary["path"]) - 1)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            target = Path(tmp) / "nested" / "run.json"
+            write_summary(target, summary)
+            self.assertEqual(json.loads(target.read_text(encoding="utf-8"))["seed"], 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
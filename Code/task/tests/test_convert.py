@@ -0,0 +1,62 @@
+import random
+import unittest
+
+import numpy as np
+
+from convert import Feasibility, find_reachable_neighbors, wall_neighbor_table
+from maze import Maze
+
+
+def loop_matrix(maze):
+    """F as the per-cell loop over ``find_reachable_neighbors`` built it."""
+
+    n_states = maze.nx * maze.ny
+    F = np.zeros((n_states, n_states), dtype=int)
+    for (x, y), cell in np.ndenumerate(maze.maze_grid):
+        for neighbor in find_reachable_neighbors(maze, cell):
+            F[x * maze.ny + y, neighbor.x * maze.ny + neighbor.y] = 1
+    return F
+
+
+class WallFeasibilityTestCase(unittest.TestCase):
+    def test_matches_the_cell_loop(self):
+        random.seed(3)
+        for nx, ny in ((1, 1), (1, 7), (6, 1), (5, 5), (9, 4)):
+            maze = Maze(nx, ny, [0, 0])
+            expected = loop_matrix(maze)
+            for backend in ("dense", "compact", "sparse"):
+                F = Feasibility(maze, backend).F_matrix
+                dense = F.toarray() if backend == "sparse" else F
+                np.testing.assert_array_equal(dense, expected, err_msg=f"{nx}x{ny} {backend}")
+
+    def test_every_move_reads_its_own_wall(self):
+        random.seed(4)
+        maze = Maze(4, 3, [0, 0])
+        # Close one side of an open corridor only: the move back stays open.
+        for x, y in np.ndindex(maze.nx, maze.ny - 1):
+            if not maze.cell_at(x, y).walls['S']:
+                maze.cell_at(x, y).walls['S'] = True
+                break
+        np.testing.assert_array_equal(Feasibility(maze).F_matrix, loop_matrix(maze))
+        state = x * maze.ny + y
+        self.assertEqual(Feasibility(maze).F_matrix[state + 1, state], 1)
+
+    def test_from_walls_needs_no_maze(self):
+        random.seed(5)
+        maze = Maze(7, 5, [0, 0])
+        walls = maze.to_walls()
+        np.testing.assert_array_equal(Maze.from_walls(walls, [0, 0], maze.end).to_walls(), walls)
+
+        feasibility = Feasibility.from_walls(walls, "sparse")
+        self.assertEqual(feasibility.cells, 35)
+        np.testing.assert_array_equal(feasibility.numbered_grid, Feasibility(maze).numbered_grid)
+        np.testing.assert_array_equal(feasibility.F_matrix.toarray(), Feasibility(maze).F_matrix)
+
+        table = wall_neighbor_table(walls)
+        self.assertEqual(table.shape, (35, 4))
+        # A perfect maze has one corridor fewer than cells; each counts twice.
+        self.assertEqual(np.count_nonzero(table >= 0), 2 * 34)
+
+
+if __name__ == "__main__":
+    unittest.main()
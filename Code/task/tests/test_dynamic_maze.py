@@ -0,0 +1,96 @@
+import random
+import unittest
+
+import numpy as np
+
+from convert import Feasibility
+from dynamic_maze import DynamicMaze
+from learn import Agent
+from maze import Maze
+from path_service import PathService
+
+
+def open_walls(maze):
+    for x in range(maze.nx):
+        for y in range(maze.ny):
+            for direction, wall in maze.cell_at(x, y).walls.items():
+                dx, dy = Maze.delta[direction]
+                if wall and 0 <= x + dx < maze.nx and 0 <= y + dy < maze.ny:
+                    yield x, y, direction
+
+
+class DynamicMazeTestCase(unittest.TestCase):
+    def setUp(self):
+        random.seed(11)
+        np.random.seed(11)
+        self.maze = Maze(7, 7, [0, 0])
+        self.feasibility = Feasibility(self.maze)
+        self.agent = Agent(self.feasibility, 0.9, 0.9, self.maze, 0, 0)
+        self.service = PathService.from_feasibility(self.feasibility)
+        self.dynamic = DynamicMaze(self.maze, self.feasibility, self.agent, self.service)
+        self.dynamic.repair(range(self.agent.n_states))
+
+    def assert_solved(self):
+        path = self.agent.greedy_path(self.dynamic.neighbors)
+        self.assertIsNotNone(path)
+        self.assertEqual(len(path) - 1, self.service.distance(self.agent.start, self.agent.goal))
+
+    def test_patches_match_a_full_rebuild(self):
+        closed = open_walls(self.maze)
+        for _ in range(3):
+            self.assertTrue(self.dynamic.open_wall(*next(closed)))
+        x, y = np.unravel_index(self.agent.goal, self.feasibility.numbered_grid.shape)
+        direction = next(d for d, wall in self.maze.cell_at(x, y).walls.items() if not wall)
+        self.assertTrue(self.dynamic.close_wall(int(x), int(y), direction))
+        self.assertFalse(self.dynamic.close_wall(int(x), int(y), direction))
+
+        rebuilt = Feasibility(self.maze)
+        np.testing.assert_array_equal(self.feasibility.F_matrix, rebuilt.F_matrix)
+        np.testing.assert_array_equal(self.agent.R, Agent(rebuilt, 0.9, 0.9, self.maze, 0, 0).R)
+        for state, actions in enumerate(self.dynamic.neighbors):
+            np.testing.assert_array_equal(actions, np.flatnonzero(rebuilt.F_matrix[state]))
+
+    def test_repair_finds_shortcut_and_detour(self):
+        self.assert_solved()
+        route = self.agent.greedy_path(self.dynamic.neighbors)
+
+        # Cut the current route, then reconnect the maze with new corridors.
+        a, b = route[len(route) // 2], route[len(route) // 2 + 1]
+        (ax, ay), (bx, by) = (np.unravel_index(s, self.feasibility.numbered_grid.shape) for s in (a, b))
+        direction = next(d for d, delta in Maze.delta.items() if delta == (int(bx - ax), int(by - ay)))
+        self.dynamic.close_wall(int(ax), int(ay), direction)
+        for wall in list(open_walls(self.maze))[::4]:
+            self.dynamic.open_wall(*wall)
+        self.assertIsNotNone(self.service.distance(self.agent.start, self.agent.goal))
+
+        updates = self.dynamic.repair()
+        self.assertGreater(updates, 0)
+        self.assert_solved()
+        self.assertIsNone(self.dynamic.oracle)
+
+    def test_unaffected_cached_paths_survive(self):
+        goal = int(self.agent.goal)
+        self.service.path(0, goal)
+        far_corner = self.agent.n_states - 1 if goal != self.agent.n_states - 1 else 1
+        self.service.path(0, far_corner)
+        leaf = next(s for s, actions in enumerate(self.dynamic.neighbors) if actions.size == 1 and s not in (0, goal))
+        x, y = np.unravel_index(leaf, self.feasibility.numbered_grid.shape)
+        for direction, wall in self.maze.cell_at(int(x), int(y)).walls.items():
+            dx, dy = Maze.delta[direction]
+            if wall and 0 <= x + dx < self.maze.nx and 0 <= y + dy < self.maze.ny:
+                self.dynamic.open_wall(int(x), int(y), direction)
+                break
+        self.assertEqual(self.service.path(0, goal), PathService(self.feasibility.F_matrix).path(0, goal))
+        self.assertEqual(
+            self.service.path(0, far_corner), PathService(self.feasibility.F_matrix).path(0, far_corner)
+        )
+
+    def test_rejects_boundary_walls(self):
+        with self.assertRaises(ValueError):
+            self.dynamic.open_wall(0, 0, "N")
+        with self.assertRaises(ValueError):
+            self.dynamic.open_wall(0, 0, "up")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageSequence
+
+from cli import build_parser, build_problem, resolve_run_arguments, train_agent
+from episode_video import export_video, frame_plan, select_episodes
+
+
+def timeline(path, duration):
+    """Decoded frames, each repeated for as many ``duration`` ticks as it is shown.
+
+    The GIF encoder merges identical consecutive frames into one longer
+    frame, so only the timeline is independent of the chunking.
+    """
+
+    frames = []
+    for frame in ImageSequence.Iterator(Image.open(path)):
+        frames.extend([np.array(frame.convert("RGB"))] * (frame.info["duration"] // duration))
+    return frames
+
+
+class FramePlanTestCase(unittest.TestCase):
+    def test_every_segment_ends_with_its_last_state(self):
+        self.assertEqual(frame_plan([5, 0, 2], states_per_frame=2), [(0, 2), (0, 4), (0, 5), (2, 2)])
+
+    def test_select_episodes_keeps_the_last(self):
+        self.assertEqual(select_episodes(10, 4), [0, 4, 8, 9])
+        self.assertEqual(select_episodes(0, 4), [])
+
+
+class ExportVideoTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        parser = build_parser("test")
+        argv = ["--batch", "--size", "4", "3", "--seed", "2", "--no-view", "--epochs", "6"]
+        args = resolve_run_arguments(parser, parser.parse_args(argv))
+        cls.maze, feasibility, agent = build_problem(args)
+        train_agent(args, agent, feasibility, record_episodes=True)
+        cls.episodes = [(index + 1, trace["states"]) for index, trace in enumerate(agent.episode_traces)]
+        cls.path = cls.episodes[-1][1]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_chunked_gif_matches_single_chunk(self):
+        options = {"episodes": self.episodes, "path": self.path, "states_per_frame": 2, "cell_pixels": 10}
+        frames = export_video(self.maze, self.root / "chunked.gif", chunk_frames=3, workers=2, **options)
+        export_video(self.maze, self.root / "single.gif", chunk_frames=10_000, workers=1, **options)
+        chunked, single = timeline(self.root / "chunked.gif", 50), timeline(self.root / "single.gif", 50)
+        self.assertGreater(frames, 3)
+        self.assertEqual(len(chunked), frames)
+        self.assertEqual(len(single), frames)
+        for left, right in zip(chunked, single):
+            np.testing.assert_array_equal(left, right)
+
+    def test_png_sequence(self):
+        frames = export_video(self.maze, self.root / "frames", path=self.path, cell_pixels=10, workers=1)
+        self.assertEqual(frames, len(self.path))
+        self.assertEqual(len(list((self.root / "frames").glob("frame_*.png"))), frames)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import argparse
+import tempfile
+import unittest
+from unittest import mock
+
+from cli import add_training_arguments, validate_training_arguments
+from evaluate import aggregate, describe, evaluate_dataset, evaluate_maze, main
+from maze_dataset import MazeDataset, build_dataset
+
+
+def training_args(*argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=0)
+    add_training_arguments(parser)
+    return validate_training_arguments(parser, parser.parse_args(list(argv)))
+
+
+class EvaluateTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.dataset_dir = build_dataset(cls.tmp.name, 6, [(3, 3), (4, 4)], master_seed=2, workers=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_report_covers_every_maze(self):
+        args = training_args("--epochs", "300", "--planning", "prioritized")
+        report = evaluate_dataset(self.dataset_dir, args, workers=2)
+        results = report["results"]
+        self.assertEqual([r["maze_id"] for r in results], list(range(6)))
+        self.assertEqual(report["aggregate"]["success_rate"], 1.0)
+        for result in results:
+            self.assertEqual(result["excess_length"], 0)
+            self.assertEqual(result["length_ratio"], 1.0)
+        self.assertEqual(report["aggregate"]["episodes"]["count"], 6)
+        self.assertEqual(report["config"]["planning"], "prioritized")
+
+    def test_results_do_not_depend_on_the_pool(self):
+        args = training_args("--epochs", "20", "--gamma", "0.8")
+        dataset = MazeDataset(self.dataset_dir)
+        first = evaluate_maze(dataset, args, 3)
+        report = evaluate_dataset(self.dataset_dir, args, maze_ids=[3], workers=1)
+        self.assertEqual(report["results"][0]["path_length"], first["path_length"])
+        self.assertEqual(report["results"][0]["solved"], first["solved"])
+
+    def test_parallel_engine_is_seeded_per_maze(self):
+        args = training_args("--epochs", "5", "--engine", "parallel", "--workers", "1")
+        dataset = MazeDataset(self.dataset_dir)
+        stop = {"episodes": 5, "reason": "max_epochs"}
+        with mock.patch("parallel_training.train_parallel", return_value=stop) as train_parallel:
+            evaluate_maze(dataset, args, 0)
+            evaluate_maze(dataset, args, 1)
+        seeds = [call.kwargs["seed"] for call in train_parallel.call_args_list]
+        self.assertNotEqual(seeds[0], seeds[1])
+        self.assertEqual(args.seed, 0)
+
+        with self.assertRaises(SystemExit):
+            main([str(self.dataset_dir), "--engine", "parallel"])
+
+    def test_describe_skips_missing_values(self):
+        summary = describe([1, None, 3, 2])
+        self.assertEqual(summary["count"], 3)
+        self.assertEqual(summary["p50"], 2.0)
+        self.assertEqual(describe([None]), {"count": 0})
+        self.assertIsNone(aggregate([])["success_rate"])
+
+
+if __name__ == "__main__":
+    unittest.main()
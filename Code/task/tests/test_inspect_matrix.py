@@ -0,0 +1,53 @@
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from convert import AdjacencyMatrix
+from inspect_matrix import iter_edges, print_edges, row_stats, save_matrix, top_k_per_state
+
+
+class InspectMatrixTestCase(unittest.TestCase):
+    def setUp(self):
+        self.F = np.array([[0, 1, 1], [1, 0, 0], [0, 0, 0]])
+        self.Q = np.array([[0.0, 2.0, 5.0], [1.5, 0.0, 0.0], [0.0, 0.0, 0.0]], dtype=np.float32)
+
+    def test_edges_are_streamed_across_row_blocks(self):
+        edges = list(iter_edges(self.Q, self.F == 1, block_rows=1))
+        self.assertEqual(edges, [(0, 1, 2.0), (0, 2, 5.0), (1, 0, 1.5)])
+        self.assertEqual(list(iter_edges(self.F)), [(0, 1, 1), (0, 2, 1), (1, 0, 1)])
+
+    def test_print_edges_respects_limit(self):
+        out = io.StringIO()
+        self.assertEqual(print_edges(self.F, limit=2, file=out), 2)
+        self.assertEqual(out.getvalue().splitlines(), ["0 -> 1: 1", "0 -> 2: 1", "... (truncated after 2 edges)"])
+
+    def test_summaries_only_consider_feasible_actions(self):
+        self.assertEqual(top_k_per_state(self.Q, self.F, k=1), [[(2, 5.0)], [(0, 1.5)], []])
+        stats = row_stats(self.Q, self.F == 1)
+        self.assertEqual(stats["count"].tolist(), [2, 1, 0])
+        self.assertEqual(stats["mean"][:2].tolist(), [3.5, 1.5])
+        self.assertTrue(np.isnan(stats["max"][2]))
+        from_edges = row_stats(self.Q, np.nonzero(self.F))
+        for name in ("count", "min", "max", "mean"):
+            np.testing.assert_array_equal(from_edges[name], stats[name])
+
+    def test_save_matrix_round_trips(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = save_matrix(self.Q, Path(tmp) / "dump" / "Q.npy")
+            np.testing.assert_array_equal(np.load(path), self.Q)
+
+    def test_sparse_matrix_is_read_through_its_edges(self):
+        sparse = AdjacencyMatrix.from_edges(3, *np.nonzero(self.F))
+        self.assertEqual(list(iter_edges(sparse)), list(iter_edges(self.F)))
+        self.assertEqual(top_k_per_state(self.Q, sparse, k=1), top_k_per_state(self.Q, self.F, k=1))
+        with tempfile.TemporaryDirectory() as tmp:
+            saved = np.load(save_matrix(sparse, Path(tmp) / "F.npy"))
+        self.assertEqual(saved.dtype, np.int8)
+        np.testing.assert_array_equal(saved, self.F)
+
+
+if __name__ == "__main__":
+    unittest.main()
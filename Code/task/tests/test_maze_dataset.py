@@ -0,0 +1,54 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from convert import Feasibility
+from maze_dataset import MazeDataset, build_dataset, generate_maze, pack_walls, unpack_walls
+from tree_oracle import TreeOracle
+
+SIZES = [(3, 4), (6, 5), (7, 7)]
+
+
+class MazeDatasetTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dataset = MazeDataset(build_dataset(self.tmp.name + "/a", 25, SIZES, master_seed=9, shard_size=7, workers=2))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_mazes_are_perfect_and_optimal_lengths_match(self):
+        self.assertEqual(len(self.dataset), 25)
+        self.assertEqual(self.dataset.manifest["shards"], 4)
+        for record in self.dataset:
+            self.assertIn(record.walls.shape, SIZES)
+            maze = record.to_maze()
+            feasibility = Feasibility(maze)
+            np.testing.assert_array_equal(feasibility.F_matrix, feasibility.F_matrix.T)
+            oracle = TreeOracle(feasibility.F_matrix)
+            start = feasibility.numbered_grid[record.start]
+            end = feasibility.numbered_grid[record.end]
+            self.assertEqual(oracle.distance(start, end), record.optimal_length)
+            self.assertEqual(maze.end, list(record.end))
+            self.assertEqual(maze.cell_at(*record.start).status, "Start")
+
+    def test_contents_do_not_depend_on_sharding(self):
+        other = MazeDataset(build_dataset(self.tmp.name + "/b", 25, SIZES, master_seed=9, shard_size=100, workers=1))
+        for maze_id in (0, 13, 24):
+            np.testing.assert_array_equal(self.dataset[maze_id].walls, other[maze_id].walls)
+            self.assertEqual(self.dataset[maze_id].end, other[maze_id].end)
+        walls, start, end = generate_maze(9, 13, SIZES)
+        np.testing.assert_array_equal(walls, self.dataset[13].walls)
+        with self.assertRaises(IndexError):
+            self.dataset[25]
+
+    def test_packing_round_trips_odd_sizes(self):
+        walls = np.random.default_rng(0).integers(0, 16, size=(3, 5)).astype(np.uint8)
+        packed = pack_walls(walls)
+        self.assertEqual(len(packed), 8)
+        np.testing.assert_array_equal(unpack_walls(packed, 3, 5), walls)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import random
+import unittest
+
+import numpy as np
+
+from cli import build_parser, build_problem, resolve_run_arguments, train_agent
+from convert import Feasibility, neighbor_lists
+from dynamic_maze import DynamicMaze
+from learn import Agent
+from maze import Maze
+from memory_planner import MemoryBudgetError, estimate_footprint, parse_size, plan_memory
+from tree_oracle import TreeOracle
+
+
+class FeasibilityBackendTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        random.seed(5)
+        cls.maze = Maze(6, 4, [0, 0])
+        cls.dense = Feasibility(cls.maze)
+        cls.compact = Feasibility(cls.maze, "compact")
+        cls.sparse = Feasibility(cls.maze, "sparse")
+
+    def test_backends_hold_the_same_moves(self):
+        F = self.dense.F_matrix
+        self.assertEqual(self.compact.F_matrix.dtype, np.int8)
+        np.testing.assert_array_equal(self.compact.F_matrix, F)
+        np.testing.assert_array_equal(self.sparse.F_matrix.toarray(), F)
+        np.testing.assert_array_equal(self.sparse.F_matrix.T.toarray(), F.T)
+        self.assertEqual(self.sparse.F_matrix.nnz, int(F.sum()))
+        for state in (0, 7, F.shape[0] - 1):
+            np.testing.assert_array_equal(self.sparse.F_matrix[state], F[state])
+            for next_state in range(F.shape[0]):
+                self.assertEqual(self.sparse.F_matrix[state, next_state], F[state, next_state])
+
+    def test_neighbor_lists_and_oracle_accept_a_sparse_matrix(self):
+        expected = neighbor_lists(self.dense.F_matrix)
+        for actions, sparse_actions in zip(expected, neighbor_lists(self.sparse.F_matrix)):
+            np.testing.assert_array_equal(actions, sparse_actions)
+        oracle = TreeOracle(self.sparse.F_matrix)
+        self.assertEqual(oracle.distance(0, 23), TreeOracle(self.dense.F_matrix).distance(0, 23))
+
+    def test_rewards_do_not_depend_on_the_backend(self):
+        legacy = Agent(self.dense, 0.9, 0.9, self.maze, 0, 0)
+        self.assertEqual(legacy.R.dtype, np.float64)
+        for feasibility in (self.compact, self.sparse):
+            agent = Agent(feasibility, 0.9, 0.9, self.maze, 0, 0, reward_dtype=np.float32)
+            self.assertEqual(agent.R.dtype, np.float32)
+            np.testing.assert_array_equal(agent.R, legacy.R.astype(np.float32))
+
+    def test_dynamic_maze_rejects_a_sparse_matrix(self):
+        agent = Agent(self.sparse, 0.9, 0.9, self.maze, 0, 0)
+        with self.assertRaises(ValueError):
+            DynamicMaze(self.maze, self.sparse, agent)
+
+
+class MemoryPlannerTestCase(unittest.TestCase):
+    def test_footprint_counts_worker_copies_and_snapshots(self):
+        single = estimate_footprint(10, 10)
+        self.assertEqual(single["F"], 8 * 100**2)
+        self.assertEqual(single["R"], 8 * 100**2)
+        self.assertEqual(single["Q"], 4 * 100**2)
+        parallel = estimate_footprint(10, 10, engine="parallel", workers=3, epochs=50, record_q_values=True)
+        self.assertEqual(parallel["parallel workers"], 3 * (single["F"] + single["R"]))
+        self.assertEqual(parallel["Q snapshots"], 50 * single["Q"])
+
+    def test_first_layout_that_fits_is_chosen(self):
+        sizes = {
+            backend: sum(estimate_footprint(40, 40, backend, dtype).values())
+            for backend, dtype in (("dense", "float64"), ("compact", "float32"), ("sparse", "float32"))
+        }
+        self.assertGreater(sizes["dense"], sizes["compact"])
+        self.assertGreater(sizes["compact"], sizes["sparse"])
+
+        self.assertEqual(plan_memory(40, 40).feasibility, "dense")
+        plan = plan_memory(40, 40, budget=sizes["compact"])
+        self.assertEqual((plan.feasibility, plan.reward_dtype), ("compact", "float32"))
+        self.assertEqual(plan_memory(40, 40, budget=sizes["sparse"]).feasibility, "sparse")
+        with self.assertRaises(MemoryBudgetError) as raised:
+            plan_memory(40, 40, budget=sizes["sparse"], reduce=True)
+        self.assertEqual([plan.feasibility for plan in raised.exception.plans], ["dense", "compact"])
+        self.assertIn("No layout fits", str(raised.exception))
+
+    def test_sizes_are_parsed_in_powers_of_1024(self):
+        self.assertEqual(parse_size("512"), 512)
+        self.assertEqual(parse_size("2k"), 2048)
+        self.assertEqual(parse_size("1.5GiB"), 3 * 2**29)
+        with self.assertRaises(ValueError):
+            parse_size("lots")
+
+    def test_cli_falls_back_to_a_smaller_layout_or_stops(self):
+        parser = build_parser("test")
+        argv = ["--batch", "--size", "20", "20", "--seed", "2", "--epochs", "30", "--memory-budget", "1600K"]
+        args = resolve_run_arguments(parser, parser.parse_args(argv))
+        self.assertEqual(args.feasibility, "sparse")
+        maze, feasibility, agent = build_problem(args)
+        train_agent(args, agent, feasibility)
+        agent.walk(maze, feasibility)
+        self.assertEqual(agent.path[-1], agent.goal)
+
+        with self.assertRaises(SystemExit):
+            resolve_run_arguments(parser, parser.parse_args(argv[:-1] + ["1K"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+import numpy as np
+
+from metric_store import MetricStore, RingSeries, downsample, lttb_indices
+
+
+class MetricStoreTestCase(unittest.TestCase):
+    def test_ring_series_keeps_most_recent_values(self):
+        series = RingSeries(capacity=4)
+        for value in range(10):
+            series.append(value)
+
+        self.assertEqual(len(series), 4)
+        self.assertEqual(series.first_index, 6)
+        self.assertEqual(series.values().tolist(), [6, 7, 8, 9])
+        self.assertEqual(series.values(last=2).tolist(), [8, 9])
+        self.assertIsNone(series.get(5))
+        self.assertEqual(series.get(7), 7.0)
+
+    def test_store_creates_series_on_first_append(self):
+        store = MetricStore(capacity=3)
+        self.assertFalse(store)
+        store.append("steps", 5)
+        store.append("steps", 6)
+        self.assertIn("steps", store)
+        self.assertEqual(store["steps"].values().tolist(), [5, 6])
+
+    def test_lttb_keeps_endpoints_and_peaks(self):
+        y = np.zeros(1000)
+        y[500] = 10.0
+        indices = lttb_indices(y, 50)
+
+        self.assertEqual(len(indices), 50)
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(indices[-1], 999)
+        self.assertIn(500, indices)
+        self.assertTrue(np.all(np.diff(indices) > 0))
+
+    def test_minmax_downsample_preserves_extremes(self):
+        y = np.sin(np.linspace(0, 20, 5000))
+        indices, values = downsample(y, 100, method="minmax")
+
+        self.assertLessEqual(len(indices), 100)
+        self.assertAlmostEqual(values.max(), y.max())
+        self.assertAlmostEqual(values.min(), y.min())
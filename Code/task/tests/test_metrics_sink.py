@@ -0,0 +1,37 @@
+import csv
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from metrics_sink import MetricsSink, load_chunks
+
+
+class MetricsSinkTestCase(unittest.TestCase):
+    def test_batches_are_appended_in_every_format(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sink = MetricsSink(tmp, "run", batch_size=2, flush_interval=60)
+            for episode in range(5):
+                sink.write({"steps": episode, "terminal": episode % 2 == 0, "epsilon": np.float32(0.5)})
+            sink.close()
+
+            with (Path(tmp) / "run.csv").open(encoding="utf-8") as csv_file:
+                rows = list(csv.DictReader(csv_file))
+            self.assertEqual([row["episode"] for row in rows], ["1", "2", "3", "4", "5"])
+
+            lines = (Path(tmp) / "run.jsonl").read_text(encoding="utf-8").splitlines()
+            self.assertEqual(json.loads(lines[-1]), {"episode": 5, "steps": 4, "terminal": True, "epsilon": 0.5})
+
+            columns = load_chunks(Path(tmp) / "run_chunks")
+            self.assertEqual(columns["steps"].tolist(), [0, 1, 2, 3, 4])
+            self.assertEqual(len(list((Path(tmp) / "run_chunks").iterdir())), 3)
+
+    def test_partial_batch_is_flushed_after_interval(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sink = MetricsSink(tmp, "run", formats=("jsonl",), batch_size=100, flush_interval=0.05)
+            sink.write({"steps": 1})
+            sink._thread.join(timeout=0.5)
+            self.assertTrue((Path(tmp) / "run.jsonl").exists())
+            sink.close()
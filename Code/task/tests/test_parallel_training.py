@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+
+from cli import build_parser, build_problem, resolve_run_arguments, train_agent
+from parallel_training import exploration_floors, train_parallel
+
+
+def batch_args(*extra):
+    parser = build_parser("test")
+    argv = ["--batch", "--size", "6", "6", "--seed", "3", *extra]
+    return resolve_run_arguments(parser, parser.parse_args(argv))
+
+
+class ParallelTrainingTestCase(unittest.TestCase):
+    def test_workers_share_the_episode_budget(self):
+        args = batch_args()
+        maze, feasibility, agent = build_problem(args)
+        q_array = agent.Q
+        episodes = []
+        stop = train_parallel(agent, feasibility.F_matrix, 301, workers=3, seed=1, episode_callback=episodes.append)
+
+        self.assertEqual(stop["reason"], "max_epochs")
+        self.assertEqual(stop["worker_episodes"], [101, 100, 100])
+        self.assertEqual(len(episodes), 301)
+        self.assertEqual(set(episodes[0]), {"cumulative_reward", "steps", "terminal", "epsilon", "max_q_delta"})
+        self.assertIs(agent.Q, q_array)
+        agent.walk(maze, feasibility)
+        self.assertEqual(agent.path[-1], agent.goal)
+
+    def test_greedy_check_stops_all_workers(self):
+        args = batch_args("--engine", "parallel", "--workers", "2", "--epochs", "100000", "--greedy-check-every", "5")
+        _, feasibility, agent = build_problem(args)
+        stop = train_agent(args, agent, feasibility)
+        self.assertEqual(stop["reason"], "greedy_solved")
+        self.assertLess(stop["episodes"], 100000)
+        self.assertIsNotNone(agent.greedy_path([np.flatnonzero(row) for row in feasibility.F_matrix]))
+
+    def test_exploration_floors(self):
+        np.testing.assert_allclose(exploration_floors(1), [0.01])
+        floors = exploration_floors(4, 0.01, 0.3)
+        self.assertAlmostEqual(floors[0], 0.01)
+        self.assertAlmostEqual(floors[-1], 0.3)
+        with self.assertRaises(ValueError):
+            train_parallel(None, np.zeros((1, 1)), 10, workers=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
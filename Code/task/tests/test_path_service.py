@@ -0,0 +1,90 @@
+import json
+import random
+import threading
+import unittest
+import urllib.request
+
+from convert import Feasibility
+from maze import Maze
+from path_service import PathService, make_server
+from tree_oracle import TreeOracle
+
+
+class PathServiceTestCase(unittest.TestCase):
+    def setUp(self):
+        random.seed(4)
+        self.feasibility = Feasibility(Maze(8, 6, [0, 0]))
+        self.oracle = TreeOracle(self.feasibility.F_matrix)
+        self.service = PathService.from_feasibility(self.feasibility, cache_size=2)
+
+    def test_paths_are_shortest_and_feasible(self):
+        F = self.feasibility.F_matrix
+        for start, goal in ((0, 47), (13, 2), (30, 30)):
+            path = self.service.path(start, goal)
+            self.assertEqual(path, self.oracle.path(start, goal))
+            self.assertTrue(all(F[a, b] == 1 for a, b in zip(path, path[1:])))
+            self.assertEqual(self.service.distance(start, goal), len(path) - 1)
+        self.assertEqual(self.service.query((0, 0), (7, 5))["length"], self.oracle.distance(0, 47))
+
+    def test_cache_is_bounded_and_shared_across_starts(self):
+        for start in range(10):
+            self.service.path(start, 47)
+        self.assertEqual(self.service.stats()["misses"], 1)
+        self.assertEqual(self.service.stats()["hits"], 9)
+
+        self.service.path(0, 1)
+        self.service.path(0, 2)
+        self.assertEqual(self.service.stats()["cached_goals"], 2)
+        self.service.path(0, 47)
+        self.assertEqual(self.service.stats()["misses"], 4)
+
+    def test_trees_built_across_an_update_are_not_cached(self):
+        build_tree = self.service._build_tree
+        path = self.service.path(0, 47)
+
+        def build_during_update(goal):
+            tree = build_tree(goal)
+            # Another request closes the first move of the path meanwhile.
+            self.service.update_edge(path[0], path[1], False)
+            return tree
+
+        self.service._build_tree = build_during_update
+        self.service.tree(13)
+        self.service._build_tree = build_tree
+        self.assertEqual(self.service.stats()["cached_goals"], 0)
+        self.assertIsNone(self.service.path(path[0], 47))
+
+    def test_batch_queries_and_invalid_cells(self):
+        results = self.service.query_many([(0, 47), (5, 47), ((1, 1), 3)])
+        self.assertEqual([r["length"] for r in results], [
+            self.oracle.distance(0, 47), self.oracle.distance(5, 47), self.oracle.distance(7, 3)
+        ])
+        with self.assertRaises(ValueError):
+            self.service.path(0, 48)
+        with self.assertRaises(ValueError):
+            self.service.path((8, 0), 1)
+
+    def test_http_front_end(self):
+        server = make_server(self.service, port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        base = f"http://127.0.0.1:{server.server_port}"
+        try:
+            with urllib.request.urlopen(f"{base}/path?start=0&goal=7,5") as response:
+                self.assertEqual(json.load(response)["path"], self.oracle.path(0, 47))
+
+            request = urllib.request.Request(f"{base}/paths", data=json.dumps({"pairs": [[1, 2], [3, 4]]}).encode())
+            with urllib.request.urlopen(request) as response:
+                lengths = [r["length"] for r in json.load(response)["results"]]
+            self.assertEqual(lengths, [self.oracle.distance(1, 2), self.oracle.distance(3, 4)])
+
+            with self.assertRaises(urllib.error.HTTPError) as context:
+                urllib.request.urlopen(f"{base}/path?start=0")
+            self.assertEqual(context.exception.code, 400)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
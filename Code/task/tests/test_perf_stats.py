@@ -0,0 +1,65 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from perf_stats import PHASES, ViewerStats
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ViewerStatsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def run_frame(self, stats, states, phase_seconds=0.002):
+        stats.begin_frame()
+        for phase in PHASES:
+            self.clock.now += phase_seconds
+            stats.mark(phase)
+        stats.end_frame(states, update_depth=3, metrics_depth=1)
+        # Idle time until the next frame, as in clock.tick.
+        self.clock.now += 0.1 - len(PHASES) * phase_seconds
+
+    def test_snapshot_averages_the_window(self):
+        stats = ViewerStats(window=4, clock=self.clock)
+        for states in (100, 200, 300, 400, 500):
+            self.run_frame(stats, states)
+
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot["frames"], 5)
+        for phase in PHASES:
+            self.assertAlmostEqual(snapshot[f"{phase}_ms"], 2.0)
+        self.assertAlmostEqual(snapshot["frame_ms"], 8.0)
+        self.assertAlmostEqual(snapshot["fps"], 10.0)
+        self.assertAlmostEqual(snapshot["states_per_frame"], 350.0)
+        self.assertAlmostEqual(snapshot["steps_per_second"], 3500.0)
+        self.assertEqual(snapshot["states_total"], 1500)
+        self.assertEqual(snapshot["update_queue"], 3)
+        self.assertEqual(len(stats.hud_lines()), 5)
+
+    def test_marks_outside_a_frame_are_ignored(self):
+        stats = ViewerStats(clock=self.clock)
+        stats.mark("scale")
+        self.assertEqual(stats.snapshot()["scale_ms"], 0.0)
+
+    def test_snapshots_are_logged_periodically(self):
+        with tempfile.TemporaryDirectory() as directory:
+            log_path = Path(directory) / "stats" / "viewer.jsonl"
+            stats = ViewerStats(log_path=log_path, log_interval=1.0, clock=self.clock)
+            for _ in range(25):
+                self.run_frame(stats, 10)
+            records = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+        self.assertEqual(len(records), 2)
+        self.assertEqual(stats.snapshots_logged, 2)
+        self.assertIn("steps_per_second", records[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import time
+import unittest
+
+import numpy as np
+
+from callback_protocol import RESET_SIGNAL
+from cli import build_parser, build_problem, resolve_run_arguments, train_agent
+from process_backend import ProcessTrainer, SharedStateSource, SharedTrainingBuffers
+
+
+def batch_args(*extra):
+    parser = build_parser("test")
+    argv = ["--batch", "--size", "6", "6", "--seed", "5", "--no-view", *extra]
+    return resolve_run_arguments(parser, parser.parse_args(argv))
+
+
+class SharedStateSourceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.buffers = SharedTrainingBuffers(9, ring_capacity=4)
+        self.source = SharedStateSource(self.buffers)
+
+    def tearDown(self):
+        self.buffers.close()
+
+    def test_drain_coalesces_visits_and_latest_state(self):
+        self.assertEqual(self.source.drain(), [])
+        for state in (RESET_SIGNAL, 0, 1, 0):
+            self.buffers.record(state)
+        (update,) = self.source.drain()
+        self.assertEqual(dict(update.visits), {0: 2, 1: 1})
+        self.assertEqual(update.latest_state, 0)
+        self.assertTrue(update.reset)
+        self.assertEqual(self.source.drain(), [])
+
+    def test_overwritten_entries_are_counted_but_visits_stay_exact(self):
+        for state in range(7):
+            self.buffers.record(state)
+        (update,) = self.source.drain()
+        self.assertEqual(sum(update.visits.values()), 7)
+        self.assertEqual(self.source.dropped, 3)
+        self.assertFalse(update.reset)
+
+    def test_reset_starts_a_new_generation(self):
+        self.buffers.record(3)
+        self.source.drain()
+        self.buffers.Q[3, 4] = 1.0
+        self.buffers.reset()
+        self.buffers.record(3)
+        (update,) = self.source.drain()
+        self.assertTrue(update.reset)
+        self.assertEqual(dict(update.visits), {3: 1})
+        self.assertEqual(self.buffers.Q.sum(), 0.0)
+
+
+class ProcessTrainerTestCase(unittest.TestCase):
+    def test_matches_thread_training(self):
+        args = batch_args("--epochs", "50")
+        _, feasibility, agent = build_problem(args)
+        episodes = []
+        trainer = ProcessTrainer(args, agent, feasibility, episode_callback=episodes.append)
+        try:
+            stop = trainer.run()
+            (update,) = trainer.state_source.drain()
+        finally:
+            trainer.close()
+        self.assertEqual(stop, {"reason": "max_epochs", "episodes": 50})
+        self.assertEqual(len(episodes), 50)
+        self.assertEqual(sum(update.visits.values()), sum(m["steps"] for m in episodes) + 50)
+
+        _, feasibility, expected = build_problem(args)
+        train_agent(args, expected, feasibility)
+        np.testing.assert_array_equal(agent.Q, expected.Q)
+
+    def test_pause_and_stop_over_the_control_pipe(self):
+        args = batch_args("--epochs", "1000000")
+        _, feasibility, agent = build_problem(args)
+        trainer = ProcessTrainer(args, agent, feasibility, poll_every=16)
+        try:
+            trainer.start()
+            deadline = time.monotonic() + 30
+            while trainer.episodes < 5 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            trainer.pause()
+            time.sleep(0.2)
+            paused_at = trainer.episodes
+            time.sleep(0.2)
+            self.assertEqual(trainer.episodes, paused_at)
+            trainer.resume()
+            trainer.stop()
+            stop = trainer.join(timeout=30)
+        finally:
+            trainer.close()
+        self.assertEqual(stop["reason"], "stopped")
+        self.assertGreaterEqual(stop["episodes"], 5)
+        self.assertIsInstance(agent.Q, np.ndarray)
+        self.assertGreater(np.abs(agent.Q).sum(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import random
+import threading
+import unittest
+from unittest import mock
+
+import pygame
+
+from callback_protocol import RESET_SIGNAL
+from convert import Feasibility
+from draw import cell_side, margin
+from live_view import LiveMazeViewer
+from maze import Maze
+from render_queue import CoalescingStateQueue, RenderQueue, make_render_queue
+
+
+class RenderQueueTestCase(unittest.TestCase):
+    def test_drop_oldest_keeps_newest_items(self):
+        updates = RenderQueue(maxsize=3, policy="drop_oldest")
+        for state in range(10):
+            updates.put(state)
+
+        self.assertEqual(updates.drain(), [7, 8, 9])
+        self.assertEqual(updates.dropped, 7)
+
+    def test_block_waits_for_drain_and_close_releases_producer(self):
+        updates = RenderQueue(maxsize=1, policy="block")
+        updates.put(0)
+        producer = threading.Thread(target=updates.put, args=(1,))
+        producer.start()
+        producer.join(timeout=0.1)
+        self.assertTrue(producer.is_alive())
+
+        self.assertEqual(updates.drain(), [0])
+        producer.join(timeout=1)
+        self.assertFalse(producer.is_alive())
+        self.assertEqual(updates.drain(), [1])
+
+        updates.put(2)
+        blocked = threading.Thread(target=updates.put, args=(3,))
+        blocked.start()
+        updates.close()
+        blocked.join(timeout=1)
+        self.assertFalse(blocked.is_alive())
+        self.assertEqual(updates.dropped, 1)
+
+    def test_coalesce_folds_states_into_counts(self):
+        updates = make_render_queue(policy="coalesce")
+        self.assertIsInstance(updates, CoalescingStateQueue)
+        for state in (RESET_SIGNAL, 0, 1, 0, RESET_SIGNAL, 2):
+            updates.put(state)
+
+        (update,) = updates.drain()
+        self.assertEqual(dict(update.visits), {0: 2, 1: 1, 2: 1})
+        self.assertEqual(update.latest_state, 2)
+        self.assertTrue(update.reset)
+        self.assertEqual(updates.coalesced, 3)
+        self.assertEqual(updates.drain(), [])
+
+    def test_unknown_policy_is_rejected(self):
+        with self.assertRaises(ValueError):
+            make_render_queue(policy="lifo")
+
+
+class CoalescedViewerTestCase(unittest.TestCase):
+    def setUp(self):
+        random.seed(3)
+        self.maze = Maze(4, 1, [0, 0])
+        self.feasibility = Feasibility(self.maze)
+
+        def stub_display(viewer):
+            viewer.maze_width, viewer.maze_height = (
+                margin + cell_side * dim for dim in viewer.maze.maze_grid.shape
+            )
+            viewer.base_width = viewer.maze_width + viewer.metrics_width
+            viewer.base_height = viewer.maze_height
+            viewer.trail_surface = pygame.Surface((viewer.base_width, viewer.base_height), pygame.SRCALPHA)
+
+        patcher = mock.patch.object(LiveMazeViewer, "_init_display", stub_display)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_coalesced_drain_marks_every_visited_cell_without_lines(self):
+        viewer = LiveMazeViewer(self.maze, self.feasibility, queue_policy="coalesce")
+        for state in (RESET_SIGNAL, 0, 1, 0, RESET_SIGNAL, 3):
+            viewer.enqueue_state(state)
+
+        viewer._drain_updates()
+
+        self.assertEqual(viewer.visit_counts.ravel().tolist(), [2, 1, 0, 1])
+        self.assertEqual(viewer.current_state, 3)
+        self.assertIsNone(viewer.previous_cell)
+        for state in (0, 1, 3):
+            center = viewer._cell_center(viewer._state_to_cell(state))
+            self.assertNotEqual(viewer.trail_surface.get_at(center).a, 0)
+
+        # Cell 2 was never visited; no line may connect cells 1 and 3 through it.
+        unvisited = viewer._cell_center(viewer._state_to_cell(2))
+        self.assertEqual(viewer.trail_surface.get_at(unvisited).a, 0)
+        self.assertEqual(
+            viewer.queue_counters(),
+            {"updates_dropped": 0, "updates_coalesced": 3, "metrics_dropped": 0},
+        )
@@ -0,0 +1,82 @@
+import random
+import unittest
+
+import numpy as np
+
+from convert import Feasibility, neighbor_lists
+from learn import Agent
+from maze import Maze
+from start_schedulers import goal_distances
+from state_reduction import ReducedProblem
+
+
+def graph(n, edges):
+    F = np.zeros((n, n), dtype=int)
+    for a, b in edges:
+        F[a, b] = F[b, a] = 1
+    return F
+
+
+def train_reduced(reduced, gamma=0.9, epochs=300):
+    agent = Agent.from_matrices(
+        reduced.F, reduced.start, reduced.goal, gamma, 0.9, R=reduced.R, discounts=reduced.discounts
+    )
+    agent.train(reduced.F, epochs)
+    return agent
+
+
+class StateReductionTestCase(unittest.TestCase):
+    def setUp(self):
+        # 0-1-2-3-4 with a longer loop 1-5-6-2 and dead ends 4-7 and 3-8-9.
+        self.F = graph(10, [(0, 1), (1, 2), (2, 3), (3, 4), (1, 5), (5, 6), (6, 2), (4, 7), (3, 8), (8, 9)])
+        self.original = Agent.from_matrices(self.F, 0, 4, 0.9, 0.9)
+
+    def test_dead_ends_are_filled_and_corridors_contracted(self):
+        reduced = ReducedProblem(self.F, self.original.R, 0, 4, 0.9)
+        self.assertEqual(reduced.states.tolist(), [0, 1, 2, 4])
+        self.assertFalse(reduced.alive[[7, 8, 9]].any())
+        u, v = reduced.index[[2, 4]]
+        self.assertEqual(reduced.edge_paths[(u, v)], [3])
+        self.assertAlmostEqual(reduced.discounts[u, v], 0.81)
+        self.assertAlmostEqual(reduced.R[u, v], -0.1 + 0.9 * 1000.0)
+        # The direct edge 1-2 beats the corridor through 5 and 6.
+        self.assertEqual(reduced.edge_paths[tuple(reduced.index[[1, 2]])], [])
+
+    def test_lifted_q_drives_the_original_greedy_walk(self):
+        np.random.seed(0)
+        reduced = ReducedProblem(self.F, self.original.R, 0, 4, 0.9)
+        agent = train_reduced(reduced)
+        reduced_path = agent.greedy_path(neighbor_lists(reduced.F))
+        self.assertEqual(reduced.expand_path(reduced_path), [0, 1, 2, 3, 4])
+
+        self.original.Q[...] = reduced.lift_q(agent.Q)
+        self.assertEqual(self.original.greedy_path(neighbor_lists(self.F)), [0, 1, 2, 3, 4])
+        self.assertLess(self.original.Q[3, 8], self.original.Q[3, 4])
+
+    def test_perfect_maze_reduces_to_the_solution_path(self):
+        random.seed(12)
+        np.random.seed(12)
+        maze = Maze(10, 10, [0, 0])
+        feasibility = Feasibility(maze)
+        original = Agent(feasibility, 0.9, 0.9, maze, 0, 0)
+        reduced = ReducedProblem(feasibility.F_matrix, original.R, original.start, original.goal, 0.9)
+        self.assertEqual(reduced.states.size, 2)
+        self.assertGreater(reduced.reduction, 0.9)
+
+        agent = train_reduced(reduced, epochs=20)
+        path = reduced.expand_path(agent.greedy_path(neighbor_lists(reduced.F)))
+        distances = goal_distances(neighbor_lists(feasibility.F_matrix.T), int(original.goal))
+        self.assertEqual(len(path) - 1, distances[original.start])
+
+        original.Q[...] = reduced.lift_q(agent.Q)
+        original.walk(maze, feasibility)
+        self.assertEqual(original.path, path)
+
+    def test_expand_path_passes_markers_through(self):
+        reduced = ReducedProblem(self.F, self.original.R, 0, 4, 0.9)
+        i = reduced.index
+        self.assertEqual(reduced.expand_path([i[0], i[1], i[2], "break"]), [0, 1, 2, "break"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+import tracing
+from callback_protocol import RESET_SIGNAL
+from cli import build_parser, build_problem, resolve_run_arguments, train_agent
+
+
+def spans(tracer, name):
+    return [event for event in tracer.trace_events() if event["name"] == name and event["ph"] == "X"]
+
+
+class TracingTestCase(unittest.TestCase):
+    def tearDown(self):
+        tracing.disable()
+
+    def test_disabled_tracing_records_nothing(self):
+        @tracing.traced("test")
+        def add(a, b):
+            return a + b
+
+        self.assertFalse(tracing.enabled())
+        with tracing.span("idle"):
+            pass
+        self.assertEqual(add(1, 2), 3)
+        with self.assertRaises(RuntimeError):
+            tracing.write_trace("unused.json")
+
+    def test_spans_carry_thread_ids_and_names(self):
+        tracer = tracing.enable()
+
+        @tracing.traced("test", "work")
+        def work():
+            with tracing.span("inner", "test", size=3):
+                pass
+
+        worker = threading.Thread(target=work, name="worker")
+        worker.start()
+        worker.join()
+        work()
+
+        events = tracer.trace_events()
+        names = {event["tid"]: event["args"]["name"] for event in events if event["name"] == "thread_name"}
+        self.assertIn("worker", names.values())
+        outer = spans(tracer, "work")
+        self.assertEqual(len({event["tid"] for event in outer}), 2)
+        inner = spans(tracer, "inner")
+        self.assertEqual(inner[0]["args"], {"size": 3})
+        self.assertLessEqual(outer[0]["ts"], inner[0]["ts"])
+
+    def test_ring_buffer_keeps_the_newest_spans(self):
+        tracer = tracing.enable(capacity=3)
+        for index in range(5):
+            with tracing.span(f"span{index}"):
+                pass
+        self.assertEqual(tracer.dropped, 2)
+        kept = [event["name"] for event in tracer.trace_events() if event["ph"] == "X"]
+        self.assertEqual(kept, ["span2", "span3", "span4"])
+
+    def test_concurrent_spans_are_all_counted(self):
+        tracer = tracing.enable(capacity=100)
+
+        def record():
+            for _ in range(5000):
+                tracer.complete("work", "test", 0.0, 1.0)
+
+        workers = [threading.Thread(target=record, name=f"worker-{index}") for index in range(4)]
+        for worker in workers:
+            worker.start()
+        while any(worker.is_alive() for worker in workers):
+            tracer.trace_events()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(tracer.recorded, 20000)
+        self.assertEqual(tracer.dropped, 20000 - 100)
+
+    def test_step_tracer_records_episodes_and_batches(self):
+        tracer = tracing.enable()
+        forwarded = []
+        step_tracer = tracing.StepTracer(forwarded.append, batch=2)
+        for state in (RESET_SIGNAL, 0, 1, 2, RESET_SIGNAL, 3):
+            step_tracer(state)
+        step_tracer.close()
+
+        self.assertEqual(len(forwarded), 6)
+        self.assertEqual([event["args"]["episode"] for event in spans(tracer, "episode")], [1, 2])
+        self.assertEqual([event["args"]["steps"] for event in spans(tracer, "steps")], [2, 1, 1])
+
+    def test_training_run_is_written_as_chrome_trace(self):
+        tracing.enable()
+        parser = build_parser("test")
+        argv = ["--batch", "--size", "4", "4", "--seed", "1", "--no-view", "--epochs", "15"]
+        args = resolve_run_arguments(parser, parser.parse_args(argv))
+        _, feasibility, agent = build_problem(args)
+        train_agent(args, agent, feasibility)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = tracing.write_trace(Path(directory) / "trace.json")
+            trace = json.loads(path.read_text(encoding="utf-8"))
+        names = [event["name"] for event in trace["traceEvents"]]
+        self.assertEqual(names.count("episode"), 15)
+        self.assertEqual(names.count("train"), 1)
+        self.assertEqual(trace["otherData"]["spans_dropped"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from cli import build_parser, build_problem, resolve_run_arguments, train_agent
+from training_log import ReplaySource, TrainingLog, TrainingRecorder
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TrainingLogTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        parser = build_parser("test")
+        argv = ["--batch", "--size", "5", "4", "--seed", "3", "--no-view", "--epochs", "20"]
+        self.args = resolve_run_arguments(parser, parser.parse_args(argv))
+        self.maze, self.feasibility, agent = build_problem(self.args)
+        self.stream = []
+        self.metrics = []
+
+        def state_callback(state):
+            self.stream.append(state)
+            recorder.record_state(state)
+
+        def episode_callback(metrics):
+            self.metrics.append(metrics)
+            recorder.record_metrics(metrics)
+
+        with TrainingRecorder(self.directory.name, self.maze, buffer_size=64) as recorder:
+            train_agent(self.args, agent, self.feasibility, state_callback, episode_callback=episode_callback)
+        self.log = TrainingLog(self.directory.name)
+
+    def tearDown(self):
+        self.log = None
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        self.assertEqual(len(self.log), len(self.stream))
+        self.assertEqual(self.log.episodes, 20)
+        first_end = self.stream.index("RESET", 1)
+        np.testing.assert_array_equal(self.log.episode_states(0), self.stream[1:first_end])
+        self.assertEqual(self.log.episode_metrics(19)["steps"], self.metrics[19]["steps"])
+        np.testing.assert_array_equal(self.log.maze().to_walls(), self.maze.to_walls())
+
+    def test_recording_again_replaces_the_log(self):
+        def record(episodes):
+            with TrainingRecorder(self.directory.name, self.maze) as recorder:
+                for episode in range(episodes):
+                    recorder.record_state("RESET")
+                    recorder.record_state(0)
+                    recorder.record_metrics({"steps": episode})
+
+        # 600 episodes fill three metric chunks; 20 fill one.
+        record(600)
+        record(20)
+        log = TrainingLog(self.directory.name)
+        self.assertEqual(log.episodes, 20)
+        self.assertEqual(log.metrics["steps"].tolist(), list(range(20)))
+
+    def test_replay_follows_the_clock_and_seeks(self):
+        clock = FakeClock()
+        sent = []
+        source = ReplaySource(self.log, speed=100.0, metrics_callback=sent.append, clock=clock)
+        self.assertEqual(source.drain(), [])
+
+        clock.now = 0.5
+        (update,) = source.drain()
+        self.assertEqual(source.position, 50)
+        self.assertEqual(sum(update.visits.values()), self.log.visit_counts(0, 50).sum())
+        self.assertEqual(len(sent), self.log.completed_episodes(50))
+
+        source.seek_episode(1)
+        (update,) = source.drain()
+        self.assertTrue(update.reset)
+        counts = np.zeros(self.log.n_states, dtype=int)
+        for state, count in update.visits.items():
+            counts[state] += count
+        np.testing.assert_array_equal(
+            counts, self.log.visit_counts(0, source.position) - self.log.visit_counts(0, 50)
+        )
+
+        source.toggle_pause()
+        clock.now = 10.0
+        self.assertEqual(source.drain(), [])
+        source.toggle_pause()
+        source.seek(len(self.log))
+        source.drain()
+        self.assertTrue(source.finished)
+        self.assertEqual(len(sent), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
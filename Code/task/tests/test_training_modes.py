@@ -0,0 +1,219 @@
+import random
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from convert import Feasibility, neighbor_lists
+from learn import Agent, get_possible_next_states
+from maze import Maze
+from start_schedulers import CountBasedStart, FixedStart, ReverseCurriculum, StartScheduler, goal_distances
+from traces import EligibilityTrace
+
+
+def make_agent(nx=5, ny=5, seed=11):
+    random.seed(seed)
+    np.random.seed(seed)
+    maze = Maze(nx, ny, [0, 0])
+    feasibility = Feasibility(maze)
+    return maze, feasibility, Agent(feasibility, 0.9, 0.9, maze, 0, 0)
+
+
+class NeighborListsTestCase(unittest.TestCase):
+    def test_matches_row_scan(self):
+        _, feasibility, agent = make_agent()
+        neighbors = neighbor_lists(feasibility.F_matrix)
+        for state in range(agent.n_states):
+            self.assertEqual(
+                neighbors[state].tolist(),
+                get_possible_next_states(state, feasibility.F_matrix, agent.n_states),
+            )
+
+
+class EarlyStoppingTestCase(unittest.TestCase):
+    def test_without_criteria_all_epochs_run(self):
+        _, feasibility, agent = make_agent()
+        metrics = []
+        stop = agent.train(feasibility.F_matrix, 30, episode_callback=metrics.append)
+        self.assertEqual(stop, {"reason": "max_epochs", "episodes": 30})
+        self.assertEqual(len(metrics), 30)
+        self.assertIn("max_q_delta", metrics[0])
+
+    def test_greedy_check_stops_with_a_solving_policy(self):
+        maze, feasibility, agent = make_agent()
+        stop = agent.train(feasibility.F_matrix, 2000, greedy_check_every=10)
+        self.assertEqual(stop["reason"], "greedy_solved")
+        self.assertLess(stop["episodes"], 2000)
+        self.assertEqual(stop["episodes"] % 10, 0)
+
+        path = agent.greedy_path(neighbor_lists(feasibility.F_matrix))
+        self.assertEqual(path[0], agent.start)
+        self.assertEqual(path[-1], agent.goal)
+        agent.walk(maze, feasibility)
+        self.assertEqual(agent.path, path)
+
+    def test_q_tolerance_and_policy_patience_stop_early(self):
+        _, feasibility, agent = make_agent()
+        stop = agent.train(feasibility.F_matrix, 5000, q_tolerance=1e-3, q_patience=5)
+        self.assertEqual(stop["reason"], "q_converged")
+        self.assertLess(stop["episodes"], 5000)
+
+        _, feasibility, agent = make_agent()
+        stop = agent.train(feasibility.F_matrix, 5000, policy_patience=50)
+        self.assertEqual(stop["reason"], "policy_stable")
+        self.assertLess(stop["episodes"], 5000)
+
+    def test_step_limit_aborts_greedy_path(self):
+        _, feasibility, agent = make_agent()
+        self.assertIsNone(agent.greedy_path(neighbor_lists(feasibility.F_matrix), max_steps=0))
+
+
+def optimal_policy(agent, F, sweeps=500):
+    # Value iteration on the known model, using the same backup as Agent.train.
+    feasible = F == 1
+    Q = np.zeros(agent.Q.shape)
+    for _ in range(sweeps):
+        V = np.where(feasible, Q, -np.inf).max(axis=1)
+        V[~feasible.any(axis=1)] = 0.0
+        Q = np.where(feasible, agent.R + agent.gamma * V[None, :], 0.0)
+    return np.where(feasible, Q, -np.inf).argmax(axis=1)
+
+
+def policy_agreement(agent, F, optimal):
+    feasible = F == 1
+    has_actions = feasible.any(axis=1)
+    greedy = np.where(feasible, agent.Q, -np.inf).argmax(axis=1)
+    return float((greedy[has_actions] == optimal[has_actions]).mean())
+
+
+class PlanningTestCase(unittest.TestCase):
+    def test_planning_spreads_values_with_fewer_real_steps(self):
+        agreement = {}
+        for mode in ("none", "dyna", "prioritized"):
+            _, feasibility, agent = make_agent(8, 8, seed=5)
+            optimal = optimal_policy(agent, feasibility.F_matrix)
+            agent.train(feasibility.F_matrix, 20, planning=mode, planning_steps=10)
+            agreement[mode] = policy_agreement(agent, feasibility.F_matrix, optimal)
+        self.assertGreater(agreement["dyna"], agreement["none"])
+        self.assertGreater(agreement["prioritized"], agreement["none"])
+        self.assertGreater(agreement["prioritized"], 0.9)
+
+    def test_dyna_is_reproducible_under_a_seed(self):
+        results = []
+        for _ in range(2):
+            _, feasibility, agent = make_agent(seed=9)
+            agent.train(feasibility.F_matrix, 10, planning="dyna", planning_steps=5)
+            results.append(agent.Q.copy())
+        np.testing.assert_array_equal(results[0], results[1])
+
+    def test_unknown_mode_is_rejected(self):
+        _, feasibility, agent = make_agent()
+        with self.assertRaises(ValueError):
+            agent.train(feasibility.F_matrix, 1, planning="rollout")
+
+
+class EligibilityTraceTestCase(unittest.TestCase):
+    def test_replacing_trace_evicts_the_weakest_pair(self):
+        trace = EligibilityTrace(2)
+        trace.mark(0, 1)
+        trace.decay(0.5)
+        trace.mark(1, 2)
+        trace.decay(0.5)
+        trace.mark(0, 1)  # replacing: back to 1 while (1, 2) has decayed to 0.5
+        trace.mark(2, 3)  # evicts (1, 2), the weakest pair
+        self.assertEqual(len(trace), 2)
+
+        Q = np.zeros((4, 4), dtype=np.float32)
+        self.assertEqual(sorted(trace.apply(Q, 2.0).tolist()), [0, 2])
+        self.assertEqual(Q[0, 1], 2.0)
+        self.assertEqual(Q[2, 3], 2.0)
+        self.assertEqual(Q[1, 2], 0.0)
+
+
+class WatkinsTestCase(unittest.TestCase):
+    def test_one_episode_spreads_the_goal_reward_along_the_trajectory(self):
+        rewarded = {}
+        for rule in ("q-learning", "watkins"):
+            _, feasibility, agent = make_agent(6, 6, seed=4)
+            agent.train(feasibility.F_matrix, 1, epsilon_start=0.0, start_exploration_prob=0.0, update_rule=rule)
+            rewarded[rule] = int((agent.Q > 0).sum())
+        # One-step Q-learning only credits the transition into the goal.
+        self.assertEqual(rewarded["q-learning"], 1)
+        self.assertGreater(rewarded["watkins"], 10)
+
+    def test_metrics_match_the_one_step_rule(self):
+        _, feasibility, agent = make_agent(seed=2)
+        metrics = []
+        stop = agent.train(feasibility.F_matrix, 15, episode_callback=metrics.append, update_rule="watkins")
+        self.assertEqual(stop["episodes"], 15)
+        self.assertEqual(set(metrics[0]), {"cumulative_reward", "steps", "terminal", "epsilon", "max_q_delta"})
+
+    def test_unknown_update_rule_is_rejected(self):
+        _, feasibility, agent = make_agent()
+        with self.assertRaises(ValueError):
+            agent.train(feasibility.F_matrix, 1, update_rule="sarsa")
+
+
+class StartSchedulerTestCase(unittest.TestCase):
+    def test_fixed_start_keeps_the_default_random_stream(self):
+        results = []
+        for scheduler in (None, FixedStart(0.05)):
+            _, feasibility, agent = make_agent(seed=6)
+            agent.train(feasibility.F_matrix, 40, start_scheduler=scheduler)
+            results.append(agent.Q.copy())
+        np.testing.assert_array_equal(results[0], results[1])
+
+    def test_reverse_curriculum_starts_near_the_goal_and_grows(self):
+        _, feasibility, agent = make_agent(seed=8)
+        predecessors = neighbor_lists(feasibility.F_matrix.T)
+        distances = goal_distances(predecessors, int(agent.goal))
+        self.assertEqual(distances[agent.goal], 0)
+        self.assertTrue(all(distances[p] == 1 for p in predecessors[int(agent.goal)]))
+
+        scheduler = ReverseCurriculum(initial_radius=1, radius_step=2, window=3, promote_at=1.0)
+        scheduler.bind(agent, neighbor_lists(feasibility.F_matrix), predecessors)
+        starts = [scheduler.next_start() for _ in range(20)]
+        self.assertTrue(all(distances[s] == 1 or s == agent.start for s in starts))
+
+        for _ in range(3):
+            scheduler.end_episode(starts[0], {"terminal": True, "steps": 1})
+        self.assertEqual(scheduler.radius, 3)
+        scheduler.end_episode(starts[0], {"terminal": True, "steps": 100})
+        self.assertEqual(len(scheduler.outcomes), 1)
+
+    def test_count_based_start_prefers_unvisited_states(self):
+        _, feasibility, agent = make_agent(seed=8)
+        scheduler = CountBasedStart(power=4.0)
+        scheduler.bind(agent, neighbor_lists(feasibility.F_matrix), neighbor_lists(feasibility.F_matrix.T))
+        rare = next(state for state in range(agent.n_states) if state != agent.goal)
+        for state in range(agent.n_states):
+            if state != rare:
+                for _ in range(50):
+                    scheduler.visit(state)
+        self.assertEqual({scheduler.next_start() for _ in range(30)}, {rare})
+
+    def test_count_based_start_never_leaves_the_eligible_states(self):
+        _, feasibility, agent = make_agent(seed=8)
+        scheduler = CountBasedStart()
+        scheduler.bind(agent, neighbor_lists(feasibility.F_matrix), neighbor_lists(feasibility.F_matrix.T))
+        scheduler.counts[:] = np.random.randint(0, 1000, agent.n_states)
+        eligible = set(np.flatnonzero(scheduler._eligible).tolist())
+        # The largest draw below 1.0 used to index past the last eligible state.
+        with mock.patch("numpy.random.random", return_value=1.0 - 2.0**-53):
+            self.assertIn(scheduler.next_start(), eligible)
+        self.assertLessEqual({scheduler.next_start() for _ in range(200)}, eligible)
+
+    def test_start_scheduler_is_abstract(self):
+        with self.assertRaises(TypeError):
+            StartScheduler()
+
+    def test_schedulers_plug_into_train(self):
+        for scheduler in (ReverseCurriculum(), CountBasedStart()):
+            _, feasibility, agent = make_agent(seed=1)
+            stop = agent.train(feasibility.F_matrix, 50, start_scheduler=scheduler)
+            self.assertEqual(stop["episodes"], 50)
+        self.assertGreater(scheduler.counts.sum(), 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import random
+import unittest
+
+import numpy as np
+
+from convert import Feasibility, neighbor_lists
+from maze import Maze
+from start_schedulers import goal_distances
+from tree_oracle import TreeOracle
+
+
+class TreeOracleTestCase(unittest.TestCase):
+    def setUp(self):
+        random.seed(21)
+        self.maze = Maze(9, 7, [0, 0])
+        self.feasibility = Feasibility(self.maze)
+        self.F = self.feasibility.F_matrix
+        self.oracle = TreeOracle(self.F, root=5)
+
+    def test_distances_match_breadth_first_search(self):
+        predecessors = neighbor_lists(self.F.T)
+        for target in (0, 17, 62):
+            expected = goal_distances(predecessors, target)
+            np.testing.assert_array_equal(self.oracle.distances_to(target), expected)
+            for source in (3, 40, 62):
+                self.assertEqual(self.oracle.distance(source, target), expected[source])
+
+    def test_paths_are_feasible_and_shortest(self):
+        for u, v in ((0, 62), (17, 4), (30, 30)):
+            path = self.oracle.path(u, v)
+            self.assertEqual((path[0], path[-1]), (u, v))
+            self.assertEqual(len(path) - 1, self.oracle.distance(u, v))
+            self.assertTrue(all(self.F[a, b] == 1 for a, b in zip(path, path[1:])))
+
+    def test_lca_many_matches_scalar_queries(self):
+        rng = np.random.default_rng(0)
+        us = rng.integers(0, self.oracle.n_states, size=50)
+        vs = rng.integers(0, self.oracle.n_states, size=50)
+        expected = [self.oracle.lca(int(u), int(v)) for u, v in zip(us, vs)]
+        self.assertEqual(self.oracle.lca_many(us, vs).tolist(), expected)
+
+    def test_score_walk(self):
+        optimal = self.oracle.path(0, 62)
+        score = self.oracle.score_walk(optimal, 0, 62)
+        self.assertTrue(score["solved"])
+        self.assertEqual(score["excess"], 0)
+
+        detour = optimal[:2] + [optimal[0]] + optimal[1:]
+        self.assertEqual(self.oracle.score_walk(detour, 0, 62)["excess"], 2)
+        self.assertFalse(self.oracle.score_walk(optimal[:-1] + ["break"], 0, 62)["solved"])
+        self.assertFalse(self.oracle.score_walk([0, 62], 0, 62)["valid"])
+
+    def test_graphs_with_loops_are_rejected(self):
+        F = self.F.copy()
+        # Open the 2x2 block in the corner (states 0, 1, 7 and 8) completely.
+        for a, b in ((0, 1), (0, 7), (1, 8), (7, 8)):
+            F[a, b] = F[b, a] = 1
+        with self.assertRaises(ValueError):
+            TreeOracle(F)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""Sparse, bounded eligibility traces for Watkins' Q(lambda).
+
+Only the (state, action) pairs visited recently carry an eligibility, so the
+trace is stored as a short list of pairs instead of a full N x N matrix. The
+list holds at most ``capacity`` pairs; when it is full, the pair with the
+smallest eligibility (the one visited longest ago) is evicted.
+"""
+
+import numpy as np
+
+
+class EligibilityTrace:
+    """Replacing eligibility traces over at most ``capacity`` pairs.
+
+    Parameters
+    ----------
+    capacity: int
+        Maximum number of (state, action) pairs that keep an eligibility.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.states = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros(capacity, dtype=np.float64)
+        self.size = 0
+        self._index = {}
+
+    def __len__(self):
+        return self.size
+
+    def clear(self):
+        self.size = 0
+        self._index.clear()
+
+    def mark(self, state: int, action: int):
+        """Set the eligibility of ``(state, action)`` to 1 (replacing trace)."""
+
+        key = (state, action)
+        position = self._index.get(key)
+        if position is None:
+            if self.size < self.capacity:
+                position = self.size
+                self.size += 1
+            else:
+                position = int(np.argmin(self.values))
+                del self._index[(int(self.states[position]), int(self.actions[position]))]
+            self.states[position] = state
+            self.actions[position] = action
+            self._index[key] = position
+        self.values[position] = 1.0
+
+    def apply(self, Q: np.ndarray, step: float):
+        """Add ``step * e(s, a)`` to every traced entry of ``Q``.
+
+        Returns the states whose rows were changed.
+        """
+
+        states = self.states[: self.size]
+        Q[states, self.actions[: self.size]] += step * self.values[: self.size]
+        return states
+
+    def decay(self, factor: float):
+        self.values[: self.size] *= factor
@@ -0,0 +1,248 @@
+"""Opt-in timeline tracing in the Chrome trace-event format.
+
+Tracing is off until :func:`enable` is called; until then :func:`span`
+returns a shared no-op context manager and :func:`traced` functions only
+pay for one global lookup. Once enabled, every finished span is appended to
+a bounded ring buffer as a complete (``"X"``) event with the native thread
+ID, so the training thread, the render loop and the export workers end up
+on separate tracks. :func:`write_trace` saves the buffer as JSON that
+``chrome://tracing`` or https://ui.perfetto.dev open offline::
+
+    python live_training_viewer.py --batch --size 20 20 --seed 1 --trace trace.json
+
+Training steps are traced through the state callback
+(:class:`StepTracer`): one span per episode and one per batch of steps,
+never one per step.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from callback_protocol import RESET_SIGNAL
+
+_tracer = None
+
+
+class Tracer:
+    """Ring buffer of finished spans.
+
+    Parameters
+    ----------
+    capacity: int
+        Number of spans kept; the oldest are overwritten first.
+    """
+
+    def __init__(self, capacity: int = 200_000):
+        self.capacity = capacity
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.recorded = 0
+        self._events = deque(maxlen=capacity)
+        self._thread_names = {}
+        # Guards the counter and the thread names, which the training thread,
+        # the render loop and export workers update concurrently.
+        self._lock = threading.Lock()
+
+    @property
+    def dropped(self) -> int:
+        with self._lock:
+            return self.recorded - len(self._events)
+
+    def complete(self, name: str, category: str, start: float, end: float, args=None):
+        """Record a span between two ``time.perf_counter()`` readings."""
+
+        tid = threading.get_native_id()
+        with self._lock:
+            if tid not in self._thread_names:
+                self._thread_names[tid] = threading.current_thread().name
+            self._events.append((name, category, tid, start, end - start, args))
+            self.recorded += 1
+
+    def span(self, name: str, category: str, args=None) -> "_Span":
+        return _Span(self, name, category, args)
+
+    def trace_events(self) -> list:
+        """The buffer as Chrome trace events, thread names first."""
+
+        with self._lock:
+            thread_names = dict(self._thread_names)
+            spans = list(self._events)
+        events = [
+            {"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0, "args": {"name": "maze training"}}
+        ]
+        events.extend(
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+            for tid, name in thread_names.items()
+        )
+        for name, category, tid, start, duration, args in spans:
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - self.origin) * 1e6,
+                "dur": duration * 1e6,
+                "pid": self.pid,
+                "tid": tid,
+            }
+            if args:
+                event["args"] = args
+            events.append(event)
+        return events
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "category", "args", "start")
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.complete(self.name, self.category, self.start, time.perf_counter(), self.args)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def enable(capacity: int = 200_000) -> Tracer:
+    """Start recording into a new :class:`Tracer` and return it."""
+
+    global _tracer
+    _tracer = Tracer(capacity)
+    return _tracer
+
+
+def disable():
+    global _tracer
+    _tracer = None
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def current() -> Tracer | None:
+    return _tracer
+
+
+def span(name: str, category: str = "app", **args):
+    """Context manager timing its body; a no-op while tracing is disabled."""
+
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(name, category, args or None)
+
+
+def traced(category: str = "app", name: str | None = None):
+    """Decorator recording a span for every call of the function."""
+
+    def decorate(function):
+        label = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                tracer.complete(label, category, start, time.perf_counter())
+
+        return wrapper
+
+    return decorate
+
+
+class StepTracer:
+    """``state_callback`` wrapper that records episodes and batches of steps.
+
+    Parameters
+    ----------
+    callback: callable | None
+        State callback to forward every state to.
+    batch: int
+        Steps per ``"steps"`` span.
+    """
+
+    def __init__(self, callback=None, batch: int = 256):
+        self.callback = callback
+        self.batch = batch
+        self.episode = 0
+        self._episode_start = None
+        self._batch_start = None
+        self._steps = 0
+
+    def __call__(self, state):
+        tracer = _tracer
+        if tracer is not None:
+            now = time.perf_counter()
+            if state == RESET_SIGNAL:
+                self._finish(tracer, now)
+                self.episode += 1
+                self._episode_start = self._batch_start = now
+            else:
+                self._steps += 1
+                if self._steps == self.batch:
+                    tracer.complete("steps", "training", self._batch_start, now, {"steps": self._steps})
+                    self._batch_start, self._steps = now, 0
+        if self.callback is not None:
+            self.callback(state)
+
+    def close(self):
+        """Record the spans of the episode that is still open."""
+
+        tracer = _tracer
+        if tracer is not None:
+            self._finish(tracer, time.perf_counter())
+        self._episode_start = None
+
+    def _finish(self, tracer, now):
+        if self._episode_start is None:
+            return
+        if self._steps:
+            tracer.complete("steps", "training", self._batch_start, now, {"steps": self._steps})
+            self._steps = 0
+        tracer.complete("episode", "training", self._episode_start, now, {"episode": self.episode})
+
+
+def write_trace(path, tracer: Tracer | None = None) -> Path:
+    """Write the spans of ``tracer`` (default: the active one) as Chrome trace JSON."""
+
+    tracer = tracer or _tracer
+    if tracer is None:
+        raise RuntimeError("Tracing is not enabled")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    trace = {
+        "traceEvents": tracer.trace_events(),
+        "displayTimeUnit": "ms",
+        "otherData": {"spans_recorded": tracer.recorded, "spans_dropped": tracer.dropped},
+    }
+    path.write_text(json.dumps(trace), encoding="utf-8")
+    return path
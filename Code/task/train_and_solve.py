@@ -1,20 +1,20 @@
 import threading
 import time
 from numbers import Integral
-
-import pandas as pd
-
-from convert import Feasibility
-from learn import Agent
-from live_view import LiveMazeViewer
-from maze import Maze
-
-
-def my_print(Q):
-    labels = [str(x) for x in range(Q.shape[0])]
-    df = pd.DataFrame(Q, columns=labels, index=labels)
-    pd.set_option('display.max_rows', None)
-    print(df.to_string())
+from pathlib import Path
+
+import tracing
+from cli import (
+    build_oracle,
+    build_parser,
+    build_problem,
+    resolve_run_arguments,
+    run_summary,
+    train_agent,
+    write_summary,
+)
+from inspect_matrix import print_edges, print_q_summary, save_matrix
+from training_log import TrainingRecorder
 
 
 def playback_path(viewer, path_states, delay_seconds: float = 0.35):
@@ -25,86 +25,88 @@ def playback_path(viewer, path_states, delay_seconds: float = 0.35):
         time.sleep(delay_seconds)
 
 
-if __name__ == "__main__":
-    while True:
-        try:
-            dimensions = input('Enter maze dimensions separated by a space: ').split()
-            dimension1, dimension2 = int(dimensions[0]), int(dimensions[1])
-            if 0 < dimension1 and 0 < dimension2:
-                break
-            else:
-                print("Maze dimensions cannot be 0.")
-        except ValueError:
-            print("Dimensions must be integers.")
-        except IndexError:
-            print("Please enter two numbers separated by a space.")
-
-    while True:
-        try:
-            start = input('Enter x and y coordinates of the maze start separated by a space: ').split()
-            start_x, start_y = int(start[0]), int(start[1])
-            if 0 <= start_x < dimension1 and 0 <= start_y < dimension2:
-                break
-            else:
-                print("Start coordinates should be inside the maze. Numbering is zero-based.")
-        except ValueError:
-            print("Start coordinates must be integers.")
-        except IndexError:
-            print("Please enter two numbers separated by a space.")
-
-    while True:
-        try:
-            gamma = float(input('Enter the gamma value (0, 1]: '))
-            if 0 < gamma <= 1:
-                break
-            else:
-                print("Gamma should be a number between 0 and 1.")
-        except ValueError:
-            print("Gamma should be a number between 0 and 1.")
-
-    while True:
-        try:
-            lrn_rate = float(input('Enter the learning rate value (0, 1]: '))
-            if 0 < lrn_rate <= 1:
-                break
-            else:
-                print("Learning rate should be a number between 0 and 1.")
-        except ValueError:
-            print("Learning rate should be a number between 0 and 1.")
-
-    max_epochs = 1000
-
-    # Create the Maze
-    maze = Maze(dimension1, dimension2, [start_x, start_y])
-
-    # Get the Feasibility Matrix
-    feasibility = Feasibility(maze)
-
-    # Initialize the agent:
-    agent = Agent(feasibility, gamma, lrn_rate, maze, start_x, start_y)
+def main(argv=None):
+    parser = build_parser("Train a Q-learning agent on a random maze and show the solved path.")
+    parser.add_argument(
+        "--print-tables",
+        action="store_true",
+        help="Print the feasible transitions and a per-state summary of Q.",
+    )
+    parser.add_argument("--top-k", type=int, default=3, help="Q-values listed per state with --print-tables.")
+    parser.add_argument("--edge-limit", type=int, help="Maximum number of transitions printed.")
+    parser.add_argument("--dump-dir", type=Path, help="Save the full F, R and Q matrices as .npy files here.")
+    parser.add_argument(
+        "--record-dir",
+        type=Path,
+        help="Record the visited states and episode metrics here for replay with training_log.py.",
+    )
+    parser.add_argument(
+        "--video", type=Path, help="Export the solved path as a GIF (.gif) or PNG sequence (directory)."
+    )
+    parser.add_argument("--trace", type=Path, help="Record a Chrome trace-event timeline of the run to this file.")
+    args = resolve_run_arguments(parser, parser.parse_args(argv))
+    if args.trace:
+        tracing.enable()
+
+    maze, feasibility, agent = build_problem(args)
+    if args.maze_image:
+        from draw import draw_maze
+
+        draw_maze(maze, args.maze_image)
 
     print("Analyzing maze with RL Q-learning")
-    print("The F matrix:\n")
-    my_print(feasibility.F_matrix)
+    if args.print_tables:
+        print("Feasible transitions:\n")
+        print_edges(feasibility.F_matrix, limit=args.edge_limit)
 
     # Train the model:
-    agent.train(feasibility.F_matrix, max_epochs)
-    print("Done ")
-
-    print("The Q matrix is: \n ")
-    my_print(agent.Q)
+    recorder = TrainingRecorder(args.record_dir, maze) if args.record_dir else None
+    callbacks = {}
+    if recorder is not None:
+        callbacks = {"state_callback": recorder.record_state, "episode_callback": recorder.record_metrics}
+    train_start = time.perf_counter()
+    stop = train_agent(args, agent, feasibility, **callbacks)
+    train_seconds = time.perf_counter() - train_start
+    if recorder is not None:
+        recorder.close()
+        print(f"Recorded {recorder.entries} states of {recorder.episodes} episodes to {args.record_dir}")
+    print(f"Done after {stop['episodes']} episodes ({stop['reason']})")
+
+    if args.print_tables:
+        print("Q per state (feasible actions):\n")
+        print_q_summary(agent.Q, feasibility.F_matrix, k=args.top_k)
+    if args.dump_dir:
+        for name, matrix in (("F", feasibility.F_matrix), ("R", agent.R), ("Q", agent.Q)):
+            save_matrix(matrix, args.dump_dir / f"{name}.npy")
+        print(f"Saved F, R and Q to {args.dump_dir}")
 
     print(f"Using Q to go from start to goal ({agent.goal})")
 
     agent.walk(maze, feasibility)
+    summary = run_summary(args, agent, agent.path, train_seconds, stop, build_oracle(feasibility))
+    write_summary(args.output_json, summary)
 
     solved_path = [state for state in agent.path if isinstance(state, Integral)]
+    if solved_path and args.video:
+        from episode_video import export_video
+
+        export_video(maze, args.video, path=solved_path)
+        print(f"Saved the solved path to {args.video}")
     if not solved_path:
         print("Er kon geen geldig pad worden gevonden.")
-    else:
-        viewer = LiveMazeViewer(maze, feasibility, title="Maze solution")
+    elif not args.no_view:
+        from live_view import LiveMazeViewer
+
+        # Playback needs every state in order, so bound the queue and block.
+        viewer = LiveMazeViewer(maze, feasibility, title="Maze solution", queue_policy="block", queue_maxsize=64)
         viewer.set_solved_path(solved_path)
         playback = threading.Thread(target=playback_path, args=(viewer, solved_path), daemon=True)
         playback.start()
         viewer.run()
         playback.join()
+    if args.trace:
+        print(f"Saved trace to {tracing.write_trace(args.trace)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""Record the training stream to disk and replay it later at any speed.
+
+:class:`TrainingRecorder` provides a ``state_callback`` and an
+``episode_callback`` for ``Agent.train`` that append to a run log instead
+of feeding a viewer, so training runs headless at full speed. A log
+directory holds::
+
+    states.i32        int32 state IDs in visiting order; -1 marks RESET_SIGNAL
+    metrics_chunks/   episode metrics as columnar .npz chunks (metrics_sink)
+    walls.npy         wall masks of the maze (see Maze.from_walls)
+    manifest.json     format version, maze size, start, end and counts
+
+:class:`TrainingLog` memory-maps the state file, and :class:`ReplaySource`
+plays it back into :class:`live_view.LiveMazeViewer` in place of the live
+state queue, at a chosen number of states per second and with seeking::
+
+    python train_and_solve.py --batch --size 20 20 --seed 1 --no-view --record-dir data/logs/run1
+    python training_log.py data/logs/run1 --speed 20000
+"""
+
+import argparse
+import json
+import shutil
+import time
+from array import array
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from callback_protocol import RESET_SIGNAL
+from maze import Maze
+from metrics_sink import MetricsSink, load_chunks
+from render_queue import CoalescedUpdate
+
+FORMAT_VERSION = 1
+STATE_DTYPE = np.dtype(np.int32)
+# Entry of the state file standing for RESET_SIGNAL.
+RESET_CODE = -1
+STATE_FILE = "states.i32"
+METRICS_STEM = "metrics"
+
+
+def _find_cell(maze, status):
+    for cell in maze.maze_grid.flat:
+        if cell.status == status:
+            return [int(cell.x), int(cell.y)]
+    raise ValueError(f"The maze has no {status} cell")
+
+
+class TrainingRecorder:
+    """Append the training stream of one run to a log directory.
+
+    Parameters
+    ----------
+    directory: Path | str
+        Log directory; created when missing. An existing log is replaced:
+        its metric chunks and manifest are removed first.
+    maze: maze.Maze
+        Maze being trained on; stored so the log can be replayed alone.
+    buffer_size: int
+        Number of states collected in memory before they are appended to
+        the state file.
+    """
+
+    def __init__(self, directory, maze, buffer_size: int = 65536):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.buffer_size = buffer_size
+        self.entries = 0
+        self.episodes = 0
+        self.closed = False
+        self._manifest = {
+            "format_version": FORMAT_VERSION,
+            "size": [maze.nx, maze.ny],
+            "start": _find_cell(maze, "Start"),
+            "end": [int(v) for v in maze.end],
+            "dtype": STATE_DTYPE.str,
+        }
+        # MetricsSink numbers its chunks from 0 again and load_chunks reads
+        # every chunk in the directory, so old chunks would mix into this log.
+        (self.directory / "manifest.json").unlink(missing_ok=True)
+        shutil.rmtree(self.directory / f"{METRICS_STEM}_chunks", ignore_errors=True)
+        np.save(self.directory / "walls.npy", maze.to_walls())
+        self._buffer = array("i")
+        self._handle = open(self.directory / STATE_FILE, "wb")
+        self._metrics = MetricsSink(self.directory, METRICS_STEM, formats=("npz",))
+
+    def record_state(self, state):
+        """``state_callback``: append a state ID or ``RESET_SIGNAL``."""
+
+        self._buffer.append(RESET_CODE if state == RESET_SIGNAL else state)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def record_metrics(self, metrics):
+        """``episode_callback``: append the metrics of one episode."""
+
+        self.episodes += 1
+        self._metrics.write(metrics)
+
+    def flush(self):
+        """Append the buffered states to the state file."""
+
+        self._buffer.tofile(self._handle)
+        self.entries += len(self._buffer)
+        self._buffer = array("i")
+
+    def close(self):
+        """Write the buffered states, the pending metrics and the manifest."""
+
+        if self.closed:
+            return
+        self.closed = True
+        self.flush()
+        self._handle.close()
+        self._metrics.close()
+        manifest = {**self._manifest, "entries": self.entries, "episodes": self.episodes}
+        (self.directory / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TrainingLog:
+    """Read access to a directory written by :class:`TrainingRecorder`."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.manifest = json.loads((self.directory / "manifest.json").read_text(encoding="utf-8"))
+        if self.manifest["format_version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported training log format {self.manifest['format_version']}")
+        # np.memmap refuses empty files.
+        if self.manifest["entries"]:
+            self.states = np.memmap(self.directory / STATE_FILE, dtype=self.manifest["dtype"], mode="r")
+        else:
+            self.states = np.zeros(0, dtype=STATE_DTYPE)
+        self.episode_starts = np.flatnonzero(self.states == RESET_CODE)
+        chunk_dir = self.directory / f"{METRICS_STEM}_chunks"
+        self.metrics = load_chunks(chunk_dir) if chunk_dir.exists() else {}
+        self.metrics.pop("episode", None)
+
+    def __len__(self):
+        return len(self.states)
+
+    @property
+    def episodes(self) -> int:
+        return len(self.episode_starts)
+
+    @property
+    def n_states(self) -> int:
+        nx, ny = self.manifest["size"]
+        return nx * ny
+
+    def maze(self) -> Maze:
+        return Maze.from_walls(np.load(self.directory / "walls.npy"), self.manifest["start"], self.manifest["end"])
+
+    def episode_states(self, episode: int) -> np.ndarray:
+        """States of ``episode`` (zero-based), without the reset marker."""
+
+        begin = self.episode_starts[episode] + 1
+        end = self.episode_starts[episode + 1] if episode + 1 < self.episodes else len(self.states)
+        return np.asarray(self.states[begin:end])
+
+    def episode_metrics(self, episode: int) -> dict:
+        return {name: column[episode].item() for name, column in self.metrics.items() if episode < len(column)}
+
+    def episode_at(self, position: int) -> int:
+        """Episode the entry at ``position`` belongs to (-1 before the first reset)."""
+
+        return int(np.searchsorted(self.episode_starts, position, side="right")) - 1
+
+    def completed_episodes(self, position: int) -> int:
+        """Number of episodes finished by the first ``position`` entries."""
+
+        if position >= len(self.states):
+            return self.episodes
+        return max(0, int(np.searchsorted(self.episode_starts, position, side="left")) - 1)
+
+    def visit_counts(self, begin: int = 0, end: int | None = None) -> np.ndarray:
+        """Per-state visit counts over the entries ``begin:end``."""
+
+        window = np.asarray(self.states[begin:end])
+        return np.bincount(window[window != RESET_CODE], minlength=self.n_states)
+
+
+class ReplaySource:
+    """Play a :class:`TrainingLog` back into ``LiveMazeViewer``.
+
+    Drop-in for the coalescing state queue (``state_source``) and for the
+    training control (``training_control``) of the viewer: every
+    :meth:`drain` advances ``speed`` entries per second of wall time and
+    returns one :class:`CoalescedUpdate` with the visits since the previous
+    frame. Space pauses, ``r`` restarts, the arrow keys skip episodes
+    (left/right) and double or halve the speed (up/down).
+
+    Parameters
+    ----------
+    log: TrainingLog
+        Log to play back.
+    speed: float
+        Entries (states and reset markers) per second.
+    metrics_callback: callable | None
+        Receives the metrics of every episode once playback has passed it,
+        e.g. ``LiveMazeViewer.enqueue_metrics``. Metrics already sent are not
+        taken back when seeking backwards.
+    clock: callable
+        Time source in seconds; replaceable in tests.
+    """
+
+    policy = "coalesce"
+
+    def __init__(self, log: TrainingLog, speed: float = 1000.0, metrics_callback=None, clock=time.monotonic):
+        if speed <= 0:
+            raise ValueError("speed must be positive")
+        self.log = log
+        self.speed = float(speed)
+        self.metrics_callback = metrics_callback
+        self.clock = clock
+        self.paused = False
+        self.closed = False
+        self.dropped = 0
+        self.coalesced = 0
+        self._cursor = 0.0
+        self._shown = 0
+        self._metrics_sent = 0
+        self._jumped = False
+        self._last_tick = None
+
+    @property
+    def position(self) -> int:
+        """Number of log entries played so far."""
+
+        return int(self._cursor)
+
+    @property
+    def finished(self) -> bool:
+        return self.position >= len(self.log)
+
+    def put(self, state):
+        # The log is the only producer.
+        self.dropped += 1
+
+    def seek(self, position: int):
+        """Continue playback at entry ``position``; the next drain catches up."""
+
+        self._cursor = float(min(max(0, position), len(self.log)))
+        self._jumped = True
+
+    def seek_episode(self, episode: int):
+        """Continue playback at the start of ``episode`` (zero-based)."""
+
+        if not self.log.episodes:
+            return
+        episode = min(max(0, episode), self.log.episodes - 1)
+        self.seek(int(self.log.episode_starts[episode]))
+
+    def skip_episodes(self, count: int):
+        self.seek_episode(max(0, self.log.episode_at(self.position)) + count)
+
+    def set_speed(self, speed: float):
+        if speed <= 0:
+            raise ValueError("speed must be positive")
+        self.speed = float(speed)
+
+    def toggle_pause(self):
+        self.paused = not self.paused
+
+    def reset(self):
+        # The viewer clears its own counts when it asks for a restart.
+        self._cursor = 0.0
+        self._shown = 0
+        self._metrics_sent = 0
+
+    def stop(self):
+        self.paused = True
+
+    def drain(self) -> list:
+        if self.closed:
+            return []
+        now = self.clock()
+        if self._last_tick is not None and not self.paused:
+            self._cursor = min(self._cursor + (now - self._last_tick) * self.speed, float(len(self.log)))
+        self._last_tick = now
+
+        position, shown = self.position, self._shown
+        self._send_metrics(position)
+        if position == shown:
+            return []
+
+        log = self.log
+        if position > shown:
+            delta = log.visit_counts(shown, position)
+            reset = self._jumped or bool((np.asarray(log.states[shown:position]) == RESET_CODE).any())
+        else:
+            # Seeking backwards takes the skipped visits off the heat map.
+            delta = -log.visit_counts(position, shown)
+            reset = True
+        self._shown = position
+        self._jumped = False
+
+        changed = np.flatnonzero(delta)
+        visits = Counter(dict(zip(changed.tolist(), delta[changed].tolist())))
+        self.coalesced += max(0, int(np.abs(delta).sum()) - 1)
+        latest = int(log.states[position - 1]) if position else RESET_CODE
+        return [CoalescedUpdate(visits, None if latest == RESET_CODE else latest, reset)]
+
+    def _send_metrics(self, position):
+        completed = self.log.completed_episodes(position)
+        if self.metrics_callback is not None:
+            for episode in range(self._metrics_sent, completed):
+                self.metrics_callback(self.log.episode_metrics(episode))
+        self._metrics_sent = completed
+
+    def qsize(self) -> int:
+        return len(self.log) - self.position
+
+    def close(self):
+        self.closed = True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded training run in the live viewer.")
+    parser.add_argument("log_dir", type=Path, help="Directory written with --record-dir.")
+    parser.add_argument("--speed", type=float, default=1000.0, help="Log entries played per second.")
+    parser.add_argument("--start-episode", type=int, default=0, help="Episode (zero-based) to start at.")
+    parser.add_argument("--fps", type=int, default=30, help="Maximum frames per second of the viewer.")
+    parser.add_argument(
+        "--output-dir", type=Path, help="Directory for the images exported on close (default: <log_dir>/replay)."
+    )
+    args = parser.parse_args(argv)
+    if args.speed <= 0:
+        parser.error("--speed must be positive.")
+
+    from convert import Feasibility
+    from live_view import LiveMazeViewer
+
+    log = TrainingLog(args.log_dir)
+    maze = log.maze()
+    output_dir = args.output_dir or args.log_dir / "replay"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    source = ReplaySource(log, speed=args.speed)
+    source.seek_episode(args.start_episode)
+    viewer = LiveMazeViewer(
+        maze,
+        Feasibility(maze),
+        title=f"Replay of {args.log_dir.name}",
+        output_dir=output_dir,
+        keep_runs=None,
+        state_source=source,
+        training_control=source,
+    )
+    source.metrics_callback = viewer.enqueue_metrics
+    print(f"Replaying {log.episodes} episodes ({len(log)} entries) from {args.log_dir}")
+    viewer.run(fps=args.fps)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Distance and path queries on perfect mazes.
+
+``Maze`` carves its corridors with a depth-first search, so the feasibility
+graph is a spanning tree: there is exactly one path between any two cells.
+:class:`TreeOracle` roots that tree once (parent pointers and depths) and
+builds a binary-lifting table, after which the lowest common ancestor of two
+cells, and with it their distance, takes O(log N) time. Paths cost
+O(log N + length).
+"""
+
+from collections import deque
+
+import numpy as np
+
+from convert import as_matrix, neighbor_lists
+
+
+class TreeOracle:
+    """Precomputed LCA index over the spanning tree of a perfect maze.
+
+    Parameters
+    ----------
+    F: np.ndarray
+        Symmetric feasibility matrix of a perfect maze.
+    root: int
+        State the tree is rooted at; any state gives the same answers.
+
+    Raises
+    ------
+    ValueError
+        If the feasibility graph is not a tree (it has loops or is not
+        connected).
+    """
+
+    def __init__(self, F, root: int = 0):
+        F = as_matrix(F)
+        self.n_states = F.shape[0]
+        self.neighbors = neighbor_lists(F)
+        n_edges = sum(actions.size for actions in self.neighbors) // 2
+        if n_edges != self.n_states - 1:
+            raise ValueError(
+                f"Feasibility graph has {n_edges} edges; a tree over {self.n_states} states has {self.n_states - 1}"
+            )
+
+        self.root = root
+        self.parent = np.full(self.n_states, -1, dtype=np.int64)
+        self.depth = np.full(self.n_states, -1, dtype=np.int64)
+        self.parent[root] = root
+        self.depth[root] = 0
+        frontier = deque([root])
+        while frontier:
+            state = frontier.popleft()
+            for child in self.neighbors[state].tolist():
+                if self.depth[child] < 0:
+                    self.parent[child] = state
+                    self.depth[child] = self.depth[state] + 1
+                    frontier.append(child)
+        if (self.depth < 0).any():
+            raise ValueError("Feasibility graph is not connected")
+
+        # up[k][v] is the 2**k-th ancestor of v (the root is its own parent).
+        levels = max(1, int(self.depth.max()).bit_length())
+        self.up = np.empty((levels, self.n_states), dtype=np.int64)
+        self.up[0] = self.parent
+        for k in range(1, levels):
+            self.up[k] = self.up[k - 1][self.up[k - 1]]
+
+    def lca(self, u: int, v: int) -> int:
+        """Lowest common ancestor of ``u`` and ``v``."""
+
+        if self.depth[u] < self.depth[v]:
+            u, v = v, u
+        diff = int(self.depth[u] - self.depth[v])
+        k = 0
+        while diff:
+            if diff & 1:
+                u = int(self.up[k][u])
+            diff >>= 1
+            k += 1
+        if u == v:
+            return int(u)
+        for k in range(self.up.shape[0] - 1, -1, -1):
+            if self.up[k][u] != self.up[k][v]:
+                u, v = int(self.up[k][u]), int(self.up[k][v])
+        return int(self.parent[u])
+
+    def distance(self, u: int, v: int) -> int:
+        """Number of moves on the unique path between ``u`` and ``v``."""
+
+        return int(self.depth[u] + self.depth[v] - 2 * self.depth[self.lca(u, v)])
+
+    def path(self, u: int, v: int) -> list[int]:
+        """States on the unique path from ``u`` to ``v``, both included."""
+
+        ancestor = self.lca(u, v)
+        up_part = [int(u)]
+        while up_part[-1] != ancestor:
+            up_part.append(int(self.parent[up_part[-1]]))
+        down_part = [int(v)]
+        while down_part[-1] != ancestor:
+            down_part.append(int(self.parent[down_part[-1]]))
+        return up_part + down_part[-2::-1]
+
+    def lca_many(self, us, vs) -> np.ndarray:
+        """Vectorised :meth:`lca` over arrays of state pairs."""
+
+        u, v = np.broadcast_arrays(np.asarray(us, dtype=np.int64), np.asarray(vs, dtype=np.int64))
+        swap = self.depth[u] < self.depth[v]
+        u, v = np.where(swap, v, u), np.where(swap, u, v)
+        diff = self.depth[u] - self.depth[v]
+        for k in range(self.up.shape[0]):
+            jump = (diff >> k) & 1 == 1
+            u = np.where(jump, self.up[k][u], u)
+        for k in range(self.up.shape[0] - 1, -1, -1):
+            differ = self.up[k][u] != self.up[k][v]
+            u = np.where(differ, self.up[k][u], u)
+            v = np.where(differ, self.up[k][v], v)
+        return np.where(u == v, u, self.parent[u])
+
+    def distances_to(self, target: int) -> np.ndarray:
+        """Distance from every state to ``target``, e.g. a goal heuristic."""
+
+        states = np.arange(self.n_states)
+        return self.depth + self.depth[target] - 2 * self.depth[self.lca_many(states, target)]
+
+    def score_walk(self, path, start: int, goal: int) -> dict:
+        """Compare a walk (e.g. ``Agent.path``) with the optimal path.
+
+        Returns the walk length, the optimal length, whether every move is a
+        tree edge and whether the goal was reached, plus the excess moves and
+        the ratio of walk length to optimal length for valid, solved walks.
+        """
+
+        states = [int(state) for state in path if isinstance(state, (int, np.integer))]
+        moves = max(0, len(states) - 1)
+        valid = bool(states) and states[0] == start
+        for a, b in zip(states, states[1:]):
+            if self.parent[a] != b and self.parent[b] != a:
+                valid = False
+                break
+        solved = valid and states[-1] == goal and all(isinstance(s, (int, np.integer)) for s in path)
+        optimal = self.distance(start, goal)
+        return {
+            "length": moves,
+            "optimal_length": optimal,
+            "valid": valid,
+            "solved": solved,
+            "excess": moves - optimal if solved else None,
+            "ratio": (moves / optimal if optimal else 1.0) if solved else None,
+        }